@@ -0,0 +1,139 @@
+"""Compares request throughput through the synchronous and asynchronous repository interfaces.
+
+Each request does what the articles page does: fetches the articles for a date, the ids for a tag and a page of those
+articles. The synchronous baseline serves requests one after another; the async backends are given a number of
+concurrent clients. --latency adds a simulated I/O delay to every call on the MemoryRepository backends, standing in
+for a repository on the far side of a network.
+
+Usage:
+    python -m benchmarks.async_throughput --rows 10000 --requests 500 --concurrency 1 8 32 --latency 0 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from movie.adapters.async_repository import AsyncSqliteRepository, ThreadPoolRepository
+from movie.adapters.memory_repository import MemoryRepository, populate
+from movie.articles import services
+
+from benchmarks.generate import generate_catalog
+
+
+PAGE_SIZE = 3
+
+
+class SlowRepository:
+    # Delays every call on repo by latency seconds, as a round trip to a remote store would. The delay is a sleep, so
+    # it releases the GIL as real I/O does.
+
+    def __init__(self, repo, latency: float):
+        self._repo = repo
+        self._latency = latency
+
+    def __getattr__(self, name):
+        method = getattr(self._repo, name)
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return method(*args, **kwargs)
+        return call
+
+
+def make_requests(repo: MemoryRepository, number: int, seed: int = 0):
+    # The (date, tag name) of each request, drawn from the catalog.
+    generator = random.Random(seed)
+    ids = range(1, repo.get_number_of_articles() + 1)
+    dates = [article.date for article in repo.get_articles_by_id(generator.sample(ids, min(100, len(ids))))]
+    tag_names = [tag.tag_name for tag in repo.get_tags()]
+    return [(generator.choice(dates), generator.choice(tag_names)) for _ in range(number)]
+
+
+def serve(repo, target_date, tag_name):
+    services.get_articles_by_date(target_date, repo)
+    article_ids = services.get_article_ids_for_tag(tag_name, repo)
+    services.get_articles_by_id(article_ids[:PAGE_SIZE], repo)
+
+
+async def serve_async(repo, target_date, tag_name):
+    await services.get_articles_by_date_async(target_date, repo)
+    article_ids = await services.get_article_ids_for_tag_async(tag_name, repo)
+    await services.get_articles_by_id_async(article_ids[:PAGE_SIZE], repo)
+
+
+def run_sync(repo, requests) -> float:
+    # Returns requests per second.
+    start = time.perf_counter()
+    for target_date, tag_name in requests:
+        serve(repo, target_date, tag_name)
+    return len(requests) / (time.perf_counter() - start)
+
+
+async def run_async(repo, requests, concurrency: int) -> float:
+    # Returns requests per second, with concurrency clients each taking the next request when their last completes.
+    pending = iter(requests)
+
+    async def client():
+        for target_date, tag_name in pending:
+            await serve_async(repo, target_date, tag_name)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(requests) / (time.perf_counter() - start)
+
+
+def run_throughput(data_path: str, number_of_requests: int, concurrency_levels, latencies):
+    # Returns {(backend, latency in ms, concurrency): requests per second}.
+    results = dict()
+
+    memory_repo = MemoryRepository()
+    populate(data_path, memory_repo)
+    requests = make_requests(memory_repo, number_of_requests)
+
+    # Serve every request once first, so that lazily built indexes are in place and the measured calls only read.
+    run_sync(memory_repo, requests)
+
+    sqlite_repo = AsyncSqliteRepository()
+    asyncio.run(sqlite_repo.populate(data_path))
+
+    for latency in latencies:
+        slow_repo = SlowRepository(memory_repo, latency / 1000) if latency > 0 else memory_repo
+        results[('sync', latency, 1)] = run_sync(slow_repo, requests)
+
+        for concurrency in concurrency_levels:
+            # Reads don't change the warmed MemoryRepository, so they can run concurrently.
+            thread_pool_repo = ThreadPoolRepository(slow_repo, max_workers=concurrency, concurrent_reads=True)
+            results[('thread_pool', latency, concurrency)] = asyncio.run(
+                run_async(thread_pool_repo, requests, concurrency))
+            thread_pool_repo.close()
+
+            if latency == 0:
+                results[('sqlite', latency, concurrency)] = asyncio.run(
+                    run_async(sqlite_repo, requests, concurrency))
+
+    sqlite_repo.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare request throughput of the repository interfaces.')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--data', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--latency', type=float, nargs='+', default=[0, 2], help='Simulated I/O latency per call, ms')
+    args = parser.parse_args()
+
+    data_path = os.path.join(args.data, str(args.rows))
+    if not os.path.exists(os.path.join(data_path, 'Data1000Movies.csv')):
+        generate_catalog(data_path, args.rows)
+
+    results = run_throughput(data_path, args.requests, args.concurrency, args.latency)
+    for (backend, latency, concurrency), requests_per_second in results.items():
+        print(f'{args.rows:>8} {backend:<12} latency {latency:>5g} ms  concurrency {concurrency:>4} '
+              f'{requests_per_second:>10.0f} requests/s')
+
+
+if __name__ == '__main__':
+    main()
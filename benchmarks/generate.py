@@ -0,0 +1,125 @@
+"""Writes synthetic catalogs in the same format as movie/adapters/data.
+
+Usage:
+    python -m benchmarks.generate --rows 10000 100000 1000000 --out benchmarks/data
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy', 'History',
+    'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War', 'Western'
+]
+
+FIRST_NAMES = [
+    'Anne', 'Ben', 'Chris', 'Dana', 'Emma', 'Frank', 'Grace', 'Hugo', 'Iris', 'Jack', 'Kate', 'Liam', 'Maya', 'Noah',
+    'Olive', 'Paul', 'Quinn', 'Rosa', 'Sam', 'Tara'
+]
+
+LAST_NAMES = [
+    'Adams', 'Brown', 'Clark', 'Davis', 'Evans', 'Fisher', 'Garcia', 'Hill', 'Irwin', 'Jones', 'King', 'Lopez',
+    'Moore', 'Nolan', 'Owens', 'Parker', 'Reed', 'Scott', 'Turner', 'Walker'
+]
+
+WORDS = [
+    'a', 'team', 'of', 'unlikely', 'heroes', 'must', 'stop', 'an', 'ancient', 'evil', 'before', 'the', 'city',
+    'falls', 'while', 'young', 'detective', 'uncovers', 'secret', 'that', 'changes', 'everything', 'family', 'war',
+    'love', 'journey', 'across', 'distant', 'world', 'night', 'last', 'summer', 'island', 'escape', 'dream'
+]
+
+MOVIE_HEADERS = [
+    'Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating', 'Votes',
+    'Revenue (Millions)', 'Metascore'
+]
+
+USER_PASSWORD = 'Benchmark1234'
+
+
+def person_name(rng: random.Random, people: int) -> str:
+    # Names follow a skewed distribution so that some people appear in many movies, as in the real catalog.
+    index = min(int(rng.paretovariate(1.2)) - 1, people - 1)
+    first, last = divmod(index, len(LAST_NAMES))
+    suffix = '' if first < len(FIRST_NAMES) else f' {first // len(FIRST_NAMES) + 1}'
+    return f'{FIRST_NAMES[first % len(FIRST_NAMES)]} {LAST_NAMES[last]}{suffix}'
+
+
+def movie_row(rng: random.Random, rank: int, people: int):
+    revenue = 'N/A' if rng.random() < 0.13 else repr(round(rng.uniform(0.01, 900), 2))
+    metascore = 'N/A' if rng.random() < 0.06 else str(rng.randint(11, 100))
+    actors = ', '.join(person_name(rng, people) for _ in range(4))
+
+    return [
+        str(rank),
+        f'{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rank}',
+        ','.join(rng.sample(GENRES, rng.randint(1, 3))),
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(12, 30))).capitalize() + '.',
+        person_name(rng, people),
+        actors,
+        str(rng.randint(2006, 2016)),
+        str(rng.randint(66, 187)),
+        str(round(rng.uniform(1.9, 9.0), 1)),
+        str(rng.randint(61, 1800000)),
+        revenue,
+        metascore
+    ]
+
+
+def generate_catalog(out_path: str, rows: int, users: int = 20, comments: int = None, seed: int = 235):
+    """ Writes Data1000Movies.csv, users.csv and comments.csv with the given number of rows to out_path.
+
+    Every user's password is USER_PASSWORD. By default there is one comment for every ten movies.
+    """
+    rng = random.Random(seed)
+    people = max(rows, 100)
+    if comments is None:
+        comments = rows // 10
+
+    os.makedirs(out_path, exist_ok=True)
+
+    with open(os.path.join(out_path, 'Data1000Movies.csv'), 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(MOVIE_HEADERS)
+        for rank in range(1, rows + 1):
+            writer.writerow(movie_row(rng, rank, people))
+
+    with open(os.path.join(out_path, 'users.csv'), 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['id', 'username', 'password'])
+        for user_id in range(1, users + 1):
+            writer.writerow([user_id, f'user{user_id}', USER_PASSWORD])
+
+    start = datetime(2020, 1, 1)
+    with open(os.path.join(out_path, 'comments.csv'), 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['id', 'author-id', 'article-id', 'comment-text', 'timestamp'])
+        for comment_id in range(1, comments + 1):
+            timestamp = start + timedelta(seconds=comment_id * 37)
+            writer.writerow([
+                comment_id,
+                rng.randint(1, users),
+                rng.randint(1, rows),
+                ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))).capitalize() + '!',
+                timestamp.isoformat(' ')
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic movie catalogs for benchmarking.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--out', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--seed', type=int, default=235)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        out_path = os.path.join(args.out, str(rows))
+        generate_catalog(out_path, rows, users=args.users, seed=args.seed)
+        print(f'Wrote {rows} movies to {out_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""Drives concurrent user sessions against the app and reports throughput and latency for each route.
+
+Each session does what a visitor does: registers or logs in, pages through articles by date, follows a genre and pages
+through it, opens an article's comments, sometimes posts a comment, and logs out. Pages are navigated by following the
+links in the HTML that was returned, so sessions exercise the same URLs a browser would.
+
+Sessions run against the Flask test client, in process, over a generated catalog, or against a live server given by
+--url. A live server needs users with the benchmark password (e.g. one started on a generated catalog) for sessions
+that log in; the rest register new users.
+
+Usage:
+    python -m benchmarks.load --rows 10000 --sessions 200 --concurrency 8
+    python -m benchmarks.load --url http://localhost:5000 --users 20 --sessions 200 --concurrency 8
+"""
+import argparse
+import html
+import http.cookiejar
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from movie import create_app
+
+from benchmarks.generate import generate_catalog, USER_PASSWORD
+
+
+CSRF_TOKEN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+BUTTON_LINK = re.compile(r"onclick=\"location.href='([^']+)'\">([^<]+)</button>")
+TAG_LINK = re.compile(r'href="(/articles_by_tag\?tag=[^"]+)"')
+COMMENT_LINK = re.compile(r'/comment\?article=(\d+)')
+
+
+class FlaskClientTransport:
+    # Sends a session's requests through its own Flask test client, so each session has its own cookies.
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, data: dict = None):
+        # Returns (status code, body). Redirects aren't followed.
+        response = self._client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpTransport:
+    # Sends a session's requests to a live server, keeping the session's cookies.
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method: str, path: str, data: dict = None):
+        # Returns (status code, body). Redirects aren't followed.
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self._base_url + path, data=body, method=method)
+        try:
+            with self._opener.open(request, timeout=self._timeout) as response:
+                return response.status, response.read().decode('utf-8')
+        except urllib.error.HTTPError as error:
+            return error.code, error.read().decode('utf-8', errors='replace')
+
+
+class LoadStats:
+    # Latencies in milliseconds and error counts, keyed by route, i.e. method and path without the query string.
+    # Shared by all sessions.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route: str, milliseconds: float, failed: bool):
+        with self._lock:
+            self.latencies[route].append(milliseconds)
+            if failed:
+                self.errors[route] += 1
+
+    def report(self, elapsed: float):
+        # Returns {route: statistics}, with an 'all' entry for every request together. Throughput is requests per
+        # second over the whole run.
+        everything = [sample for samples in self.latencies.values() for sample in samples]
+        routes = dict(self.latencies, all=everything)
+        errors = dict(self.errors, all=sum(self.errors.values()))
+        return {route: {
+            'requests': len(samples),
+            'errors': errors.get(route, 0),
+            'requests_per_second': len(samples) / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': percentile(samples, 0.50),
+            'p95_ms': percentile(samples, 0.95),
+            'p99_ms': percentile(samples, 0.99)
+        } for route, samples in sorted(routes.items()) if samples}
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Session:
+    # One visitor's requests, timed and recorded in stats. Pages are parsed to find the links to follow next.
+
+    def __init__(self, transport, stats: LoadStats, generator: random.Random, think_time: float = 0):
+        self._transport = transport
+        self._stats = stats
+        self._generator = generator
+        self._think_time = think_time
+
+    def request(self, method: str, url: str, data: dict = None, expected=(200, 302)):
+        parts = urllib.parse.urlsplit(html.unescape(url))
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        start = time.perf_counter()
+        status, body = self._transport.request(method, path, data)
+        milliseconds = (time.perf_counter() - start) * 1000
+        self._stats.record(f'{method} {parts.path}', milliseconds, status not in expected)
+        if self._think_time > 0:
+            time.sleep(self._generator.uniform(0, 2 * self._think_time))
+        return status, body
+
+    def submit(self, url: str, data: dict):
+        # GETs a form and POSTs data to it with the form's CSRF token, as a browser does. A form that's accepted
+        # redirects; one that's shown again has failed validation and is counted as an error.
+        _, page = self.request('GET', url)
+        token = CSRF_TOKEN.search(page)
+        if token is not None:
+            data = dict(data, csrf_token=html.unescape(token.group(1)))
+        return self.request('POST', url, data, expected=(302,))
+
+    def log_in(self, username: str, password: str):
+        self.submit('/authentication/login', {'username': username, 'password': password})
+
+    def register(self, username: str, password: str):
+        self.submit('/authentication/register', {'username': username, 'password': password})
+        self.log_in(username, password)
+
+    def browse(self, url: str, pages: int):
+        # Requests url and then follows Next up to pages times, going back once part way. Returns the pages' HTML.
+        _, page = self.request('GET', url)
+        seen = [page]
+        went_back = False
+        for _ in range(pages):
+            links = dict((label, link) for link, label in BUTTON_LINK.findall(page))
+            if not went_back and 'Previous' in links and self._generator.random() < 0.3:
+                went_back = True
+                _, page = self.request('GET', links['Previous'])
+            elif 'Next' in links:
+                _, page = self.request('GET', links['Next'])
+            else:
+                break
+            seen.append(page)
+        return seen
+
+    def run(self, login, register_name: str, comment_probability: float):
+        # login is (username, password), or None to register register_name first.
+        generator = self._generator
+        if login is not None:
+            self.log_in(*login)
+        else:
+            self.register(register_name, USER_PASSWORD)
+
+        pages = self.browse('/articles_by_date', generator.randint(1, 5))
+
+        tag_links = TAG_LINK.findall(pages[-1])
+        if tag_links:
+            pages += self.browse(generator.choice(tag_links), generator.randint(1, 3))
+
+        comment_links = [link for page in pages for link, label in BUTTON_LINK.findall(page)
+                         if label.endswith(' comments')]
+        if comment_links:
+            self.request('GET', generator.choice(comment_links))
+
+        article_ids = [article_id for page in pages for article_id in COMMENT_LINK.findall(page)]
+        if article_ids and generator.random() < comment_probability:
+            article_id = generator.choice(article_ids)
+            self.submit(f'/comment?article={article_id}', {
+                'comment': f'A comment from load test session {register_name}', 'article_id': article_id
+            })
+
+        self.request('GET', '/authentication/logout')
+
+
+def run_load(make_transport, sessions: int, concurrency: int, users: int, register_fraction: float = 0.2,
+             comment_probability: float = 0.3, think_time: float = 0, seed: int = 0):
+    # Runs sessions sessions, concurrency at a time, each with a transport from make_transport(). Sessions log in as one
+    # of the generated users user1 to user<users>, or register a new user with probability register_fraction (always,
+    # when users is 0). Returns LoadStats.report().
+    stats = LoadStats()
+    run_id = f'{os.getpid()}x{int(time.time())}'
+
+    def run_session(number):
+        generator = random.Random(seed * 1000003 + number)
+        login = None
+        if users > 0 and generator.random() >= register_fraction:
+            login = (f'user{generator.randint(1, users)}', USER_PASSWORD)
+        session = Session(make_transport(), stats, generator, think_time)
+        session.run(login, f'load{run_id}x{number}', comment_probability)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_session, range(sessions)))
+    return stats.report(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the movie app with concurrent user sessions.')
+    parser.add_argument('--url', help='Base URL of a live server; by default sessions use the Flask test client')
+    parser.add_argument('--rows', type=int, default=10000, help='Catalog size for the test client')
+    parser.add_argument('--data', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--users', type=int, default=20, help='Generated users user1..userN that sessions log in as')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--register-fraction', type=float, default=0.2, help='Fraction of sessions that register')
+    parser.add_argument('--comment-probability', type=float, default=0.3)
+    parser.add_argument('--think-time', type=float, default=0, help='Mean pause between requests, s')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the report to this file as JSON')
+    args = parser.parse_args()
+
+    if args.url is not None:
+        def make_transport():
+            return HttpTransport(args.url)
+    else:
+        data_path = os.path.join(args.data, str(args.rows))
+        if not os.path.exists(os.path.join(data_path, 'Data1000Movies.csv')):
+            generate_catalog(data_path, args.rows, users=args.users)
+        app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path})
+
+        def make_transport():
+            return FlaskClientTransport(app)
+
+    report = run_load(make_transport, args.sessions, args.concurrency, args.users, args.register_fraction,
+                      args.comment_probability, args.think_time, args.seed)
+
+    for route, timing in report.items():
+        print(f"{route:<40} {timing['requests']:>7} requests {timing['errors']:>5} errors "
+              f"{timing['requests_per_second']:>9.1f}/s  p50 {timing['p50_ms']:>8.2f} ms  "
+              f"p95 {timing['p95_ms']:>8.2f} ms  p99 {timing['p99_ms']:>8.2f} ms")
+    if args.output is not None:
+        with open(args.output, 'w') as outfile:
+            json.dump(report, outfile, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""Times populate, every AbstractRepository method and every route against synthetic catalogs.
+
+Results are written as JSON. Each timing is compared with a baseline for the same catalog size, and those that are
+slower by more than the threshold are reported as regressions. The first run for a catalog size records the baseline;
+after that it only changes when a run is given --update-baseline, so a regression never becomes the new baseline.
+
+Usage:
+    python -m benchmarks.run --rows 10000 100000
+    python -m benchmarks.run --rows 10000 --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from urllib.parse import quote
+
+import movie.adapters.repository as repo_module
+from movie import create_app
+from movie.adapters.memory_repository import MemoryRepository, populate
+from movie.adapters.repository import AbstractRepository
+from movie.adapters.tag_query import parse_tag_query
+from movie.domain.model import Article, Person, Tag, User, make_comment
+
+from benchmarks.generate import generate_catalog, USER_PASSWORD
+
+
+IMPORT_TOKEN = 'benchmark'
+
+
+def time_calls(func, iterations: int, make_args=None):
+    # Calls func iterations times and returns timing statistics in milliseconds. Arguments are built by make_args
+    # outside the timed region, so that writes can be given fresh objects.
+    samples = list()
+    for i in range(iterations):
+        args = make_args(i) if make_args is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': statistics.fmean(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max_ms': samples[-1]
+    }
+
+
+def repository_cases(repo: MemoryRepository):
+    # Returns (iterations, func, make_args) for each AbstractRepository method, keyed by method name.
+    first = repo.get_first_article()
+    middle = repo.get_articles_by_id([repo.get_number_of_articles() // 2])[0]
+    tag_name = repo.get_tags()[0].tag_name
+    username = repo.get_comments()[0].user.username if repo.get_comments() else 'user1'
+    user = repo.get_user(username)
+    ids = list(range(1, 101))
+    facets = {'genre': [tag_name], 'rating': [7, 8]}
+    director = middle.details.director
+    actor = middle.details.actor_names[0]
+    tag_query = parse_tag_query(f'"{tag_name}" AND Drama NOT Comedy')
+
+    def new_article(i):
+        return Article(date(2030, 1, 1 + i % 28), f'Benchmark {i}', 'Text', None, None, 10 ** 9 + i),
+
+    def new_comment(i):
+        return make_comment(f'Benchmark comment {i}', user, middle, datetime.now()),
+
+    def new_comments(i):
+        return [make_comment(f'Benchmark comment {i}.{j}', user, middle, datetime.now()) for j in range(100)],
+
+    return {
+        'add_user': (200, repo.add_user, lambda i: (User(f'benchmark{i}', 'password'),)),
+        'get_user': (200, repo.get_user, lambda i: (username,)),
+        'get_users': (200, repo.get_users, None),
+        'add_article': (200, repo.add_article, new_article),
+        'get_article': (1000, repo.get_article, lambda i: (middle.id,)),
+        'get_articles_by_date': (1000, repo.get_articles_by_date, lambda i: (middle.date,)),
+        'get_number_of_articles': (1000, repo.get_number_of_articles, None),
+        'get_first_article': (1000, repo.get_first_article, None),
+        'get_last_article': (1000, repo.get_last_article, None),
+        'get_articles_by_id': (1000, repo.get_articles_by_id, lambda i: (ids,)),
+        'get_article_ids_for_tag': (100, repo.get_article_ids_for_tag, lambda i: (tag_name,)),
+        'get_article_ids_for_tag_query': (100, repo.get_article_ids_for_tag_query, lambda i: (tag_query,)),
+        'get_person': (1000, repo.get_person, lambda i: (director,)),
+        'get_article_ids_for_person': (1000, repo.get_article_ids_for_person, lambda i: (director,)),
+        'get_article_ids_for_people': (1000, repo.get_article_ids_for_people, lambda i: ([director, actor],)),
+        'get_date_of_previous_article': (1000, repo.get_date_of_previous_article, lambda i: (middle,)),
+        'get_date_of_next_article': (1000, repo.get_date_of_next_article, lambda i: (first,)),
+        'get_articles_between': (1000, repo.get_articles_between, lambda i: (first.date, middle.date, 300, 3)),
+        'get_article_ids_between': (1000, repo.get_article_ids_between, lambda i: (first.date, middle.date)),
+        'get_number_of_articles_between': (1000, repo.get_number_of_articles_between,
+                                           lambda i: (first.date, middle.date)),
+        'get_calendar': (1000, repo.get_calendar, None),
+        'add_tag': (200, repo.add_tag, lambda i: (Tag(f'Benchmark {i}'),)),
+        'add_person': (200, repo.add_person, lambda i: (Person(f'Benchmark Person {i}'),)),
+        'get_tags': (1000, repo.get_tags, None),
+        'add_comment': (200, repo.add_comment, new_comment),
+        'add_comments': (20, repo.add_comments, new_comments),
+        'get_comments': (1000, repo.get_comments, None),
+        'get_comments_for_user': (1000, repo.get_comments_for_user, lambda i: (username, 0, 10)),
+        'get_number_of_comments_for_user': (1000, repo.get_number_of_comments_for_user, lambda i: (username,)),
+        'get_most_commented_article_ids': (1000, repo.get_most_commented_article_ids, lambda i: (5,)),
+        'get_recently_discussed_article_ids': (1000, repo.get_recently_discussed_article_ids, lambda i: (5,)),
+        'get_highest_rated_article_ids': (1000, repo.get_highest_rated_article_ids, lambda i: (5,)),
+        'get_similar_article_ids': (1000, repo.get_similar_article_ids, lambda i: (middle.id, 5)),
+        'get_article_ids_by_stats': (
+            100, repo.get_article_ids_by_stats, lambda i: ({'rating': (8, None), 'runtime': (None, 120)}, 'revenue', True, 30)
+        ),
+        'get_number_of_articles_by_stats': (100, repo.get_number_of_articles_by_stats, lambda i: ({'rating': (8, None)},)),
+        'get_article_ids_for_facets': (100, repo.get_article_ids_for_facets, lambda i: (facets, 30, 3)),
+        'get_number_of_articles_for_facets': (100, repo.get_number_of_articles_for_facets, lambda i: (facets,)),
+        'get_facet_counts': (100, repo.get_facet_counts, lambda i: (facets,))
+    }
+
+
+def route_cases(repo: MemoryRepository):
+    # Returns (iterations, method, url, data) for each route. Routes that need a login are requested by a logged-in
+    # client. String data is sent as JSON, with the comment import token.
+    article = repo.get_articles_by_id([repo.get_number_of_articles() // 2])[0]
+    tag_name = repo.get_tags()[0].tag_name
+    username = repo.get_comments()[0].user.username if repo.get_comments() else 'user1'
+
+    return {
+        'home_bp.home': (50, 'GET', '/', None),
+        'authentication_bp.register': (50, 'GET', '/authentication/register', None),
+        'authentication_bp.login': (50, 'GET', '/authentication/login', None),
+        'news_bp.articles_by_date': (50, 'GET', f'/articles_by_date?date={article.date.isoformat()}', None),
+        'news_bp.articles_by_date (first)': (50, 'GET', '/articles_by_date', None),
+        'news_bp.articles_by_tag': (50, 'GET', f'/articles_by_tag?tag={tag_name}&cursor=30', None),
+        'news_bp.articles_by_tags': (50, 'GET', f'/articles_by_tags?q={quote(tag_name)}%20AND%20Drama%20NOT%20Comedy', None),
+        'news_bp.articles_by_person': (50, 'GET', f'/articles_by_person?person={quote(article.details.director)}', None),
+        'news_bp.articles_by_stats': (50, 'GET', '/articles_by_stats?min_rating=8&max_runtime=120&sort=revenue', None),
+        'news_bp.articles_by_facet': (50, 'GET', f'/articles_by_facet?genre={tag_name}&rating=7&rating=8', None),
+        'news_bp.articles_by_date_range': (
+            50, 'GET', f'/articles_by_date_range?year={article.date.year}&cursor=30', None),
+        'news_bp.archive': (50, 'GET', '/archive', None),
+        'news_bp.archive (month)': (50, 'GET', f'/archive?year={article.date.year}&month={article.date.month}', None),
+        'news_bp.profile': (50, 'GET', f'/profile?user={username}', None),
+        'news_bp.comment_on_article': (50, 'GET', f'/comment?article={article.id}', None),
+        'news_bp.comment_on_article (POST)': (
+            50, 'POST', '/comment', {'comment': 'A benchmark comment', 'article_id': article.id}
+        ),
+        'news_bp.import_comments': (10, 'POST', '/comments', json.dumps([
+            {'article_id': article.id + i % 100, 'username': 'user1', 'comment': f'Benchmark import {i}'}
+            for i in range(1000)
+        ]))
+    }
+
+
+def run_benchmarks(data_path: str):
+    results = dict()
+
+    repo = MemoryRepository()
+    results['populate'] = time_calls(populate, 1, lambda i: (data_path, repo))
+    results['precompute_similar_articles'] = time_calls(repo.precompute_similar_articles, 1)
+
+    cases = repository_cases(repo)
+    missing = AbstractRepository.__abstractmethods__ - cases.keys()
+    if missing:
+        print(f'No benchmark for repository methods: {", ".join(sorted(missing))}', file=sys.stderr)
+    for name, (iterations, func, make_args) in cases.items():
+        results[f'repository.{name}'] = time_calls(func, iterations, make_args)
+
+    # Similar articles were precomputed above; in the app they're computed as articles are listed.
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': data_path, 'WTF_CSRF_ENABLED': False, 'SIMILAR_MOVIES_PRECOMPUTE': False,
+        'COMMENT_IMPORT_TOKEN': IMPORT_TOKEN
+    })
+    client = app.test_client()
+    client.post('/authentication/login', data={'username': 'user1', 'password': USER_PASSWORD})
+
+    for name, (iterations, method, url, data) in route_cases(repo_module.repo_instance).items():
+        if isinstance(data, str):
+            results[f'route.{name}'] = time_calls(lambda: client.open(
+                url, method=method, data=data, content_type='application/json', headers={'X-Import-Token': IMPORT_TOKEN}
+            ), iterations)
+        else:
+            results[f'route.{name}'] = time_calls(lambda: client.open(url, method=method, data=data), iterations)
+
+    return results
+
+
+def compare(results, baseline, threshold: float, min_delta_ms: float = 0.01):
+    # Returns (name, baseline_ms, current_ms) for median timings that are more than threshold (a fraction) slower.
+    # Differences under min_delta_ms are timer noise and are ignored.
+    regressions = list()
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, after = previous['median_ms'], current['median_ms']
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the movie app against synthetic catalogs.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--data', default=os.path.join('benchmarks', 'data'))
+    parser.add_argument('--results', default=os.path.join('benchmarks', 'results'))
+    parser.add_argument('--threshold', type=float, default=0.2, help='Slowdown, as a fraction, reported as a regression')
+    parser.add_argument('--update-baseline', action='store_true', help="Make this run's results the new baseline")
+    args = parser.parse_args()
+
+    os.makedirs(args.results, exist_ok=True)
+    regressed = False
+
+    for rows in args.rows:
+        data_path = os.path.join(args.data, str(rows))
+        if not os.path.exists(os.path.join(data_path, 'Data1000Movies.csv')):
+            generate_catalog(data_path, rows)
+
+        results = run_benchmarks(data_path)
+        # The latest results are always kept in <rows>.json, and the baseline they're compared with in
+        # <rows>.baseline.json.
+        results_file = os.path.join(args.results, f'{rows}.json')
+        baseline_file = os.path.join(args.results, f'{rows}.baseline.json')
+
+        if os.path.exists(baseline_file):
+            with open(baseline_file) as infile:
+                baseline = json.load(infile)['results']
+            for name, before, after in compare(results, baseline, args.threshold):
+                regressed = True
+                print(f'REGRESSION {rows} rows {name}: {before:.3f} ms -> {after:.3f} ms')
+
+        record = {
+            'rows': rows,
+            'recorded': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'results': results
+        }
+        targets = [results_file]
+        if args.update_baseline or not os.path.exists(baseline_file):
+            targets.append(baseline_file)
+        for target in targets:
+            with open(target, 'w') as outfile:
+                json.dump(record, outfile, indent=2)
+
+        for name, timing in results.items():
+            print(f"{rows:>8} {name:<45} {timing['median_ms']:>12.3f} ms")
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
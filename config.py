@@ -1,4 +1,5 @@
 """Flask configuration variables."""
+import tempfile
 from os import environ, path, getenv
 from dotenv import load_dotenv
 
@@ -15,3 +16,101 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+
+    # Catalog loading: rows parsed per batch, and the number of worker processes used to parse batches (0 parses
+    # batches in the app's own process).
+    LOADER_BATCH_SIZE = int(environ.get('LOADER_BATCH_SIZE', 10000))
+    LOADER_WORKERS = int(environ.get('LOADER_WORKERS', 0))
+
+    # Number of rendered article narratives kept in an LRU cache (0 renders the text on every access).
+    ARTICLE_TEXT_CACHE_SIZE = int(environ.get('ARTICLE_TEXT_CACHE_SIZE', 256))
+
+    # Number of similar movies listed with each article, and whether every article's similar movies are computed at
+    # startup (otherwise each is computed when first listed).
+    SIMILAR_MOVIES_COUNT = int(environ.get('SIMILAR_MOVIES_COUNT', 5))
+    SIMILAR_MOVIES_PRECOMPUTE = environ.get('SIMILAR_MOVIES_PRECOMPUTE', 'True') == 'True'
+
+    # Cache the repository reads each page makes (Articles by id and date, Tags, and adjacent dates), for repositories
+    # slower than the in-memory one. Entries expire after CACHE_TTL seconds; the cache holds at most CACHE_MAX_ENTRIES
+    # entries and roughly CACHE_MAX_BYTES bytes (0 for no limit). With CACHE_STATS_ENABLED (and METRICS_ENABLED), its
+    # hits and misses are reported at /metrics.
+    CACHE_ENABLED = environ.get('CACHE_ENABLED', 'False') == 'True'
+    CACHE_TTL = float(environ.get('CACHE_TTL', 300))
+    CACHE_MAX_ENTRIES = int(environ.get('CACHE_MAX_ENTRIES', 10000))
+    CACHE_MAX_BYTES = int(environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_STATS_ENABLED = environ.get('CACHE_STATS_ENABLED', 'True') == 'True'
+
+    # Bulk comment import. POST /comments accepts up to COMMENT_IMPORT_MAX_ITEMS comments per request from clients that
+    # send COMMENT_IMPORT_TOKEN in the COMMENT_IMPORT_HEADER header; it is disabled unless a token is set.
+    COMMENT_IMPORT_TOKEN = environ.get('COMMENT_IMPORT_TOKEN')
+    COMMENT_IMPORT_HEADER = environ.get('COMMENT_IMPORT_HEADER', 'X-Import-Token')
+    COMMENT_IMPORT_MAX_ITEMS = int(environ.get('COMMENT_IMPORT_MAX_ITEMS', 10000))
+
+    # Number of rendered template fragments (e.g. article blocks and the genre menu) kept in an LRU cache, and how long
+    # each is kept in seconds (0 entries renders them on every request). With JINJA_BYTECODE_CACHE_ENABLED, compiled
+    # templates are kept on disk so new workers don't compile them again: in JINJA_BYTECODE_CACHE_DIR, which must be
+    # private to the app's user, or by default in Jinja's own per-user directory.
+    TEMPLATE_FRAGMENT_CACHE_SIZE = int(environ.get('TEMPLATE_FRAGMENT_CACHE_SIZE', 2000))
+    TEMPLATE_FRAGMENT_CACHE_TTL = float(environ.get('TEMPLATE_FRAGMENT_CACHE_TTL', 3600))
+    JINJA_BYTECODE_CACHE_ENABLED = environ.get('JINJA_BYTECODE_CACHE_ENABLED', 'True') == 'True'
+    JINJA_BYTECODE_CACHE_DIR = environ.get('JINJA_BYTECODE_CACHE_DIR')
+
+    # Gzip text responses of at least COMPRESSION_MIN_SIZE bytes, at COMPRESSION_LEVEL (1 is fastest, 9 smallest), for
+    # clients that accept it. With STREAM_TEMPLATES, article pages are sent as they're rendered, in chunks of
+    # STREAM_BUFFER_SIZE template pieces.
+    COMPRESSION_ENABLED = environ.get('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_LEVEL = int(environ.get('COMPRESSION_LEVEL', 6))
+    STREAM_TEMPLATES = environ.get('STREAM_TEMPLATES', 'False') == 'True'
+    STREAM_BUFFER_SIZE = int(environ.get('STREAM_BUFFER_SIZE', 50))
+
+    # Serve static files from ASSETS_DIR under content-hashed names, precompressed with gzip (and brotli, if it's
+    # installed). The assets are built by `flask build-assets`, or at startup if they haven't been.
+    ASSETS_ENABLED = environ.get('ASSETS_ENABLED', 'False') == 'True'
+    ASSETS_DIR = environ.get('ASSETS_DIR', path.join(tempfile.gettempdir(), 'movie-assets'))
+
+    # Serve article posters from local thumbnails rather than the remote image. Posters are read from POSTER_SOURCE_DIR
+    # (named <article id>.png or .jpg; other articles get POSTER_DEFAULT, a file or a URL, by default the articles'
+    # shared remote image, which is downloaded once into POSTER_SOURCE_DIR), resized to the POSTER_SIZES widths by a
+    # background worker, and written to POSTER_CACHE_DIR under content-hashed names. Relative paths are relative to the
+    # movie package.
+    POSTERS_ENABLED = environ.get('POSTERS_ENABLED', 'False') == 'True'
+    POSTER_SOURCE_DIR = environ.get('POSTER_SOURCE_DIR', path.join('adapters', 'data', 'posters'))
+    POSTER_DEFAULT = environ.get('POSTER_DEFAULT')
+    POSTER_CACHE_DIR = environ.get('POSTER_CACHE_DIR', path.join(tempfile.gettempdir(), 'movie-posters'))
+    POSTER_SIZES = environ.get('POSTER_SIZES', 'small:300,large:500')
+
+    # Exports. GET /export/<dataset>.<csv|jsonl>[.gz] streams articles, tags, users or comments to clients that send
+    # EXPORT_TOKEN in the EXPORT_HEADER header; it is disabled unless a token is set. `flask export` writes the same
+    # data to a file. Gzipped exports are compressed at EXPORT_COMPRESSION_LEVEL.
+    EXPORT_TOKEN = environ.get('EXPORT_TOKEN')
+    EXPORT_HEADER = environ.get('EXPORT_HEADER', 'X-Export-Token')
+    EXPORT_COMPRESSION_LEVEL = int(environ.get('EXPORT_COMPRESSION_LEVEL', 6))
+
+    # Memory diagnostics. /diagnostics/memory (with DIAGNOSTICS_TOKEN in the DIAGNOSTICS_HEADER header; it is disabled
+    # unless a token is set) and `flask memory-report` report the memory used by the repository's entities, indexes and
+    # caches. With MEMORY_TRACING, allocations are traced with tracemalloc (keeping MEMORY_TRACING_FRAMES frames each)
+    # from startup, and the top allocators are reported too; tracing slows the app down. When MEMORY_BUDGET_MB is set, a
+    # warning is logged when a write finds the process over budget, and with MEMORY_BUDGET_REJECT_WRITES the write is
+    # rejected with 503 Service Unavailable.
+    DIAGNOSTICS_TOKEN = environ.get('DIAGNOSTICS_TOKEN')
+    DIAGNOSTICS_HEADER = environ.get('DIAGNOSTICS_HEADER', 'X-Diagnostics-Token')
+    MEMORY_TRACING = environ.get('MEMORY_TRACING', 'False') == 'True'
+    MEMORY_TRACING_FRAMES = int(environ.get('MEMORY_TRACING_FRAMES', 1))
+    MEMORY_BUDGET_MB = float(environ.get('MEMORY_BUDGET_MB', 0))
+    MEMORY_BUDGET_REJECT_WRITES = environ.get('MEMORY_BUDGET_REJECT_WRITES', 'False') == 'True'
+
+    # Record per-route and per-repository-call latencies and expose them at /metrics.
+    METRICS_ENABLED = environ.get('METRICS_ENABLED', 'True') == 'True'
+
+    # On-demand request profiling. When enabled, requests carrying PROFILING_TOKEN in PROFILING_HEADER and a
+    # PROFILING_SAMPLE_RATE fraction of all other requests are profiled. The newest PROFILING_MAX_FILES profiles are kept
+    # in PROFILING_DIR and the slowest are listed at /profiles, for requests with the token; without a token, only
+    # sampled requests are profiled and /profiles is disabled.
+    PROFILING_ENABLED = environ.get('PROFILING_ENABLED', 'False') == 'True'
+    PROFILING_HEADER = environ.get('PROFILING_HEADER', 'X-Profile')
+    PROFILING_TOKEN = environ.get('PROFILING_TOKEN')
+    PROFILING_SAMPLE_RATE = float(environ.get('PROFILING_SAMPLE_RATE', 0.0))
+    PROFILING_DIR = environ.get('PROFILING_DIR', path.join(tempfile.gettempdir(), 'movie-profiles'))
+    PROFILING_MAX_FILES = int(environ.get('PROFILING_MAX_FILES', 100))
+    PROFILING_INDEX_SIZE = int(environ.get('PROFILING_INDEX_SIZE', 20))
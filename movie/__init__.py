@@ -5,7 +5,23 @@ import os
 from flask import Flask
 
 import movie.adapters.repository as repo
-from movie.adapters.memory_repository import MemoryRepository, populate
+from movie.adapters.budgeted_repository import BudgetedRepository, MemoryBudget
+from movie.adapters.caching_repository import CachingRepository, ExpiringLRUCache
+from movie.adapters.memory_repository import DEFAULT_IMAGE_HYPERLINK, MemoryRepository, populate
+from movie.adapters.instrumented_repository import InstrumentedRepository
+from movie.assets.assets import init_assets
+from movie.compression.compression import init_compression
+from movie.diagnostics.diagnostics import init_diagnostics
+from movie.diagnostics.memory import start_tracing
+from movie.domain.narrative import first_para_cache
+from movie.export.export import init_export
+from movie.metrics.metrics import init_metrics
+from movie.metrics.registry import MetricsRegistry
+from movie.posters.posters import init_posters
+from movie.posters.repository import PosterRepository
+from movie.posters.store import PosterStore, is_url, parse_sizes
+from movie.profiling.profiling import init_profiling
+from movie.templating.templating import init_templating
 
 
 def create_app(test_config=None):
@@ -23,9 +39,87 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
+    if app.config['MEMORY_TRACING']:
+        # Started before the data is loaded, so that the loader's allocations are traced.
+        start_tracing(app.config['MEMORY_TRACING_FRAMES'])
+
+    # Article narratives are rendered on demand; keep the most recently viewed ones.
+    first_para_cache.resize(app.config['ARTICLE_TEXT_CACHE_SIZE'])
+
     # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    memory_repo = MemoryRepository()
+    populate(data_path, memory_repo, app.config['LOADER_BATCH_SIZE'], app.config['LOADER_WORKERS'])
+    if app.config['SIMILAR_MOVIES_PRECOMPUTE']:
+        memory_repo.precompute_similar_articles()
+    repo.repo_instance = memory_repo
+
+    repository_cache = None
+    if app.config['CACHE_ENABLED']:
+        repository_cache = ExpiringLRUCache(app.config['CACHE_MAX_ENTRIES'], app.config['CACHE_MAX_BYTES'],
+                                            app.config['CACHE_TTL'])
+        repo.repo_instance = CachingRepository(repo.repo_instance, repository_cache)
+
+    memory_budget = None
+    if app.config['MEMORY_BUDGET_MB'] > 0:
+        # Check the memory in use before every write, and warn about or reject writes once it's over budget.
+        memory_budget = MemoryBudget(int(app.config['MEMORY_BUDGET_MB'] * 2 ** 20),
+                                     app.config['MEMORY_BUDGET_REJECT_WRITES'])
+        repo.repo_instance = BudgetedRepository(repo.repo_instance, memory_budget)
+
+    # Cache rendered template fragments, and compiled templates across processes.
+    fragment_cache = None
+    if app.config['TEMPLATE_FRAGMENT_CACHE_SIZE'] > 0:
+        fragment_cache = ExpiringLRUCache(app.config['TEMPLATE_FRAGMENT_CACHE_SIZE'],
+                                          ttl=app.config['TEMPLATE_FRAGMENT_CACHE_TTL'])
+    init_templating(app, fragment_cache, app.config['JINJA_BYTECODE_CACHE_ENABLED'],
+                    app.config['JINJA_BYTECODE_CACHE_DIR'] or None)
+
+    # Add the export command.
+    init_export(app)
+
+    # Add the memory report, of the repository and the caches.
+    caches = {'article_text': first_para_cache}
+    if repository_cache is not None:
+        caches['repository'] = repository_cache
+    if fragment_cache is not None:
+        caches['template_fragments'] = fragment_cache
+    init_diagnostics(app, caches, memory_budget)
+
+    # Serve fingerprinted, precompressed static files when they're enabled.
+    init_assets(app, app.config['ASSETS_ENABLED'])
+
+    poster_store = None
+    if app.config['POSTERS_ENABLED']:
+        # Resize posters into local thumbnails in the background; pages show the remote image until they're ready.
+        # Relative paths are relative to the app's package. Articles without a poster of their own are shown the image
+        # every loaded article links to, downloaded once, unless another default is configured.
+        default_poster = app.config['POSTER_DEFAULT'] or DEFAULT_IMAGE_HYPERLINK
+        if not is_url(default_poster):
+            default_poster = os.path.join(app.root_path, default_poster)
+        poster_store = PosterStore(app.config['POSTER_CACHE_DIR'], parse_sizes(app.config['POSTER_SIZES']),
+                                   os.path.join(app.root_path, app.config['POSTER_SOURCE_DIR']), default_poster)
+        # Articles added from now on have their posters queued too.
+        repo.repo_instance = PosterRepository(repo.repo_instance, poster_store)
+    init_posters(app, poster_store)
+
+    if app.config['METRICS_ENABLED']:
+        # Record request, template and repository latencies, and cache hit ratios, for the /metrics endpoint.
+        registry = MetricsRegistry()
+        init_metrics(app, registry)
+        registry.register_cache('article_text', first_para_cache)
+        if fragment_cache is not None:
+            registry.register_cache('template_fragments', fragment_cache)
+        if repository_cache is not None and app.config['CACHE_STATS_ENABLED']:
+            registry.register_cache('repository', repository_cache)
+        repo.repo_instance = InstrumentedRepository(repo.repo_instance, registry)
+
+    if app.config['PROFILING_ENABLED']:
+        # Profile requests that ask for it, or a sample of all requests.
+        init_profiling(app)
+
+    if app.config['COMPRESSION_ENABLED']:
+        # Registered last so responses are compressed before they're timed and profiled.
+        init_compression(app)
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -42,4 +136,26 @@ def create_app(test_config=None):
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
 
+        from .export import export
+        app.register_blueprint(export.export_blueprint)
+
+        from .diagnostics import diagnostics
+        app.register_blueprint(diagnostics.diagnostics_blueprint)
+
+        if app.config['ASSETS_ENABLED']:
+            from .assets import assets
+            app.register_blueprint(assets.assets_blueprint)
+
+        if app.config['POSTERS_ENABLED']:
+            from .posters import posters
+            app.register_blueprint(posters.posters_blueprint)
+
+        if app.config['METRICS_ENABLED']:
+            from .metrics import metrics
+            app.register_blueprint(metrics.metrics_blueprint)
+
+        if app.config['PROFILING_ENABLED']:
+            from .profiling import profiling
+            app.register_blueprint(profiling.profiling_blueprint)
+
     return app
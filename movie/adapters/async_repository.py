@@ -0,0 +1,383 @@
+import abc
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from functools import partial
+from typing import List
+
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.memory_repository import populate
+from movie.adapters.repository import AbstractRepository, RepositoryException
+from movie.adapters.sqlite_repository import SqliteRepository
+from movie.domain.model import User, Article, Tag, Comment, Person
+
+
+class AsyncAbstractRepository(abc.ABC):
+    # The asynchronous counterpart of AbstractRepository: every method is a coroutine that behaves as the
+    # AbstractRepository method of the same name.
+
+    @abc.abstractmethod
+    async def add_user(self, user: User):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_user(self, username) -> User:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_users(self) -> List[User]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def add_article(self, article: Article):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article(self, id: int) -> Article:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_articles_by_date(self, target_date: date) -> List[Article]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_number_of_articles(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_first_article(self) -> Article:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_last_article(self) -> Article:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_articles_by_id(self, id_list):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_for_tag(self, tag_name: str):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_for_tag_query(self, query):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_date_of_previous_article(self, article: Article):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_date_of_next_article(self, article: Article):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_between(self, start: date, end: date):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_number_of_articles_between(self, start: date, end: date) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_calendar(self) -> CalendarIndex:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def add_tag(self, tag: Tag):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_tags(self) -> List[Tag]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def add_person(self, person: Person):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_person(self, full_name: str) -> Person:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_for_person(self, full_name: str):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_for_people(self, full_names: List[str]):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def add_comment(self, comment: Comment):
+        # As AbstractRepository.add_comment, raises RepositoryException for a Comment that isn't properly attached.
+        if comment.user is None or comment not in comment.user.comments:
+            raise RepositoryException('Comment not correctly attached to a User')
+        if comment.article is None or comment not in comment.article.comments:
+            raise RepositoryException('Comment not correctly attached to an Article')
+
+    @abc.abstractmethod
+    async def add_comments(self, comments: List[Comment]):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_comments(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_number_of_comments_for_user(self, username: str) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_most_commented_article_ids(self, limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_recently_discussed_article_ids(self, limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_highest_rated_article_ids(self, limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_similar_article_ids(self, article_id: int, limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True,
+                                       limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_number_of_articles_by_stats(self, filters):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_number_of_articles_for_facets(self, selection):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_facet_counts(self, selection):
+        raise NotImplementedError
+
+
+class _ReadWriteLock:
+    # Any number of readers, or one writer.
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writing)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writing and self._readers == 0)
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class ThreadPoolRepository(AsyncAbstractRepository):
+    # Runs a synchronous repository behind the async interface, calling it on a thread pool so that the event loop
+    # keeps serving other requests while a call blocks. By default calls run one at a time, since repositories such
+    # as MemoryRepository aren't thread-safe. With concurrent_reads, reads run in parallel and writes exclusively,
+    # which suits repositories whose reads release the GIL (e.g. for disk I/O) and don't modify shared state.
+
+    def __init__(self, repo: AbstractRepository, max_workers: int = 4, concurrent_reads: bool = False,
+                 executor: Executor = None):
+        self._repo = repo
+        self._executor = executor if executor is not None else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='repository')
+        self._lock = _ReadWriteLock()
+        self._concurrent_reads = concurrent_reads
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self._repo
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args))
+
+    async def _call(self, method_name: str, *args):
+        if not self._concurrent_reads:
+            return await self._write(method_name, *args)
+
+        def read():
+            with self._lock.reading():
+                return getattr(self._repo, method_name)(*args)
+        return await self._run(read)
+
+    async def _write(self, method_name: str, *args):
+        def write():
+            with self._lock.writing():
+                return getattr(self._repo, method_name)(*args)
+        return await self._run(write)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def add_user(self, user: User):
+        return await self._write('add_user', user)
+
+    async def get_user(self, username) -> User:
+        return await self._call('get_user', username)
+
+    async def get_users(self) -> List[User]:
+        return await self._call('get_users')
+
+    async def add_article(self, article: Article):
+        return await self._write('add_article', article)
+
+    async def get_article(self, id: int) -> Article:
+        return await self._call('get_article', id)
+
+    async def get_articles_by_date(self, target_date: date) -> List[Article]:
+        return await self._call('get_articles_by_date', target_date)
+
+    async def get_number_of_articles(self):
+        return await self._call('get_number_of_articles')
+
+    async def get_first_article(self) -> Article:
+        return await self._call('get_first_article')
+
+    async def get_last_article(self) -> Article:
+        return await self._call('get_last_article')
+
+    async def get_articles_by_id(self, id_list):
+        return await self._call('get_articles_by_id', id_list)
+
+    async def get_article_ids_for_tag(self, tag_name: str):
+        return await self._call('get_article_ids_for_tag', tag_name)
+
+    async def get_article_ids_for_tag_query(self, query):
+        return await self._call('get_article_ids_for_tag_query', query)
+
+    async def get_date_of_previous_article(self, article: Article):
+        return await self._call('get_date_of_previous_article', article)
+
+    async def get_date_of_next_article(self, article: Article):
+        return await self._call('get_date_of_next_article', article)
+
+    async def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        return await self._call('get_articles_between', start, end, cursor, limit)
+
+    async def get_article_ids_between(self, start: date, end: date):
+        return await self._call('get_article_ids_between', start, end)
+
+    async def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return await self._call('get_number_of_articles_between', start, end)
+
+    async def get_calendar(self) -> CalendarIndex:
+        return await self._call('get_calendar')
+
+    async def add_tag(self, tag: Tag):
+        return await self._write('add_tag', tag)
+
+    async def get_tags(self) -> List[Tag]:
+        return await self._call('get_tags')
+
+    async def add_person(self, person: Person):
+        return await self._write('add_person', person)
+
+    async def get_person(self, full_name: str) -> Person:
+        return await self._call('get_person', full_name)
+
+    async def get_article_ids_for_person(self, full_name: str):
+        return await self._call('get_article_ids_for_person', full_name)
+
+    async def get_article_ids_for_people(self, full_names: List[str]):
+        return await self._call('get_article_ids_for_people', full_names)
+
+    async def add_comment(self, comment: Comment):
+        return await self._write('add_comment', comment)
+
+    async def add_comments(self, comments: List[Comment]):
+        return await self._write('add_comments', comments)
+
+    async def get_comments(self):
+        return await self._call('get_comments')
+
+    async def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return await self._call('get_comments_for_user', username, cursor, limit)
+
+    async def get_number_of_comments_for_user(self, username: str) -> int:
+        return await self._call('get_number_of_comments_for_user', username)
+
+    async def get_most_commented_article_ids(self, limit: int = None):
+        return await self._call('get_most_commented_article_ids', limit)
+
+    async def get_recently_discussed_article_ids(self, limit: int = None):
+        return await self._call('get_recently_discussed_article_ids', limit)
+
+    async def get_highest_rated_article_ids(self, limit: int = None):
+        return await self._call('get_highest_rated_article_ids', limit)
+
+    async def get_similar_article_ids(self, article_id: int, limit: int = None):
+        # Repositories may compute neighbours on demand and keep them, so this is treated as a write.
+        return await self._write('get_similar_article_ids', article_id, limit)
+
+    async def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True,
+                                       limit: int = None):
+        return await self._call('get_article_ids_by_stats', filters, sort_by, descending, limit)
+
+    async def get_number_of_articles_by_stats(self, filters):
+        return await self._call('get_number_of_articles_by_stats', filters)
+
+    async def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        return await self._call('get_article_ids_for_facets', selection, cursor, limit)
+
+    async def get_number_of_articles_for_facets(self, selection):
+        return await self._call('get_number_of_articles_for_facets', selection)
+
+    async def get_facet_counts(self, selection):
+        return await self._call('get_facet_counts', selection)
+
+
+class AsyncSqliteRepository(ThreadPoolRepository):
+    # A SqliteRepository behind the async interface. As with aiosqlite, the connection is opened and used on a single
+    # dedicated thread, which runs the calls in the order they're made while the event loop carries on.
+
+    def __init__(self, database: str = ':memory:'):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        super().__init__(executor.submit(SqliteRepository, database).result(), executor=executor)
+
+    async def populate(self, data_path: str, **kwargs):
+        # Loads the catalog at data_path, as memory_repository.populate does.
+        await self._run(partial(populate, data_path, self._repo, **kwargs))
+
+    def close(self):
+        self._executor.submit(self._repo.close).result()
+        super().close()
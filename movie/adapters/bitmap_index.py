@@ -0,0 +1,166 @@
+import math
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    # int.bit_count was added in Python 3.10.
+    def popcount(value: int) -> int:
+        return bin(value).count('1')
+
+
+class Bitmap:
+    # A compressed set of row numbers. Rows are split into chunks of 65536 and each non-empty chunk is stored as a
+    # Python int used as a bitset, so empty ranges cost nothing and AND/OR/AND NOT run chunk by chunk in C. Added rows
+    # are buffered and set in bulk when the bitmap is next read, because setting one bit of a large int copies it.
+
+    __slots__ = ('_chunks', '_pending')
+
+    def __init__(self, chunks: Dict[int, int] = None):
+        self._chunks: Dict[int, int] = chunks if chunks is not None else dict()
+        self._pending: List[int] = list()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[int]) -> 'Bitmap':
+        bitmap = cls()
+        bitmap._pending.extend(rows)
+        return bitmap
+
+    def add(self, row: int):
+        self._pending.append(row)
+
+    def chunks(self) -> Dict[int, int]:
+        if self._pending:
+            rows = np.array(self._pending, dtype=np.int64)
+            self._pending = list()
+            keys = rows >> CHUNK_BITS
+            for key in np.unique(keys).tolist():
+                bits = np.zeros(CHUNK_SIZE, dtype=bool)
+                bits[rows[keys == key] & CHUNK_MASK] = True
+                packed = int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+                self._chunks[key] = self._chunks.get(key, 0) | packed
+        return self._chunks
+
+    def __contains__(self, row: int) -> bool:
+        return (self.chunks().get(row >> CHUNK_BITS, 0) >> (row & CHUNK_MASK)) & 1 == 1
+
+    def __len__(self) -> int:
+        return sum(popcount(bits) for bits in self.chunks().values())
+
+    def __bool__(self) -> bool:
+        return len(self.chunks()) > 0
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        smaller, larger = sorted((self.chunks(), other.chunks()), key=len)
+        chunks = dict()
+        for key, bits in smaller.items():
+            common = bits & larger.get(key, 0)
+            if common:
+                chunks[key] = common
+        return Bitmap(chunks)
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        chunks = dict(self.chunks())
+        for key, bits in other.chunks().items():
+            chunks[key] = chunks.get(key, 0) | bits
+        return Bitmap(chunks)
+
+    def __sub__(self, other: 'Bitmap') -> 'Bitmap':
+        other_chunks = other.chunks()
+        chunks = dict()
+        for key, bits in self.chunks().items():
+            remaining = bits & ~other_chunks.get(key, 0)
+            if remaining:
+                chunks[key] = remaining
+        return Bitmap(chunks)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bitmap):
+            return False
+        return self.chunks() == other.chunks()
+
+    def intersection_count(self, other: 'Bitmap') -> int:
+        # len(self & other), without building the intersection.
+        smaller, larger = sorted((self.chunks(), other.chunks()), key=len)
+        return sum(popcount(bits & larger.get(key, 0)) for key, bits in smaller.items())
+
+    def rows(self) -> Iterator[int]:
+        # Yields the row numbers in ascending order.
+        chunks = self.chunks()
+        for key in sorted(chunks):
+            packed = np.frombuffer(chunks[key].to_bytes(CHUNK_SIZE // 8, 'little'), dtype=np.uint8)
+            offsets = np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+            yield from (offsets + (key << CHUNK_BITS)).tolist()
+
+
+def rating_band(rating: float) -> int:
+    # Ratings are grouped into whole-number bands, e.g. 7.0 up to (but not including) 8.0 is band 7.
+    return min(math.floor(rating), 9)
+
+
+class FacetIndex:
+    # One Bitmap per facet value, over the row numbers of the ColumnStore. A query selects any of the chosen values
+    # within a facet and all facets together, using only bitwise operations.
+
+    FACETS = ('genre', 'year', 'rating')
+
+    def __init__(self):
+        self._all = Bitmap()
+        self._bitmaps: Dict[str, Dict] = {facet: dict() for facet in self.FACETS}
+
+    def add(self, row: int, genres: Iterable[str], year: int, rating: float):
+        self._all.add(row)
+        for genre in genres:
+            self._bitmap('genre', genre).add(row)
+        self._bitmap('year', year).add(row)
+        self._bitmap('rating', rating_band(rating)).add(row)
+
+    def _bitmap(self, facet: str, value) -> Bitmap:
+        bitmap = self._bitmaps[facet].get(value)
+        if bitmap is None:
+            bitmap = self._bitmaps[facet][value] = Bitmap()
+        return bitmap
+
+    def values(self, facet: str) -> List:
+        return sorted(self._bitmaps[facet])
+
+    def _facet_selection(self, facet: str, values) -> Bitmap:
+        # Rows having any of values for facet.
+        selected = Bitmap()
+        for value in values:
+            selected = selected | self._bitmaps[facet].get(value, Bitmap())
+        return selected
+
+    def select(self, selection: Dict[str, List], excluding: str = None) -> Bitmap:
+        # Rows matching every facet in selection, other than excluding. Facets are intersected smallest first.
+        selections = [self._facet_selection(facet, values)
+                      for facet, values in selection.items() if values and facet != excluding]
+        if len(selections) == 0:
+            return self._all
+
+        selections.sort(key=len)
+        result = selections[0]
+        for other in selections[1:]:
+            if not result:
+                break
+            result = result & other
+        return result
+
+    def counts(self, selection: Dict[str, List]) -> Dict[str, Dict]:
+        # Returns, for every value of every facet, how many rows would match if that value were chosen. A facet's
+        # counts are computed against the other facets' choices, so choosing one genre still shows how many rows each
+        # other genre would add.
+        counts = dict()
+        for facet in self.FACETS:
+            others = self.select(selection, excluding=facet)
+            counts[facet] = {value: bitmap.intersection_count(others)
+                             for value, bitmap in sorted(self._bitmaps[facet].items())}
+        return counts
@@ -0,0 +1,215 @@
+import logging
+import os
+import tracemalloc
+from datetime import date
+from threading import Lock
+from typing import List
+
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import User, Article, Tag, Comment, Person
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+def process_memory() -> int:
+    # The memory in use, in bytes: what tracemalloc has traced when it's tracing, otherwise the process's resident set
+    # size. Where /proc isn't available, the peak resident set size is used instead, or 0 where neither is.
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open('/proc/self/statm') as infile:
+            return int(infile.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryBudget:
+    # A limit on the process's memory. Each check measures the memory in use; the first check over the limit logs a
+    # warning (another is logged if usage falls back under the limit and exceeds it again), and with reject_writes
+    # every check over the limit raises MemoryBudgetExceeded.
+
+    def __init__(self, limit_bytes: int, reject_writes: bool = False, measure=process_memory):
+        self._limit_bytes = limit_bytes
+        self._reject_writes = reject_writes
+        self._measure = measure
+        self._exceeded = False
+        self._lock = Lock()
+
+    @property
+    def limit_bytes(self) -> int:
+        return self._limit_bytes
+
+    @property
+    def reject_writes(self) -> bool:
+        return self._reject_writes
+
+    @property
+    def exceeded(self) -> bool:
+        # Whether the last check found the memory in use over the limit.
+        return self._exceeded
+
+    def used_bytes(self) -> int:
+        return self._measure()
+
+    def check(self):
+        used = self._measure()
+        with self._lock:
+            was_exceeded, self._exceeded = self._exceeded, used > self._limit_bytes
+        if not self._exceeded:
+            return
+        if not was_exceeded:
+            logger.warning('Memory in use (%d bytes) exceeds the budget of %d bytes%s', used, self._limit_bytes,
+                           '; writes are rejected' if self._reject_writes else '')
+        if self._reject_writes:
+            raise MemoryBudgetExceeded(f'Memory in use ({used} bytes) exceeds the budget of {self._limit_bytes} bytes')
+
+
+class BudgetedRepository(AbstractRepository):
+    # Wraps another repository and checks a MemoryBudget before every write, so that writes are rejected (or, at
+    # least, warned about) once the process is over its budget. Reads are passed straight through.
+
+    def __init__(self, repo: AbstractRepository, budget: MemoryBudget):
+        self._repo = repo
+        self._budget = budget
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self._repo
+
+    @property
+    def budget(self) -> MemoryBudget:
+        return self._budget
+
+    def add_user(self, user: User):
+        self._budget.check()
+        return self._repo.add_user(user)
+
+    def get_user(self, username) -> User:
+        return self._repo.get_user(username)
+
+    def get_users(self) -> List[User]:
+        return self._repo.get_users()
+
+    def add_article(self, article: Article):
+        self._budget.check()
+        return self._repo.add_article(article)
+
+    def get_article(self, id: int) -> Article:
+        return self._repo.get_article(id)
+
+    def get_articles_by_date(self, target_date: date) -> List[Article]:
+        return self._repo.get_articles_by_date(target_date)
+
+    def get_number_of_articles(self):
+        return self._repo.get_number_of_articles()
+
+    def get_first_article(self) -> Article:
+        return self._repo.get_first_article()
+
+    def get_last_article(self) -> Article:
+        return self._repo.get_last_article()
+
+    def get_articles_by_id(self, id_list):
+        return self._repo.get_articles_by_id(id_list)
+
+    def get_article_ids_for_tag(self, tag_name: str):
+        return self._repo.get_article_ids_for_tag(tag_name)
+
+    def get_article_ids_for_tag_query(self, query):
+        return self._repo.get_article_ids_for_tag_query(query)
+
+    def get_date_of_previous_article(self, article: Article):
+        return self._repo.get_date_of_previous_article(article)
+
+    def get_date_of_next_article(self, article: Article):
+        return self._repo.get_date_of_next_article(article)
+
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        return self._repo.get_articles_between(start, end, cursor, limit)
+
+    def get_article_ids_between(self, start: date, end: date):
+        return self._repo.get_article_ids_between(start, end)
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return self._repo.get_number_of_articles_between(start, end)
+
+    def get_calendar(self) -> CalendarIndex:
+        return self._repo.get_calendar()
+
+    def add_tag(self, tag: Tag):
+        self._budget.check()
+        return self._repo.add_tag(tag)
+
+    def get_tags(self) -> List[Tag]:
+        return self._repo.get_tags()
+
+    def add_person(self, person: Person):
+        self._budget.check()
+        return self._repo.add_person(person)
+
+    def get_person(self, full_name: str) -> Person:
+        return self._repo.get_person(full_name)
+
+    def get_article_ids_for_person(self, full_name: str):
+        return self._repo.get_article_ids_for_person(full_name)
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        return self._repo.get_article_ids_for_people(full_names)
+
+    def add_comment(self, comment: Comment):
+        self._budget.check()
+        return self._repo.add_comment(comment)
+
+    def add_comments(self, comments: List[Comment]):
+        self._budget.check()
+        return self._repo.add_comments(comments)
+
+    def get_comments(self):
+        return self._repo.get_comments()
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return self._repo.get_comments_for_user(username, cursor, limit)
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._repo.get_number_of_comments_for_user(username)
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._repo.get_most_commented_article_ids(limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._repo.get_recently_discussed_article_ids(limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._repo.get_highest_rated_article_ids(limit)
+
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        return self._repo.get_similar_article_ids(article_id, limit)
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        return self._repo.get_article_ids_by_stats(filters, sort_by, descending, limit)
+
+    def get_number_of_articles_by_stats(self, filters):
+        return self._repo.get_number_of_articles_by_stats(filters)
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        return self._repo.get_article_ids_for_facets(selection, cursor, limit)
+
+    def get_number_of_articles_for_facets(self, selection):
+        return self._repo.get_number_of_articles_for_facets(selection)
+
+    def get_facet_counts(self, selection):
+        return self._repo.get_facet_counts(selection)
@@ -0,0 +1,330 @@
+import gc
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from types import FunctionType, ModuleType
+from typing import Dict, List
+
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import User, Article, Tag, Comment, Person
+
+
+_MISSING = object()
+
+
+def approximate_size(value) -> int:
+    # The size in bytes of value and, for a list or tuple, of its items, but not of anything they refer to. For values
+    # whose Articles are shared with the wrapped repository, where only the containers are the cache's own.
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+def owned_size(value) -> int:
+    # The size in bytes of value and of everything reachable from it, each object counted once. For values whose
+    # Articles (with their Tags, Comments and Users) are snapshots that only the cache holds on to.
+    seen = set()
+    size = 0
+    pending = [value]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+class ExpiringLRUCache:
+    # A thread-safe LRU whose entries also expire ttl seconds after they were stored. The cache holds at most
+    # max_entries entries and, approximately, max_bytes bytes of values (0 for no limit); the least recently used
+    # entries are evicted to stay within both.
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 0, ttl: float = 300.0, clock=time.monotonic):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key, default=None):
+        # Returns the cached value, or default.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires, _ = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value, size: int = None):
+        # size is value's size in bytes, by default its approximate_size.
+        if size is None:
+            size = approximate_size(value)
+        if self._max_bytes and size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self._clock() + self._ttl, size)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or (self._max_bytes and self._bytes > self._max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        return {
+            'hits': self.hits, 'misses': self.misses, 'expirations': self.expirations, 'evictions': self.evictions,
+            'invalidations': self.invalidations, 'entries': self.size, 'bytes': self.bytes
+        }
+
+
+class CachingRepository(AbstractRepository):
+    # Wraps another repository, typically a slow one, and caches the reads each page makes: Articles by id and by
+    # date, the ids for a Tag, the Tags, and the dates either side of a date. Writes made through this repository
+    # invalidate exactly the cached results they change; writes made to the wrapped repository directly are only seen
+    # once the affected entries expire.
+    #
+    # Entries are sized by what the cache alone keeps alive: just the containers when the wrapped repository returns
+    # the entities it holds, everything reachable from them when it returns snapshots. The dates whose previous and
+    # next dates are cached are kept in order, so adding an Article finds the few entries it changes by binary search.
+
+    def __init__(self, repo: AbstractRepository, cache: ExpiringLRUCache = None):
+        self._repo = repo
+        self._cache = cache if cache is not None else ExpiringLRUCache()
+
+        base = repo
+        while hasattr(base, 'wrapped'):
+            base = base.wrapped
+        self._size_of = owned_size if base.returns_snapshots else approximate_size
+
+        # The dates with cached previous_date and next_date entries, in order. Dates whose entries were evicted or
+        # expired are only dropped when they'd be invalidated, so each list holds at most every date there is.
+        self._cached_dates: Dict[str, List[date]] = {'previous_date': list(), 'next_date': list()}
+        self._dates_lock = Lock()
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self._repo
+
+    @property
+    def cache(self) -> ExpiringLRUCache:
+        return self._cache
+
+    def _cached(self, key, method_name: str, *args):
+        # None is a valid result (e.g. for an unknown id), so misses are told apart with a sentinel.
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = getattr(self._repo, method_name)(*args)
+            self._cache.put(key, value, self._size_of(value))
+        return value
+
+    def _cached_date(self, kind: str, method_name: str, article: Article):
+        # A previous_date or next_date entry, whose date is indexed when it's stored.
+        value = self._cache.get((kind, article.date), _MISSING)
+        if value is _MISSING:
+            value = getattr(self._repo, method_name)(article)
+            self._cache.put((kind, article.date), value, self._size_of(value))
+            with self._dates_lock:
+                dates = self._cached_dates[kind]
+                index = bisect_left(dates, article.date)
+                if index == len(dates) or dates[index] != article.date:
+                    dates.insert(index, article.date)
+        return value
+
+    def _invalidate_dates(self, kind: str, low: date, high: date):
+        # Invalidates kind's entries for the dates from low to high, inclusive; None leaves that end open.
+        with self._dates_lock:
+            dates = self._cached_dates[kind]
+            start = 0 if low is None else bisect_left(dates, low)
+            stop = len(dates) if high is None else bisect_right(dates, high)
+            stale = dates[start:stop]
+            del dates[start:stop]
+        for day in stale:
+            self._cache.invalidate((kind, day))
+
+    def add_user(self, user: User):
+        self._repo.add_user(user)
+
+    def get_user(self, username) -> User:
+        return self._repo.get_user(username)
+
+    def get_users(self) -> List[User]:
+        return self._repo.get_users()
+
+    def add_article(self, article: Article):
+        self._repo.add_article(article)
+
+        new_date = article.date
+        self._cache.invalidate(('article', article.id))
+        self._cache.invalidate(('articles_by_date', new_date))
+        for tag in article.tags:
+            self._cache.invalidate(('article_ids_for_tag', tag.tag_name))
+        if article.is_tagged():
+            self._cache.invalidate(('tags',))
+
+        # The new date is now the previous date of the dates after it, up to the next date with Articles, and the next
+        # date of those before it, back to the previous date with Articles. A date with no Articles has neither, so a
+        # first Article for new_date also changes new_date's own entries.
+        calendar = self._repo.get_calendar()
+        self._invalidate_dates('previous_date', new_date, calendar.next_date(new_date))
+        self._invalidate_dates('next_date', calendar.previous_date(new_date), new_date)
+
+    def get_article(self, id: int) -> Article:
+        return self._cached(('article', id), 'get_article', id)
+
+    def get_articles_by_date(self, target_date: date) -> List[Article]:
+        return self._cached(('articles_by_date', target_date), 'get_articles_by_date', target_date)
+
+    def get_number_of_articles(self):
+        return self._repo.get_number_of_articles()
+
+    def get_first_article(self) -> Article:
+        return self._repo.get_first_article()
+
+    def get_last_article(self) -> Article:
+        return self._repo.get_last_article()
+
+    def get_articles_by_id(self, id_list):
+        return self._repo.get_articles_by_id(id_list)
+
+    def get_article_ids_for_tag(self, tag_name: str):
+        return self._cached(('article_ids_for_tag', tag_name), 'get_article_ids_for_tag', tag_name)
+
+    def get_article_ids_for_tag_query(self, query):
+        return self._repo.get_article_ids_for_tag_query(query)
+
+    def get_date_of_previous_article(self, article: Article):
+        # The result depends only on the Article's date.
+        return self._cached_date('previous_date', 'get_date_of_previous_article', article)
+
+    def get_date_of_next_article(self, article: Article):
+        return self._cached_date('next_date', 'get_date_of_next_article', article)
+
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        return self._repo.get_articles_between(start, end, cursor, limit)
+
+    def get_article_ids_between(self, start: date, end: date):
+        return self._repo.get_article_ids_between(start, end)
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return self._repo.get_number_of_articles_between(start, end)
+
+    def get_calendar(self) -> CalendarIndex:
+        # The wrapped repository keeps its index up to date, so it's never stale.
+        return self._repo.get_calendar()
+
+    def add_tag(self, tag: Tag):
+        self._repo.add_tag(tag)
+
+        self._cache.invalidate(('tags',))
+        self._cache.invalidate(('article_ids_for_tag', tag.tag_name))
+        for article in tag.tagged_articles:
+            self._cache.invalidate(('article', article.id))
+            self._cache.invalidate(('articles_by_date', article.date))
+
+    def get_tags(self) -> List[Tag]:
+        return self._cached(('tags',), 'get_tags')
+
+    def add_person(self, person: Person):
+        self._repo.add_person(person)
+
+    def get_person(self, full_name: str) -> Person:
+        return self._repo.get_person(full_name)
+
+    def get_article_ids_for_person(self, full_name: str):
+        return self._repo.get_article_ids_for_person(full_name)
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        return self._repo.get_article_ids_for_people(full_names)
+
+    def add_comment(self, comment: Comment):
+        self._repo.add_comment(comment)
+
+        self._cache.invalidate(('article', comment.article.id))
+        self._cache.invalidate(('articles_by_date', comment.article.date))
+
+    def add_comments(self, comments: List[Comment]):
+        self._repo.add_comments(comments)
+
+        for article in {id(comment.article): comment.article for comment in comments}.values():
+            self._cache.invalidate(('article', article.id))
+            self._cache.invalidate(('articles_by_date', article.date))
+
+    def get_comments(self):
+        return self._repo.get_comments()
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return self._repo.get_comments_for_user(username, cursor, limit)
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._repo.get_number_of_comments_for_user(username)
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._repo.get_most_commented_article_ids(limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._repo.get_recently_discussed_article_ids(limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._repo.get_highest_rated_article_ids(limit)
+
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        return self._repo.get_similar_article_ids(article_id, limit)
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        return self._repo.get_article_ids_by_stats(filters, sort_by, descending, limit)
+
+    def get_number_of_articles_by_stats(self, filters):
+        return self._repo.get_number_of_articles_by_stats(filters)
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        return self._repo.get_article_ids_for_facets(selection, cursor, limit)
+
+    def get_number_of_articles_for_facets(self, selection):
+        return self._repo.get_number_of_articles_for_facets(selection)
+
+    def get_facet_counts(self, selection):
+        return self._repo.get_facet_counts(selection)
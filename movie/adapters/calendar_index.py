@@ -0,0 +1,69 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class CalendarIndex:
+    # The distinct dates Articles were published on, in order, with the number of Articles on each day and in each
+    # month and year. First and last dates are O(1), previous and next dates are a binary search, and listing a year's
+    # months or a month's days never looks at an Article. Adding an Article's date is a dictionary update, plus an
+    # insertion into the list of dates when the date is new.
+
+    def __init__(self):
+        self._dates: List[date] = list()
+        self._day_counts: Dict[date, int] = dict()
+        self._month_counts: Dict[Tuple[int, int], int] = dict()
+        self._year_counts: Dict[int, int] = dict()
+
+    @classmethod
+    def from_counts(cls, day_counts: Iterable[Tuple[date, int]]) -> 'CalendarIndex':
+        # Builds an index from (date, number of Articles) pairs, e.g. the result of a GROUP BY query.
+        calendar = cls()
+        for day, count in day_counts:
+            calendar.add(day, count)
+        return calendar
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def add(self, day: date, count: int = 1):
+        if day not in self._day_counts:
+            insort(self._dates, day)
+            self._day_counts[day] = 0
+        self._day_counts[day] += count
+        month = (day.year, day.month)
+        self._month_counts[month] = self._month_counts.get(month, 0) + count
+        self._year_counts[day.year] = self._year_counts.get(day.year, 0) + count
+
+    def first_date(self) -> Optional[date]:
+        return self._dates[0] if self._dates else None
+
+    def last_date(self) -> Optional[date]:
+        return self._dates[-1] if self._dates else None
+
+    def previous_date(self, day: date) -> Optional[date]:
+        # The latest date before day with Articles, or None.
+        index = bisect_left(self._dates, day)
+        return self._dates[index - 1] if index > 0 else None
+
+    def next_date(self, day: date) -> Optional[date]:
+        # The earliest date after day with Articles, or None.
+        index = bisect_right(self._dates, day)
+        return self._dates[index] if index < len(self._dates) else None
+
+    def count(self, day: date) -> int:
+        return self._day_counts.get(day, 0)
+
+    def years(self) -> List[Tuple[int, int]]:
+        # (year, number of Articles) for each year with Articles, in order.
+        return sorted(self._year_counts.items())
+
+    def months(self, year: int) -> List[Tuple[int, int]]:
+        # (month, number of Articles) for each month of year with Articles, in order.
+        return sorted((month, count) for (month_year, month), count in self._month_counts.items() if month_year == year)
+
+    def days(self, year: int, month: int) -> List[Tuple[date, int]]:
+        # (date, number of Articles) for each day of the month with Articles, in order.
+        start = bisect_left(self._dates, date(year, month, 1))
+        end = bisect_left(self._dates, date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1))
+        return [(day, self._day_counts[day]) for day in self._dates[start:end]]
@@ -0,0 +1,99 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from movie.domain.model import MovieDetails
+
+
+# The numeric movie columns that can be filtered and sorted on, with the dtype used to store each. Missing values
+# (N/A in the catalog) are stored as NaN, so columns that may be missing are floating point.
+COLUMNS = {
+    'rating': np.float64,
+    'votes': np.float64,
+    'revenue': np.float64,
+    'metascore': np.float32,
+    'runtime': np.int32,
+    'year': np.int32
+}
+
+
+class ColumnStore:
+    # Keeps the numeric fields of every movie in NumPy arrays, one row per Article in the order Articles were added, so
+    # that filters and sorts are evaluated over whole columns at once. Arrays grow by doubling, so appends are
+    # amortised O(1).
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._rows: Dict[int, int] = dict()
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    def row_of(self, article_id: int) -> int:
+        # Returns the row number of the Article with article_id, or None if it has no row.
+        return self._rows.get(article_id)
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name][:self._size]
+
+    def append(self, article_id: int, details: MovieDetails) -> int:
+        # Adds a row for the Article and returns its row number.
+        if self._size == len(self._ids):
+            self._grow()
+
+        row = self._size
+        self._ids[row] = article_id
+        self._rows[article_id] = row
+        for name in COLUMNS:
+            value = getattr(details, name)
+            self._columns[name][row] = np.nan if value is None else value
+        self._size += 1
+        return row
+
+    def _grow(self):
+        capacity = max(2 * len(self._ids), 1)
+        self._ids = np.resize(self._ids, capacity)
+        for name in COLUMNS:
+            self._columns[name] = np.resize(self._columns[name], capacity)
+
+    def mask(self, filters: Dict[str, Tuple[float, float]]) -> np.ndarray:
+        # Returns a boolean array selecting the rows that satisfy every filter. A filter maps a column name to a
+        # (minimum, maximum) pair; the minimum is inclusive, the maximum exclusive, and either may be None.
+        selected = np.ones(self._size, dtype=bool)
+        for name, (minimum, maximum) in filters.items():
+            column = self.column(name)
+            if minimum is not None:
+                selected &= column >= minimum
+            if maximum is not None:
+                selected &= column < maximum
+        return selected
+
+    def count(self, filters: Dict[str, Tuple[float, float]]) -> int:
+        return int(np.count_nonzero(self.mask(filters)))
+
+    def query(self, filters: Dict[str, Tuple[float, float]], sort_by: str = None, descending: bool = True,
+              limit: int = None) -> List[int]:
+        # Returns the ids of the Articles that satisfy filters. When sort_by names a column, ids are ordered by it
+        # (missing values last); when limit is also given, only the top limit rows are selected and sorted, in
+        # O(n + limit log limit). Without sort_by, ids are returned in the order Articles were added.
+        rows = np.flatnonzero(self.mask(filters))
+
+        if sort_by is not None:
+            values = self.column(sort_by)[rows].astype(np.float64)
+            # Sort ascending on a key that puts the wanted rows first, with NaN (missing) values at the end.
+            keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+            if limit is not None and limit < len(rows):
+                top = np.argpartition(keys, limit)[:limit]
+                rows = rows[top[np.argsort(keys[top], kind='stable')]]
+            else:
+                rows = rows[np.argsort(keys, kind='stable')]
+        elif limit is not None:
+            rows = rows[:limit]
+
+        return self._ids[rows].tolist()
@@ -0,0 +1,41 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List
+
+from movie.domain.model import Comment
+
+
+class UserCommentIndex:
+    # Each User's Comments in time order, keyed by username, beside a parallel list of their timestamps for binary
+    # searches. Comments nearly always arrive in time order, so adding one is usually an append; an older Comment is
+    # inserted in place, after any with the same timestamp. A page of a User's Comments, newest first, is a slice from
+    # the end of their list, so reading it is O(page) however many Comments they've written.
+
+    def __init__(self):
+        self._comments: Dict[str, List[Comment]] = dict()
+        self._timestamps: Dict[str, List[datetime]] = dict()
+
+    def add(self, comment: Comment):
+        username = comment.user.username
+        comments = self._comments.setdefault(username, list())
+        timestamps = self._timestamps.setdefault(username, list())
+        if len(timestamps) == 0 or comment.timestamp >= timestamps[-1]:
+            comments.append(comment)
+            timestamps.append(comment.timestamp)
+        else:
+            index = bisect_right(timestamps, comment.timestamp)
+            comments.insert(index, comment)
+            timestamps.insert(index, comment.timestamp)
+
+    def count(self, username: str) -> int:
+        return len(self._comments.get(username, ()))
+
+    def newest_first(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        # The User's Comments from the cursor'th newest, at most limit of them. Comments with the same timestamp come
+        # newest added first.
+        comments = self._comments.get(username, ())
+        end = len(comments) - cursor
+        if end <= 0:
+            return list()
+        start = 0 if limit is None else max(end - limit, 0)
+        return comments[start:end][::-1]
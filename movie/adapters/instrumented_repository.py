@@ -0,0 +1,142 @@
+from datetime import date
+from time import perf_counter
+from typing import List
+
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import User, Article, Tag, Comment, Person
+from movie.metrics.metrics import REPOSITORY_CALL_DURATION
+from movie.metrics.registry import MetricsRegistry
+
+
+class InstrumentedRepository(AbstractRepository):
+    # Wraps another repository and records the latency of every call, labelled by method name.
+
+    def __init__(self, repo: AbstractRepository, registry: MetricsRegistry):
+        self._repo = repo
+        self._registry = registry
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self._repo
+
+    def _timed(self, method_name: str, *args):
+        start = perf_counter()
+        try:
+            return getattr(self._repo, method_name)(*args)
+        finally:
+            self._registry.observe(REPOSITORY_CALL_DURATION, 'method', method_name, perf_counter() - start)
+
+    def add_user(self, user: User):
+        return self._timed('add_user', user)
+
+    def get_user(self, username) -> User:
+        return self._timed('get_user', username)
+
+    def get_users(self) -> List[User]:
+        return self._timed('get_users')
+
+    def add_article(self, article: Article):
+        return self._timed('add_article', article)
+
+    def get_article(self, id: int) -> Article:
+        return self._timed('get_article', id)
+
+    def get_articles_by_date(self, target_date: date) -> List[Article]:
+        return self._timed('get_articles_by_date', target_date)
+
+    def get_number_of_articles(self):
+        return self._timed('get_number_of_articles')
+
+    def get_first_article(self) -> Article:
+        return self._timed('get_first_article')
+
+    def get_last_article(self) -> Article:
+        return self._timed('get_last_article')
+
+    def get_articles_by_id(self, id_list):
+        return self._timed('get_articles_by_id', id_list)
+
+    def get_article_ids_for_tag(self, tag_name: str):
+        return self._timed('get_article_ids_for_tag', tag_name)
+
+    def get_article_ids_for_tag_query(self, query):
+        return self._timed('get_article_ids_for_tag_query', query)
+
+    def get_date_of_previous_article(self, article: Article):
+        return self._timed('get_date_of_previous_article', article)
+
+    def get_date_of_next_article(self, article: Article):
+        return self._timed('get_date_of_next_article', article)
+
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        return self._timed('get_articles_between', start, end, cursor, limit)
+
+    def get_article_ids_between(self, start: date, end: date):
+        return self._timed('get_article_ids_between', start, end)
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return self._timed('get_number_of_articles_between', start, end)
+
+    def get_calendar(self) -> CalendarIndex:
+        return self._timed('get_calendar')
+
+    def add_tag(self, tag: Tag):
+        return self._timed('add_tag', tag)
+
+    def get_tags(self) -> List[Tag]:
+        return self._timed('get_tags')
+
+    def add_person(self, person: Person):
+        return self._timed('add_person', person)
+
+    def get_person(self, full_name: str) -> Person:
+        return self._timed('get_person', full_name)
+
+    def get_article_ids_for_person(self, full_name: str):
+        return self._timed('get_article_ids_for_person', full_name)
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        return self._timed('get_article_ids_for_people', full_names)
+
+    def add_comment(self, comment: Comment):
+        return self._timed('add_comment', comment)
+
+    def add_comments(self, comments: List[Comment]):
+        return self._timed('add_comments', comments)
+
+    def get_comments(self):
+        return self._timed('get_comments')
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return self._timed('get_comments_for_user', username, cursor, limit)
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._timed('get_number_of_comments_for_user', username)
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._timed('get_most_commented_article_ids', limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._timed('get_recently_discussed_article_ids', limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._timed('get_highest_rated_article_ids', limit)
+
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        return self._timed('get_similar_article_ids', article_id, limit)
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        return self._timed('get_article_ids_by_stats', filters, sort_by, descending, limit)
+
+    def get_number_of_articles_by_stats(self, filters):
+        return self._timed('get_number_of_articles_by_stats', filters)
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        return self._timed('get_article_ids_for_facets', selection, cursor, limit)
+
+    def get_number_of_articles_for_facets(self, selection):
+        return self._timed('get_number_of_articles_for_facets', selection)
+
+    def get_facet_counts(self, selection):
+        return self._timed('get_facet_counts', selection)
@@ -0,0 +1,37 @@
+from bisect import bisect_left, insort
+from typing import Dict, List
+
+
+class Leaderboard:
+    # The size highest scoring Article ids, for scores that only ever increase. An Article that isn't on the board can
+    # only join it when its score rises, which update sees, so the board stays exact without keeping every Article's
+    # score. Entries are kept in ascending (score, -id) order, so ties go to the lower id. An update is a binary search
+    # plus a shift of at most size entries, and reading the board is O(size).
+
+    def __init__(self, size: int = 10):
+        self._size = size
+        self._entries = list()
+        self._scores: Dict[int, object] = dict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, article_id: int, score):
+        current = self._scores.get(article_id)
+        if current is not None:
+            if score <= current:
+                return
+            del self._entries[bisect_left(self._entries, (current, -article_id))]
+        elif len(self._entries) == self._size and (score, -article_id) <= self._entries[0]:
+            # Not enough to join a full board.
+            return
+
+        insort(self._entries, (score, -article_id))
+        self._scores[article_id] = score
+        if len(self._entries) > self._size:
+            _, evicted = self._entries.pop(0)
+            del self._scores[-evicted]
+
+    def top(self, limit: int = None) -> List[int]:
+        # Returns the Article ids on the board, highest score first.
+        return [-negated_id for _, negated_id in reversed(self._entries)][:limit]
@@ -1,16 +1,37 @@
 import csv
 import os
+import time
+import logging
 from datetime import date, datetime
 from typing import List
 import random
 import math
 from bisect import bisect, bisect_left, insort_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
 
 from werkzeug.security import generate_password_hash
 
+from movie.adapters.bitmap_index import Bitmap, FacetIndex
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.comment_index import UserCommentIndex
+from movie.adapters.column_store import ColumnStore
+from movie.adapters.leaderboard import Leaderboard
 from movie.adapters.repository import AbstractRepository, RepositoryException
-from movie.domain.model import Article, Tag, User, Comment, make_tag_association, make_comment
-from imdb import IMDb
+from movie.adapters.similarity_index import SimilarityIndex
+from movie.adapters.string_pool import StringPool
+from movie.adapters.tag_query import TagPostings, evaluate_tag_query
+from movie.domain.model import Article, MovieDetails, Tag, User, Comment, Person, make_tag_association, make_comment
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+LEADERBOARD_SIZE = 10
+DEFAULT_IMAGE_HYPERLINK = \
+    "http://1.bp.blogspot.com/-GQ4m8ee6tCU/UR18yk5lU0I/AAAAAAAABMo/7vMBqhxIjEA/s1600/Logo_Movie+Nights.png"
 
 
 class MemoryRepository(AbstractRepository):
@@ -19,20 +40,69 @@ class MemoryRepository(AbstractRepository):
     def __init__(self):
         self._articles = list()
         self._articles_index = dict()
+        self._calendar = CalendarIndex()
         self._tags = list()
-        self._actors = list()
-        self._users = list()
+        self._people = dict()
+        self._users = dict()
         self._comments = list()
+        self._user_comments = UserCommentIndex()
+        self._columns = ColumnStore()
+        self._facets = FacetIndex()
+        self._tag_postings = TagPostings()
+        self._similar = SimilarityIndex()
+        self._most_commented = Leaderboard(LEADERBOARD_SIZE)
+        self._recently_discussed = Leaderboard(LEADERBOARD_SIZE)
+        self._highest_rated = Leaderboard(LEADERBOARD_SIZE)
+        self._deferring_sort = False
+
+    @contextmanager
+    def bulk_load(self):
+        # Articles added inside the with block are appended unsorted and placed in date order once, when the block
+        # exits. This avoids an O(n) insort per Article when loading large catalogs.
+        self._deferring_sort = True
+        first_new = len(self._articles)
+        try:
+            yield self
+        finally:
+            self._deferring_sort = False
+
+            # insort_left places an Article ahead of those already stored for the same date, so reverse the new
+            # Articles and put them in front before the (stable) sort to keep the same ordering.
+            new_articles = self._articles[first_new:]
+            del self._articles[first_new:]
+            new_articles.reverse()
+            self._articles[:0] = new_articles
+            self._articles.sort(key=lambda article: article.date)
 
     def add_user(self, user: User):
-        self._users.append(user)
+        # Users are kept by username; the first User added with a username is the one returned for it.
+        self._users.setdefault(user.username, user)
 
     def get_user(self, username) -> User:
-        return next((user for user in self._users if user.username == username), None)
+        return self._users.get(username)
+
+    def get_users(self) -> List[User]:
+        # A copy, as Users may be added while the list is used.
+        return list(self._users.values())
 
     def add_article(self, article: Article):
-        insort_left(self._articles, article)
+        if self._deferring_sort:
+            self._articles.append(article)
+        else:
+            insort_left(self._articles, article)
         self._articles_index[article.id] = article
+        self._calendar.add(article.date)
+
+        # Keep the Article's numeric fields in the column store, for filtering and sorting, and index its genres,
+        # year and rating band by column store row, for faceted browsing, and its genres and people for finding similar
+        # movies.
+        if article.details is not None:
+            row = self._columns.append(article.id, article.details)
+            details = article.details
+            tag_names = [tag.tag_name for tag in article.tags]
+            self._facets.add(row, tag_names, details.year, details.rating)
+            self._similar.add(row, tag_names, details.year, details.rating, details.director, details.actor_names)
+            self._highest_rated.update(article.id, details.rating)
 
     def get_article(self, id: int) -> Article:
         article = None
@@ -105,6 +175,16 @@ class MemoryRepository(AbstractRepository):
 
         return article_ids
 
+    def get_article_ids_for_tag_query(self, query):
+        tags = {tag.tag_name: tag for tag in self._tags}
+        number_of_articles = len(self._articles_index)
+
+        def postings(tag_name):
+            tag = tags.get(tag_name)
+            return self._tag_postings.postings(tag, number_of_articles) if tag is not None else list()
+
+        return evaluate_tag_query(query, postings, lambda: Bitmap.from_rows(self._articles_index))
+
     def get_date_of_previous_article(self, article: Article):
         previous_date = None
 
@@ -135,19 +215,120 @@ class MemoryRepository(AbstractRepository):
 
         return next_date
 
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        # Two binary searches find the range; only the requested page of it is copied.
+        first, stop = self._range_bounds(start, end)
+        first += max(cursor, 0)
+        if limit is not None:
+            stop = min(stop, first + limit)
+        return self._articles[first:stop]
+
+    def get_article_ids_between(self, start: date, end: date):
+        first, stop = self._range_bounds(start, end)
+        return [article.id for article in self._articles[first:stop]]
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        first, stop = self._range_bounds(start, end)
+        return max(stop - first, 0)
+
+    def _range_bounds(self, start: date, end: date):
+        # The positions of the first Article published on or after start, and of the first one published after end.
+        return bisect_left(self._articles, _date_marker(start)), bisect(self._articles, _date_marker(end))
+
+    def get_calendar(self) -> CalendarIndex:
+        return self._calendar
+
     def add_tag(self, tag: Tag):
         self._tags.append(tag)
 
     def get_tags(self) -> List[Tag]:
         return self._tags
 
+    def add_person(self, person: Person):
+        self._people[person.full_name] = person
+
+    def get_person(self, full_name: str) -> Person:
+        return self._people.get(full_name)
+
+    def get_article_ids_for_person(self, full_name: str):
+        person = self._people.get(full_name)
+        if person is None:
+            return list()
+
+        # A Person who directed and starred in a movie is credited for it twice.
+        return sorted({article.id for article in chain(person.directed_articles, person.starring_articles)})
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        # Intersect the shortest filmographies first.
+        id_sets = sorted((set(self.get_article_ids_for_person(full_name)) for full_name in full_names), key=len)
+        if len(id_sets) == 0:
+            return list()
+        return sorted(id_sets[0].intersection(*id_sets[1:]))
+
     def add_comment(self, comment: Comment):
         super().add_comment(comment)
+        self._update_discussion(comment)
         self._comments.append(comment)
 
+    def add_comments(self, comments: List[Comment]):
+        # The indexes are updated first, so a Comment they can't take isn't left in the list of Comments.
+        super().add_comments(comments)
+        for comment in comments:
+            self._update_discussion(comment)
+        self._comments.extend(comments)
+
+    def _update_discussion(self, comment: Comment):
+        self._user_comments.add(comment)
+        article = comment.article
+        self._most_commented.update(article.id, article.number_of_comments)
+        self._recently_discussed.update(article.id, comment.timestamp)
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return self._user_comments.newest_first(username, cursor, limit)
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._user_comments.count(username)
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._most_commented.top(limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._recently_discussed.top(limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._highest_rated.top(limit)
+
     def get_comments(self):
         return self._comments
 
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        row = self._columns.row_of(article_id)
+        if row is None:
+            return list()
+        return self._columns.ids[self._similar.neighbours(row)[:limit]].tolist()
+
+    def precompute_similar_articles(self):
+        # Computes every Article's similar Articles now, rather than when first asked for.
+        self._similar.precompute()
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        return self._columns.query(filters, sort_by, descending, limit)
+
+    def get_number_of_articles_by_stats(self, filters):
+        return self._columns.count(filters)
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        rows = self._facets.select(selection).rows()
+        cursor = max(cursor, 0)
+        page = list(islice(rows, cursor, None if limit is None else cursor + limit))
+        return self._columns.ids[page].tolist()
+
+    def get_number_of_articles_for_facets(self, selection):
+        return len(self._facets.select(selection))
+
+    def get_facet_counts(self, selection):
+        return self._facets.counts(selection)
+
     # Helper method to return article index.
     def article_index(self, article: Article):
         index = bisect_left(self._articles, article)
@@ -156,6 +337,11 @@ class MemoryRepository(AbstractRepository):
         raise ValueError
 
 
+def _date_marker(day: date) -> Article:
+    # An Article that sorts with those published on day, for binary searches of the date-ordered Articles.
+    return Article(date=day, title=None, first_para=None, hyperlink=None, image_hyperlink=None)
+
+
 def read_csv_file(filename: str):
     with open(filename, encoding='utf-8-sig') as infile:
         reader = csv.reader(infile)
@@ -170,188 +356,156 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_articles_and_tags(data_path: str, repo: MemoryRepository):
-    tags = dict()
-    count_days = 0
-    count_months = 0
-
-    for data_row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
-
-        article_key = int(data_row[0])
-        article_tags = data_row[2].split(",")
-
-        # Add any new tags; associate the current article with tags.
-        for tag in article_tags:
-            if tag not in tags.keys():
-                tags[tag] = list()
-            tags[tag].append(article_key)
-
-        if count_days == 27:
-            count_days = 0
-        if count_months == 11:
-            count_months = 0
-
-        release_date = str(int(data_row[6]) + 1)
-        months = []
-        for i in range(1, 13):
-            if i < 10:
-                months.append("0" + str(i))
-            if i >= 10:
-                months.append(str(i))
-        count_months += 1
-
-        days = []
-        for i in range(1, 29):
-            if i < 10:
-                days.append("0" + str(i))
-            if i >= 10:
-                days.append(str(i))
-        count_days += 1
-
-        release_date = release_date + '-' + months[count_months] + '-' + days[count_days]
-
-        """
-        ia = IMDb()
-        actor_string = data_row[5]
-        split_actor_string = actor_string[0].split(",")
-        
-        if len(split_actor_string) >= 2:
-            acting_one = split_actor_string[0].strip()
-            acting_two = split_actor_string[1].strip()
-
-            acting_one_search = ia.search_person(acting_one)
-            acting_one_id = acting_one_search[0].personID
-            acting_one = ia.get_person(acting_one_id)
-
-            acting_two_search = ia.search_person(acting_two)
-            acting_two_id = acting_two_search[0].personID
-            acting_two = ia.get_person(acting_two_id)
-        
-        movie_search = ia.search_movie(data_row[1])
-        movie_search_id = movie_search[0].movieID
-        get_movie = ia.get_movie(movie_search_id)
-
-            #if acting_one or acting_two in get_movie:
-
-        ia.update(get_movie, 'release dates')
-        date_search = get_movie['release dates'][0]
-        index = date_search.rfind(':')
-        date_search = date_search[index+1:]
-        date_search = date_search.split(' ')
-        date_search = date_search[0:3][::-1]
-
-        if len(date_search[2]) < 2:
-            date_search[2] = '0' + date_search[2]
-
-        stringz = ""
-        if date_search[1] == 'January':
-            date_search[1] = '01'
-        elif date_search[1] == 'February':
-            date_search[1] = '02'
-        elif date_search[1] == 'March':
-            date_search[1] = '03'
-        elif date_search[1] == 'April':
-            date_search[1] = '04'
-        elif date_search[1] == 'May':
-            date_search[1] = '05'
-        elif date_search[1] == 'June':
-            date_search[1] = '06'
-        elif date_search[1] == 'July':
-            date_search[1] = '07'
-        elif date_search[1] == 'August':
-            date_search[1] = '08'
-        elif date_search[1] == 'September':
-            date_search[1] = '09'
-        elif date_search[1] == 'October':
-            date_search[1] = '10'
-        elif date_search[1] == 'November':
-            date_search[1] = '11'
-        elif date_search[1] == 'December':
-            date_search[1] = '12'
-
-        for i in date_search:
-            stringz += i + "-"
-
-        release_date = stringz[:-1]
-"""
-
-        for_link = data_row[1]
-        for_link = for_link.split(" ")
-        output = "https://www.imdb.com/find?q="
-        for i in for_link:
-            output += i + "+"
-        output = output + "&ref_=nv_sr_sm"
-
-        """
-        ia = IMDb()
-        movie_search = ia.search_movie(data_row[1])
-        movie_search_id = movie_search[0].movieID
-        get_movie = ia.get_movie(movie_search_id)
-        image_link = ""
-        image_link += get_movie['cover url']
-        """
-
-        describe_movie = float(data_row[8])
-        describe_movie_output = ""
-        if describe_movie < 5:
-            describe_movie_output = ". This terrible movie is directed by "
-        elif 5 <= describe_movie < 7:
-            describe_movie_output = ". This average movie is directed by "
-        elif 7 <= describe_movie < 9:
-            describe_movie_output = ". This great movie is directed by "
-        elif 9 <= describe_movie <= 10:
-            describe_movie_output = ". This amazing movie is directed by "
-
-        metascore_output = ""
-        if data_row[11] != "N/A":
-            metascore = int(data_row[11])
-            if metascore < 50:
-                metascore_output = " With a shockingly low Metascore of " + data_row[11] + " this movie straight up stinks!"
-            elif 50 <= metascore < 70:
-                metascore_output = " With a somewhat decent Metascore of " + data_row[11] + " this movie is watchable."
-            elif 70 <= metascore < 90:
-                metascore_output = " With a awesome Metascore of " + data_row[11] + " this movie is a must recommend."
-            elif 90 <= metascore <= 100:
-                metascore_output = " With an almost perfect Metascore of  " + data_row[11] + " this movie is a no brainer."
-
-        revenue_output = ""
-        if data_row[10] != "N/A":
-            revenue_output = " Showing why " + data_row[1] + " made $" + data_row[10] + " million dollars!"
-        else:
-            revenue_output = " Enjoy!.... or not"
-
-        running_time_output = ""
-        running_time = data_row[7]
-        if int(running_time) < 90:
-            running_time_output = " With a less than average running time of " + running_time + " minutes, this movie won't take long too watch."
-        elif 90 <= int(running_time) < 120:
-            running_time_output = " With an average running time of " + running_time + " minutes, this movie will be as long as most."
-        elif 120 <= int(running_time):
-            running_time_output = " With a longer than average running time of " + running_time + " minutes, this movie needs more of your time so make sure you schedule some time in!"
-
-        # Create Article object.
-        article = Article(
-            date=date.fromisoformat(release_date),
-            title=data_row[1] + " (" + data_row[6] + ") " + "   -   " + str(math.floor(float(data_row[8]))) + "/10",
-            first_para=data_row[1] + " came out last year in " + data_row[6] + ". Starring " + data_row[5]
-            + describe_movie_output + data_row[4] + " as shown by the following plot: " + data_row[3]
-            + metascore_output + running_time_output + revenue_output,
-            hyperlink=output,
-            image_hyperlink="http://1.bp.blogspot.com/-GQ4m8ee6tCU/UR18yk5lU0I/AAAAAAAABMo/7vMBqhxIjEA/s1600/Logo_Movie+Nights.png",
-            id=article_key
-        )
+def read_csv_batches(filename: str, batch_size: int):
+    # Streams the rows of a CSV file in lists of at most batch_size rows, so that only one batch is held in memory.
+    with open(filename, encoding='utf-8-sig') as infile:
+        reader = csv.reader(infile)
 
-        # Add the Article to the repository.
-        repo.add_article(article)
+        # Skip the header line of the CSV file.
+        next(reader)
+
+        while True:
+            batch = list(islice(reader, batch_size))
+            if not batch:
+                break
+            yield batch
+
+
+def release_date_for_row(year: int, row_number: int) -> date:
+    # Movies are dated the year after their release, with the month and day cycling through 2..12 and 2..28 as rows
+    # are read. The date depends only on the row's position, so batches can be parsed independently.
+    return date(year + 1, row_number % 11 + 2, row_number % 27 + 2)
+
+
+def parse_optional(convert, value: str):
+    # Missing catalog values are written as N/A.
+    value = value.strip()
+    if value == "N/A":
+        return None
+    return convert(value)
+
+
+def parse_article_rows(first_row_number: int, rows):
+    # Converts raw CSV rows into tuples of Article ids, tag names, dates and MovieDetails. This function only uses its
+    # arguments, so it can run in a worker process.
+    parsed = list()
+
+    for row_number, data_row in enumerate(rows, first_row_number):
+        title = data_row[1].strip()
+        year = int(data_row[6])
+        rating = float(data_row[8])
+
+        # Keep the typed source fields; the title and narrative text are rendered from them when displayed.
+        details = MovieDetails(
+            name=title,
+            year=year,
+            plot=data_row[3].strip(),
+            director=data_row[4].strip(),
+            actors=data_row[5].strip(),
+            rating=rating,
+            metascore=parse_optional(int, data_row[11]),
+            runtime=int(data_row[7]),
+            revenue=parse_optional(float, data_row[10]),
+            votes=int(data_row[9])
+        )
 
-    # Create Tag objects, associate them with Articles and add them to the repository.
-    for tag_name in tags.keys():
-        tag = Tag(tag_name)
-        for article_id in tags[tag_name]:
-            article = repo.get_article(article_id)
-            make_tag_association(article, tag)
+        parsed.append((
+            int(data_row[0]),
+            data_row[2].split(","),
+            release_date_for_row(year, row_number),
+            details
+        ))
+
+    return parsed
+
+
+def parse_article_batches(filename: str, batch_size: int, workers: int):
+    # Yields parsed batches in file order. With workers, batches are parsed by a process pool that is never more than
+    # two batches per worker ahead of the consumer, which keeps memory bounded however large the file is.
+    batches = read_csv_batches(filename, batch_size)
+
+    if workers <= 0:
+        row_number = 0
+        for batch in batches:
+            yield parse_article_rows(row_number, batch)
+            row_number += len(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        row_number = 0
+        for batch in batches:
+            pending.append(executor.submit(parse_article_rows, row_number, batch))
+            row_number += len(batch)
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def load_articles_and_tags(data_path: str, repo: MemoryRepository, batch_size: int = DEFAULT_BATCH_SIZE,
+                           workers: int = 0, progress=None):
+    # Streams Data1000Movies.csv into repo, batch_size rows at a time. Batches are parsed in worker processes when
+    # workers is greater than zero. After each batch, progress (if given) is called with the number of rows loaded so
+    # far and the overall rate in rows per second.
+    tags = dict()
+    people = dict()
+    name_pool = StringPool()
+    rows_loaded = 0
+    start_time = time.perf_counter()
+
+    with repo.bulk_load():
+        for parsed_batch in parse_article_batches(os.path.join(data_path, 'Data1000Movies.csv'), batch_size, workers):
+            for article_key, tag_names, release_date, details in parsed_batch:
+                # Directors are credited on many movies, and casts repeat across sequels; keep one copy of each.
+                details.share_names(name_pool.intern)
+
+                # Create Article object. Its title, narrative text and IMDb link are rendered from details when read.
+                article = Article(
+                    date=release_date,
+                    title=None,
+                    first_para=None,
+                    hyperlink=None,
+                    image_hyperlink=DEFAULT_IMAGE_HYPERLINK,
+                    id=article_key,
+                    details=details
+                )
+
+                # Add any new tags; associate the current article with tags.
+                for tag_name in tag_names:
+                    tag = tags.get(tag_name)
+                    if tag is None:
+                        tag = tags[tag_name] = Tag(tag_name)
+                    make_tag_association(article, tag)
+
+                # Add any new people; credit the current article to its director and actors.
+                for role, names in ((Person.DIRECTOR, [details.director]), (Person.ACTOR, details.actor_names)):
+                    for name in names:
+                        person = people.get(name)
+                        if person is None:
+                            person = people[name] = Person(name)
+                        person.add_article(article, role)
+
+                # Add the Article to the repository.
+                repo.add_article(article)
+
+            rows_loaded += len(parsed_batch)
+            rows_per_second = rows_loaded / max(time.perf_counter() - start_time, 1e-9)
+            logger.info('Loaded %d movies (%.0f rows/s)', rows_loaded, rows_per_second)
+            if progress is not None:
+                progress(rows_loaded, rows_per_second)
+
+    # Add the Tags, already associated with their Articles, to the repository.
+    for tag in tags.values():
         repo.add_tag(tag)
 
+    # Likewise for the directors and actors.
+    for person in people.values():
+        repo.add_person(person)
+
+    logger.info('Shared %d names in place of %d repeated copies, saving %d bytes', len(name_pool), name_pool.duplicates,
+                name_pool.saved_bytes)
+
 
 def load_users(data_path: str, repo: MemoryRepository):
     users = dict()
@@ -377,9 +531,10 @@ def load_comments(data_path: str, repo: MemoryRepository, users):
         repo.add_comment(comment)
 
 
-def populate(data_path: str, repo: MemoryRepository):
+def populate(data_path: str, repo: MemoryRepository, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 0,
+             progress=None):
     # Load articles and tags into the repository.
-    load_articles_and_tags(data_path, repo)
+    load_articles_and_tags(data_path, repo, batch_size, workers, progress)
 
     # Load users into the repository.
     users = load_users(data_path, repo)
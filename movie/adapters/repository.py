@@ -2,7 +2,8 @@ import abc
 from typing import List
 from datetime import date
 
-from movie.domain.model import User, Article, Tag, Comment
+from movie.adapters.calendar_index import CalendarIndex
+from movie.domain.model import User, Article, Tag, Comment, Person
 
 
 repo_instance = None
@@ -15,6 +16,8 @@ class RepositoryException(Exception):
 
 
 class AbstractRepository(abc.ABC):
+    # True when the entities a repository returns are snapshots built for each read, rather than objects it holds.
+    returns_snapshots = False
 
     @abc.abstractmethod
     def add_user(self, user: User):
@@ -29,6 +32,11 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_users(self) -> List[User]:
+        """ Returns the Users stored in the repository, in the order they were added. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_article(self, article: Article):
         """ Adds an Article to the repository. """
@@ -87,6 +95,15 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_article_ids_for_tag_query(self, query):
+        """ Returns a sorted list of ids representing Articles that match a boolean tag query, as returned by
+        tag_query.parse_tag_query.
+
+        Tags that don't exist match no Articles. If no Articles match, this method returns an empty list.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_date_of_previous_article(self, article: Article):
         """ Returns the date of an Article that immediately precedes article.
@@ -105,6 +122,39 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        """ Returns a list of Articles published from start to end, inclusive, in date order (as
+        get_articles_by_date orders Articles with the same date).
+
+        The first cursor Articles in the range are skipped and at most limit Articles are returned. If there are no
+        such Articles, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_article_ids_between(self, start: date, end: date):
+        """ Returns a list of ids representing the Articles published from start to end, inclusive, in the order
+        get_articles_between returns them.
+
+        If there are no such Articles, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        """ Returns the number of Articles published from start to end, inclusive. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_calendar(self) -> CalendarIndex:
+        """ Returns a CalendarIndex of the dates on which Articles were published, with the number of Articles on each
+        day and in each month and year.
+
+        The index is the repository's own and must not be modified.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_tag(self, tag: Tag):
         """ Adds a Tag to the repository. """
@@ -115,26 +165,158 @@ class AbstractRepository(abc.ABC):
         """ Returns the Tags stored in the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def add_person(self, person: Person):
+        """ Adds a Person (a director or actor) to the repository. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_person(self, full_name: str) -> Person:
+        """ Returns the Person named full_name from the repository.
+
+        If there is no Person with the given name, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_article_ids_for_person(self, full_name: str):
+        """ Returns a sorted list of ids representing Articles about movies that full_name directed or starred in.
+
+        If there is no such Person, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_article_ids_for_people(self, full_names: List[str]):
+        """ Returns a sorted list of ids representing Articles about movies that every one of full_names directed or
+        starred in.
+
+        If there are no such Articles, this method returns an empty list.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_comment(self, comment: Comment):
         """ Adds a Comment to the repository.
 
-        If the Comment doesn't have bidirectional links with an Article and a User, this method raises a
-        RepositoryException and doesn't update the repository.
+        If the Comment doesn't have bidirectional links with an Article and a User, or its timestamp has a time zone
+        (Comments are timestamped in naive local time), this method raises a RepositoryException and doesn't update
+        the repository.
         """
         if comment.user is None or comment not in comment.user.comments:
             raise RepositoryException('Comment not correctly attached to a User')
         if comment.article is None or comment not in comment.article.comments:
             raise RepositoryException('Comment not correctly attached to an Article')
+        if comment.timestamp.tzinfo is not None:
+            raise RepositoryException('Comment timestamp must not have a time zone')
+
+    @abc.abstractmethod
+    def add_comments(self, comments: List[Comment]):
+        """ Adds many Comments to the repository at once.
+
+        As add_comment, but checks each User's and Article's Comments once for the whole batch rather than once per
+        Comment. If any Comment isn't properly attached, or has a timestamp with a time zone, this method raises a
+        RepositoryException and adds none.
+        """
+        attached = dict()
+        for comment in comments:
+            if comment.timestamp.tzinfo is not None:
+                raise RepositoryException('Comment timestamp must not have a time zone')
+            for owner, name in ((comment.user, 'User'), (comment.article, 'Article')):
+                if owner is None:
+                    raise RepositoryException(f'Comment not correctly attached to a {name}')
+                owner_comments = attached.get(id(owner))
+                if owner_comments is None:
+                    owner_comments = attached[id(owner)] = {id(owner_comment) for owner_comment in owner.comments}
+                if id(comment) not in owner_comments:
+                    raise RepositoryException(f'Comment not correctly attached to a {name}')
 
     @abc.abstractmethod
     def get_comments(self):
         """ Returns the Comments stored in the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        """ Returns the Comments written by the User named username, newest first, starting from the cursor'th newest.
 
+        At most limit Comments are returned, or all of them from the cursor on when limit is None. Comments with the
+        same timestamp come most recently added first. If the User has no Comments, or there's no such User, this
+        method returns an empty list.
+        """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        """ Returns the number of Comments written by the User named username. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_most_commented_article_ids(self, limit: int = None):
+        """ Returns a list of ids representing the Articles with the most Comments, most commented first. At most
+        limit ids are returned, and repositories may keep only the first few.
+        """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        """ Returns a list of ids representing the Articles with the most recent Comments, most recent first. At most
+        limit ids are returned, and repositories may keep only the first few.
+        """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_highest_rated_article_ids(self, limit: int = None):
+        """ Returns a list of ids representing the Articles about the highest rated movies, highest rated first. At
+        most limit ids are returned, and repositories may keep only the first few.
+        """
+        raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        """ Returns a list of ids representing the Articles about the movies most similar to the Article with
+        article_id, by shared genres, director and actors, release year and rating, most similar first. At most limit
+        ids are returned.
 
+        If there is no Article with article_id, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        """ Returns a list of ids representing Articles whose numeric fields satisfy filters.
+
+        filters maps a field name (rating, votes, revenue, metascore, runtime or year) to a (minimum, maximum) pair,
+        where the minimum is inclusive, the maximum exclusive and either may be None. When sort_by names a field, the
+        ids are ordered by it (descending by default, with missing values last) and at most limit ids are returned.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_articles_by_stats(self, filters):
+        """ Returns the number of Articles whose numeric fields satisfy filters. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        """ Returns a list of ids representing Articles that match selection, in the order they were added.
+
+        selection maps a facet (genre, year or rating) to a list of values. An Article matches when, for every facet
+        in selection, it has any of the listed values. Rating values are whole-number bands, e.g. 7 for ratings from
+        7.0 up to 8.0. The first cursor matches are skipped and at most limit ids are returned.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_articles_for_facets(self, selection):
+        """ Returns the number of Articles that match selection. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_facet_counts(self, selection):
+        """ Returns a dict mapping each facet to a dict of {value: number of matching Articles}.
+
+        Each facet's counts apply the selection for every other facet, so they show how many Articles each value would
+        match when combined with the rest of the selection.
+        """
+        raise NotImplementedError
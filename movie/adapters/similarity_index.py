@@ -0,0 +1,222 @@
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+# Relative weight of each kind of similarity in a pair of movies' score, which is between 0 and 1.
+WEIGHTS = {'genres': 0.3, 'people': 0.5, 'year': 0.1, 'rating': 0.1}
+
+# A shared director counts as much as this many shared actors. The people score rises towards 1 with the weight of
+# the people two movies share: one actor scores 1 - exp(-1 / PEOPLE_SCALE), the director and an actor
+# 1 - exp(-3 / PEOPLE_SCALE).
+DIRECTOR_WEIGHT = 2.0
+PEOPLE_SCALE = 2.0
+
+# Release years this far apart score exp(-1) for year proximity.
+YEAR_SCALE = 5.0
+
+# Candidates for a movie's neighbours are drawn from the movies sharing a person, a genre or the whole set of genres
+# with it (the latter two within a year of its release), taking at most this many of the most recently added movies
+# from each. This bounds the work per movie however large the catalog and its most popular people and genres grow.
+CANDIDATES_PER_POSTING = 50
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    # np.bitwise_count was added in NumPy 2.0.
+    _BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_COUNTS[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def similarity_scores(shared_genres: np.ndarray, genre_union: np.ndarray, shared_people: np.ndarray,
+                      year_gaps: np.ndarray, rating_gaps: np.ndarray) -> np.ndarray:
+    # Scores a movie against each of its candidates, given the number of genres they share and have between them, the
+    # weight of the people they share, and the differences in their release years and ratings.
+    union = np.asarray(genre_union, dtype=np.float32)
+    genre_scores = np.divide(np.asarray(shared_genres, dtype=np.float32), union, out=np.zeros(len(union), np.float32),
+                             where=union > 0)
+    people_scores = 1.0 - np.exp(-np.asarray(shared_people, dtype=np.float32) / PEOPLE_SCALE)
+    year_scores = np.exp(-np.abs(np.asarray(year_gaps, dtype=np.float32)) / YEAR_SCALE)
+    rating_scores = 1.0 - np.abs(np.asarray(rating_gaps, dtype=np.float32)) / 10.0
+
+    scores = (WEIGHTS['genres'] * genre_scores + WEIGHTS['people'] * people_scores +
+              WEIGHTS['year'] * year_scores + WEIGHTS['rating'] * rating_scores)
+    return scores.astype(np.float32)
+
+
+class SimilarityIndex:
+    # Keeps the top neighbours_per_movie most similar movies for every movie, by row number (the rows of the
+    # ColumnStore). A movie's neighbours are computed when first asked for, or for every movie by precompute, and
+    # are kept in fixed-width NumPy arrays. Once any have been computed, each added movie is offered to its
+    # candidates' neighbour lists, so they stay current without being recomputed.
+
+    def __init__(self, neighbours_per_movie: int = 10, capacity: int = 1024):
+        self._k = neighbours_per_movie
+        self._size = 0
+        self._number_computed = 0
+
+        # Per-movie features. Genres are a bitmask; with more than 64 genres, genres share bits.
+        self._masks = np.zeros(capacity, dtype=np.uint64)
+        self._years = np.zeros(capacity, dtype=np.float32)
+        self._ratings = np.zeros(capacity, dtype=np.float32)
+        self._directors = np.full(capacity, -1, dtype=np.int32)
+        self._actor_offsets = array('q', [0])
+        self._actors = array('i')
+
+        # Posting lists of rows, by person id, by (genre bit, year) and by (genre mask, year).
+        self._genre_bits: Dict[str, int] = dict()
+        self._person_ids: Dict[str, int] = dict()
+        self._person_rows: List[array] = list()
+        self._genre_rows: Dict[Tuple[int, int], array] = dict()
+        self._mask_rows: Dict[Tuple[int, int], array] = dict()
+
+        # Neighbour lists, unordered; unused slots hold -1.
+        self._neighbours = np.full((capacity, self._k), -1, dtype=np.int32)
+        self._scores = np.full((capacity, self._k), -np.inf, dtype=np.float32)
+        self._computed = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, row: int, genres: Iterable[str], year: int, rating: float, director: str, actors: List[str]):
+        # Rows must be added in order, as they are to the ColumnStore.
+        if row != self._size:
+            raise ValueError(f'Expected row {self._size}, got {row}')
+        if row == len(self._masks):
+            self._grow()
+
+        mask = 0
+        for genre in genres:
+            bit = self._genre_bits.setdefault(genre, len(self._genre_bits) % 64)
+            mask |= 1 << bit
+            self._posting(self._genre_rows, (bit, year)).append(row)
+        self._posting(self._mask_rows, (mask, year)).append(row)
+
+        self._masks[row] = mask
+        self._years[row] = year
+        self._ratings[row] = rating
+        self._directors[row] = self._person(director) if director else -1
+        for actor in actors:
+            self._actors.append(self._person(actor))
+        self._actor_offsets.append(len(self._actors))
+
+        if self._directors[row] >= 0:
+            self._person_rows[self._directors[row]].append(row)
+        for person_id in self._actors[self._actor_offsets[row]:]:
+            self._person_rows[person_id].append(row)
+        self._size += 1
+
+        if self._number_computed > 0:
+            self._offer(row)
+
+    def _posting(self, postings: Dict, key) -> array:
+        rows = postings.get(key)
+        if rows is None:
+            rows = postings[key] = array('i')
+        return rows
+
+    def _person(self, name: str) -> int:
+        person_id = self._person_ids.get(name)
+        if person_id is None:
+            person_id = self._person_ids[name] = len(self._person_rows)
+            self._person_rows.append(array('i'))
+        return person_id
+
+    def _grow(self):
+        capacity = 2 * len(self._masks)
+        self._masks = np.resize(self._masks, capacity)
+        self._years = np.resize(self._years, capacity)
+        self._ratings = np.resize(self._ratings, capacity)
+        self._directors = np.resize(self._directors, capacity)
+
+        neighbours = np.full((capacity, self._k), -1, dtype=np.int32)
+        neighbours[:self._size] = self._neighbours[:self._size]
+        self._neighbours = neighbours
+        scores = np.full((capacity, self._k), -np.inf, dtype=np.float32)
+        scores[:self._size] = self._scores[:self._size]
+        self._scores = scores
+        computed = np.zeros(capacity, dtype=bool)
+        computed[:self._size] = self._computed[:self._size]
+        self._computed = computed
+
+    def neighbours(self, row: int) -> List[int]:
+        # Returns the rows of the movies most similar to row, most similar first.
+        if not self._computed[row]:
+            self._compute(row)
+        order = np.argsort(-self._scores[row], kind='stable')
+        return [int(neighbour) for neighbour in self._neighbours[row][order] if neighbour >= 0]
+
+    def precompute(self):
+        for row in range(self._size):
+            if not self._computed[row]:
+                self._compute(row)
+
+    def _compute(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        candidates, scores = self.score_candidates(row)
+        k = min(self._k, len(candidates))
+        if k > 0:
+            top = np.argpartition(-scores, k - 1)[:k]
+            self._neighbours[row, :k] = candidates[top]
+            self._scores[row, :k] = scores[top]
+        self._computed[row] = True
+        self._number_computed += 1
+        return candidates, scores
+
+    def _offer(self, row: int):
+        # Computes the new row's neighbours, then replaces the weakest neighbour of each already computed candidate
+        # that the new row is more similar to. Scores are symmetric, so the candidates' scores are already known.
+        candidates, scores = self._compute(row)
+        computed = self._computed[candidates]
+        candidates, scores = candidates[computed], scores[computed]
+
+        weakest = np.argmin(self._scores[candidates], axis=1)
+        better = scores > self._scores[candidates, weakest]
+        self._neighbours[candidates[better], weakest[better]] = row
+        self._scores[candidates[better], weakest[better]] = scores[better]
+
+    def score_candidates(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns the candidate neighbours of row and their similarity scores.
+        year = int(self._years[row])
+        mask = int(self._masks[row])
+
+        # Rows sharing a person with row, repeated once per shared person, with the weight of each.
+        people = [(int(self._directors[row]), DIRECTOR_WEIGHT)] if self._directors[row] >= 0 else list()
+        people.extend((person_id, 1.0)
+                      for person_id in self._actors[self._actor_offsets[row]:self._actor_offsets[row + 1]])
+        shared = [self._recent(self._person_rows[person_id]) for person_id, _ in people]
+        shared_weights = [np.full(len(rows), weight, dtype=np.float32) for rows, (_, weight) in zip(shared, people)]
+
+        bits = [bit for bit in range(64) if mask >> bit & 1]
+        groups = list()
+        for nearby_year in (year - 1, year, year + 1):
+            groups.append(self._recent(self._mask_rows.get((mask, nearby_year))))
+            groups.extend(self._recent(self._genre_rows.get((bit, nearby_year))) for bit in bits)
+
+        candidates = np.unique(np.concatenate(shared + groups + [np.empty(0, dtype=np.int32)]))
+        candidates = candidates[candidates != row]
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+
+        # Sum the weights of the people each candidate shares with row.
+        shared_people = np.zeros(len(candidates), dtype=np.float32)
+        if shared:
+            shared_rows = np.concatenate(shared)
+            positions = np.searchsorted(candidates, shared_rows)
+            found = positions < len(candidates)
+            found[found] = candidates[positions[found]] == shared_rows[found]
+            np.add.at(shared_people, positions[found], np.concatenate(shared_weights)[found])
+
+        masks = self._masks[candidates]
+        scores = similarity_scores(_popcount(masks & np.uint64(mask)), _popcount(masks | np.uint64(mask)),
+                                   shared_people, self._years[candidates] - year,
+                                   self._ratings[candidates] - self._ratings[row])
+        return candidates.astype(np.int64), scores
+
+    @staticmethod
+    def _recent(rows: array) -> np.ndarray:
+        if not rows:
+            return np.empty(0, dtype=np.int32)
+        return np.frombuffer(rows[-CANDIDATES_PER_POSTING:], dtype=np.int32)
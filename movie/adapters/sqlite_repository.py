@@ -0,0 +1,583 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from movie.adapters.bitmap_index import FacetIndex, rating_band
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.column_store import COLUMNS
+from movie.adapters.repository import AbstractRepository, RepositoryException
+from movie.adapters.similarity_index import CANDIDATES_PER_POSTING, DIRECTOR_WEIGHT, similarity_scores
+from movie.adapters.tag_query import AndQuery, NotQuery, OrQuery, TagQueryException, TagTerm
+from movie.domain.model import Article, MovieDetails, Tag, User, Comment, Person, make_comment
+
+
+# As MemoryRepository's leaderboards and neighbour lists.
+LEADERBOARD_SIZE = 10
+SIMILAR_ARTICLES = 10
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS articles (
+    position INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL UNIQUE,
+    date TEXT NOT NULL,
+    title TEXT,
+    first_para TEXT,
+    hyperlink TEXT,
+    image_hyperlink TEXT,
+    name TEXT,
+    year INTEGER,
+    plot TEXT,
+    director TEXT,
+    actors TEXT,
+    rating REAL,
+    rating_band INTEGER,
+    metascore REAL,
+    runtime INTEGER,
+    revenue REAL,
+    votes REAL,
+    number_of_comments INTEGER NOT NULL DEFAULT 0,
+    last_commented TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_by_date ON articles (date, position DESC);
+CREATE INDEX IF NOT EXISTS articles_by_year ON articles (year);
+CREATE INDEX IF NOT EXISTS articles_by_rating ON articles (rating);
+CREATE INDEX IF NOT EXISTS articles_by_comments ON articles (number_of_comments);
+CREATE INDEX IF NOT EXISTS articles_by_last_commented ON articles (last_commented);
+
+CREATE TABLE IF NOT EXISTS tags (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS article_tags (
+    position INTEGER PRIMARY KEY,
+    tag_name TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    UNIQUE (tag_name, article_id)
+);
+CREATE INDEX IF NOT EXISTS article_tags_by_article ON article_tags (article_id);
+
+CREATE TABLE IF NOT EXISTS people (
+    name TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS credits (
+    position INTEGER PRIMARY KEY,
+    person_name TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    UNIQUE (person_name, article_id, role)
+);
+CREATE INDEX IF NOT EXISTS credits_by_article ON credits (article_id);
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    position INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    comment TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_by_article ON comments (article_id);
+CREATE INDEX IF NOT EXISTS comments_by_user ON comments (username, timestamp DESC, position DESC);
+'''
+
+_ARTICLE_COLUMNS = ('id', 'date', 'title', 'first_para', 'hyperlink', 'image_hyperlink', 'name', 'year', 'plot',
+                    'director', 'actors', 'rating', 'metascore', 'runtime', 'revenue', 'votes')
+
+# Articles with MovieDetails; only these have stats, facets and similar Articles, as in MemoryRepository.
+_HAS_DETAILS = 'year IS NOT NULL'
+
+
+class SqliteRepository(AbstractRepository):
+    # Keeps the catalog in a SQLite database file (or in memory, for ':memory:'), so that it survives restarts and
+    # needn't be held in memory. Like MemoryRepository, entities are identified by their ids and names; the Articles,
+    # Tags, People and Users it returns are snapshots built from the database, and changing them doesn't change the
+    # database. A connection can only be used on the thread that opened it.
+
+    returns_snapshots = True
+
+    def __init__(self, database: str = ':memory:'):
+        self._connection = sqlite3.connect(database)
+        self._connection.executescript(SCHEMA)
+        self._deferring_commit = False
+        self._calendar = None
+
+    def close(self):
+        self._connection.close()
+
+    @contextmanager
+    def bulk_load(self):
+        # Changes made inside the with block are committed together, as one transaction, when the block exits.
+        self._deferring_commit = True
+        try:
+            yield self
+        finally:
+            self._deferring_commit = False
+            self._connection.commit()
+
+    def _commit(self):
+        if not self._deferring_commit:
+            self._connection.commit()
+
+    def _execute(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        return self._connection.execute(sql, tuple(params))
+
+    def _column(self, sql: str, params: Iterable = ()) -> List:
+        return [row[0] for row in self._execute(sql, params)]
+
+    def add_user(self, user: User):
+        try:
+            self._execute('INSERT INTO users (username, password) VALUES (?, ?)', (user.username, user.password))
+        except sqlite3.IntegrityError:
+            raise RepositoryException(f'User {user.username} already exists')
+        self._commit()
+
+    def get_user(self, username) -> User:
+        row = self._execute('SELECT username, password FROM users WHERE username = ?', (username,)).fetchone()
+        return User(*row) if row is not None else None
+
+    def get_users(self) -> List[User]:
+        return [User(*row) for row in self._execute('SELECT username, password FROM users ORDER BY rowid')]
+
+    def add_article(self, article: Article):
+        # An Article with MovieDetails renders its title and text from them, so only the details are stored.
+        details = article.details
+        values = [article.id, article.date.isoformat(), None, None, article.hyperlink, article.image_hyperlink]
+        if details is None:
+            values[2:4] = [article.title, article.first_para]
+            values.extend([None] * 11)
+        else:
+            values.extend([details.name, details.year, details.plot, details.director, details.actors, details.rating,
+                           details.metascore, details.runtime, details.revenue, details.votes,
+                           rating_band(details.rating)])
+
+        try:
+            self._execute(f'INSERT INTO articles ({", ".join(_ARTICLE_COLUMNS)}, rating_band) '
+                          f'VALUES ({", ".join("?" * (len(_ARTICLE_COLUMNS) + 1))})', values)
+        except sqlite3.IntegrityError:
+            raise RepositoryException(f'Article {article.id} already exists')
+        if self._calendar is not None:
+            self._calendar.add(article.date)
+
+        for tag in article.tags:
+            self._add_tag_name(tag.tag_name)
+            self._execute('INSERT OR IGNORE INTO article_tags (tag_name, article_id) VALUES (?, ?)',
+                          (tag.tag_name, article.id))
+        if details is not None:
+            credits = [(details.director, Person.DIRECTOR)] if details.director else list()
+            credits.extend((name, Person.ACTOR) for name in details.actor_names)
+            for name, role in credits:
+                self._add_credit(name, article.id, role)
+        self._commit()
+
+    def _add_tag_name(self, tag_name: str):
+        self._execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (tag_name,))
+
+    def _add_credit(self, full_name: str, article_id: int, role: str):
+        self._execute('INSERT OR IGNORE INTO people (name) VALUES (?)', (full_name,))
+        self._execute('INSERT OR IGNORE INTO credits (person_name, article_id, role) VALUES (?, ?, ?)',
+                      (full_name, article_id, role))
+
+    def _load_articles(self, ids: Iterable[int]) -> Dict[int, Article]:
+        # Builds the Articles with ids, with their Tags and Comments, keyed by id. Missing ids are left out.
+        ids = list(dict.fromkeys(ids))
+        articles = dict()
+        for chunk_start in range(0, len(ids), 500):
+            chunk = ids[chunk_start:chunk_start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+
+            for row in self._execute(f'SELECT {", ".join(_ARTICLE_COLUMNS)} FROM articles '
+                                     f'WHERE id IN ({placeholders})', chunk):
+                id, article_date, title, first_para, hyperlink, image_hyperlink, name, year = row[:8]
+                details = None
+                if year is not None:
+                    plot, director, actors, rating, metascore, runtime, revenue, votes = row[8:]
+                    details = MovieDetails(
+                        name=name, year=year, plot=plot, director=director, actors=actors, rating=rating,
+                        metascore=int(metascore) if metascore is not None else None, runtime=runtime, revenue=revenue,
+                        votes=int(votes) if votes is not None else None
+                    )
+                articles[id] = Article(date.fromisoformat(article_date), title, first_para, hyperlink,
+                                       image_hyperlink, id, details)
+
+            for tag_name, article_id in self._execute(f'SELECT tag_name, article_id FROM article_tags '
+                                                      f'WHERE article_id IN ({placeholders}) ORDER BY position', chunk):
+                tag = Tag(tag_name)
+                tag.add_article(articles[article_id])
+                articles[article_id].add_tag(tag)
+
+            users = dict()
+            for username, password, article_id, text, timestamp in self._execute(
+                    f'SELECT users.username, users.password, article_id, comment, timestamp FROM comments '
+                    f'JOIN users ON users.username = comments.username '
+                    f'WHERE article_id IN ({placeholders}) ORDER BY comments.position', chunk):
+                user = users.get(username)
+                if user is None:
+                    user = users[username] = User(username, password)
+                make_comment(text, user, articles[article_id], datetime.fromisoformat(timestamp))
+        return articles
+
+    def _load_article(self, sql: str, params: Iterable = ()) -> Article:
+        # The Article whose id the query selects, or None.
+        ids = self._column(sql, params)
+        return self._load_articles(ids).get(ids[0]) if ids else None
+
+    def get_article(self, id: int) -> Article:
+        return self._load_article('SELECT id FROM articles WHERE id = ?', (id,))
+
+    def get_articles_by_date(self, target_date: date) -> List[Article]:
+        # Articles added later come first among those with the same date, as in MemoryRepository.
+        ids = self._column('SELECT id FROM articles WHERE date = ? ORDER BY position DESC', (target_date.isoformat(),))
+        articles = self._load_articles(ids)
+        return [articles[id] for id in ids]
+
+    def get_number_of_articles(self):
+        return self._execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def get_first_article(self) -> Article:
+        return self._load_article('SELECT id FROM articles ORDER BY date, position DESC LIMIT 1')
+
+    def get_last_article(self) -> Article:
+        return self._load_article('SELECT id FROM articles ORDER BY date DESC, position LIMIT 1')
+
+    def get_articles_by_id(self, id_list):
+        id_list = list(id_list)
+        articles = self._load_articles(id_list)
+        return [articles[id] for id in id_list if id in articles]
+
+    def get_article_ids_for_tag(self, tag_name: str):
+        return self._column('SELECT article_id FROM article_tags WHERE tag_name = ? ORDER BY position', (tag_name,))
+
+    def get_article_ids_for_tag_query(self, query):
+        sql, params = _tag_query_sql(query)
+        return self._column(f'SELECT DISTINCT id FROM ({sql}) ORDER BY id', params)
+
+    def get_date_of_previous_article(self, article: Article):
+        return self._date_of_adjacent_article(article, 'SELECT MAX(date) FROM articles WHERE date < ?')
+
+    def get_date_of_next_article(self, article: Article):
+        return self._date_of_adjacent_article(article, 'SELECT MIN(date) FROM articles WHERE date > ?')
+
+    def _date_of_adjacent_article(self, article: Article, sql: str):
+        # None when there's no such date, or no Article has article's date.
+        target_date = article.date.isoformat()
+        if self._execute('SELECT 1 FROM articles WHERE date = ?', (target_date,)).fetchone() is None:
+            return None
+        adjacent_date = self._execute(sql, (target_date,)).fetchone()[0]
+        return date.fromisoformat(adjacent_date) if adjacent_date is not None else None
+
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        # The articles_by_date index is in this order, so only the rows up to the end of the page are read.
+        ids = self._column('SELECT id FROM articles WHERE date BETWEEN ? AND ? ORDER BY date, position DESC '
+                           'LIMIT ? OFFSET ?',
+                           (start.isoformat(), end.isoformat(), -1 if limit is None else limit, cursor))
+        articles = self._load_articles(ids)
+        return [articles[id] for id in ids]
+
+    def get_article_ids_between(self, start: date, end: date):
+        return self._column('SELECT id FROM articles WHERE date BETWEEN ? AND ? ORDER BY date, position DESC',
+                            (start.isoformat(), end.isoformat()))
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return self._execute('SELECT COUNT(*) FROM articles WHERE date BETWEEN ? AND ?',
+                             (start.isoformat(), end.isoformat())).fetchone()[0]
+
+    def get_calendar(self) -> CalendarIndex:
+        # Built from the table when first asked for, then kept up to date as Articles are added.
+        if self._calendar is None:
+            self._calendar = CalendarIndex.from_counts(
+                (date.fromisoformat(day), count)
+                for day, count in self._execute('SELECT date, COUNT(*) FROM articles GROUP BY date'))
+        return self._calendar
+
+    def add_tag(self, tag: Tag):
+        self._add_tag_name(tag.tag_name)
+        self._connection.executemany('INSERT OR IGNORE INTO article_tags (tag_name, article_id) VALUES (?, ?)',
+                                     ((tag.tag_name, article.id) for article in tag.tagged_articles))
+        self._commit()
+
+    def get_tags(self) -> List[Tag]:
+        tags = {tag_name: Tag(tag_name) for tag_name in self._column('SELECT name FROM tags ORDER BY position')}
+        tagged = list(self._execute('SELECT tag_name, article_id FROM article_tags ORDER BY position'))
+        articles = self._load_articles(article_id for _, article_id in tagged)
+        for tag_name, article_id in tagged:
+            tags[tag_name].add_article(articles[article_id])
+        return list(tags.values())
+
+    def add_person(self, person: Person):
+        self._execute('INSERT OR IGNORE INTO people (name) VALUES (?)', (person.full_name,))
+        for role, articles in ((Person.DIRECTOR, person.directed_articles), (Person.ACTOR, person.starring_articles)):
+            for article in articles:
+                self._add_credit(person.full_name, article.id, role)
+        self._commit()
+
+    def get_person(self, full_name: str) -> Person:
+        if self._execute('SELECT 1 FROM people WHERE name = ?', (full_name,)).fetchone() is None:
+            return None
+
+        person = Person(full_name)
+        credits = list(self._execute('SELECT article_id, role FROM credits WHERE person_name = ? ORDER BY position',
+                                     (full_name,)))
+        articles = self._load_articles(article_id for article_id, _ in credits)
+        for article_id, role in credits:
+            if article_id in articles:
+                person.add_article(articles[article_id], role)
+        return person
+
+    def get_article_ids_for_person(self, full_name: str):
+        return self._column('SELECT DISTINCT article_id FROM credits WHERE person_name = ? ORDER BY article_id',
+                            (full_name,))
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        full_names = list(dict.fromkeys(full_names))
+        if len(full_names) == 0:
+            return list()
+        return self._column(f'SELECT article_id FROM credits WHERE person_name IN ({", ".join("?" * len(full_names))}) '
+                            f'GROUP BY article_id HAVING COUNT(DISTINCT person_name) = ? ORDER BY article_id',
+                            full_names + [len(full_names)])
+
+    def add_comment(self, comment: Comment):
+        super().add_comment(comment)
+        self._insert_comments([comment])
+        self._commit()
+
+    def add_comments(self, comments: List[Comment]):
+        super().add_comments(comments)
+        self._insert_comments(comments)
+        self._commit()
+
+    def _insert_comments(self, comments: List[Comment]):
+        rows = [(comment.user.username, comment.article.id, comment.comment, comment.timestamp.isoformat())
+                for comment in comments]
+        self._connection.executemany('INSERT INTO comments (username, article_id, comment, timestamp) '
+                                     'VALUES (?, ?, ?, ?)', rows)
+
+        # One update per Article, however many of the Comments are on it.
+        discussion = dict()
+        for _, article_id, _, timestamp in rows:
+            count, latest = discussion.get(article_id, (0, timestamp))
+            discussion[article_id] = (count + 1, max(latest, timestamp))
+        self._connection.executemany(
+            'UPDATE articles SET number_of_comments = number_of_comments + ?, '
+            'last_commented = MAX(COALESCE(last_commented, ?), ?) WHERE id = ?',
+            ((count, latest, latest, article_id) for article_id, (count, latest) in discussion.items()))
+
+    def get_comments(self):
+        article_ids = self._column('SELECT article_id FROM comments ORDER BY position')
+        articles = self._load_articles(article_ids)
+
+        # Each Article's Comments were loaded in the order they were added.
+        comments = {id: iter(article.comments) for id, article in articles.items()}
+        return [next(comments[article_id]) for article_id in article_ids]
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        # The page is read from the comments_by_user index. Each Comment is found among its Article's Comments, which
+        # are loaded in the order they were added, by the number added to that Article before it.
+        rows = self._execute(
+            'SELECT article_id, (SELECT COUNT(*) FROM comments AS earlier '
+            'WHERE earlier.article_id = comments.article_id AND earlier.position < comments.position) '
+            'FROM comments WHERE username = ? ORDER BY timestamp DESC, position DESC LIMIT ? OFFSET ?',
+            (username, -1 if limit is None else limit, cursor)).fetchall()
+        articles = self._load_articles(article_id for article_id, _ in rows)
+        return [list(articles[article_id].comments)[index] for article_id, index in rows]
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._execute('SELECT COUNT(*) FROM comments WHERE username = ?', (username,)).fetchone()[0]
+
+    def _leaderboard(self, order_by: str, where: str, limit: int = None):
+        limit = LEADERBOARD_SIZE if limit is None else min(limit, LEADERBOARD_SIZE)
+        return self._column(f'SELECT id FROM articles WHERE {where} ORDER BY {order_by}, id LIMIT ?', (limit,))
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._leaderboard('number_of_comments DESC', 'number_of_comments > 0', limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._leaderboard('last_commented DESC', 'last_commented IS NOT NULL', limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._leaderboard('rating DESC', _HAS_DETAILS, limit)
+
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        # Scores the same candidates as SimilarityIndex, the most recently added Articles sharing a person or a genre
+        # (within a year) with the Article, but on demand rather than keeping neighbour lists.
+        row = self._execute(f'SELECT year, rating FROM articles WHERE id = ? AND {_HAS_DETAILS}',
+                            (article_id,)).fetchone()
+        if row is None:
+            return list()
+        year, rating = row
+        genres = set(self._column('SELECT tag_name FROM article_tags WHERE article_id = ?', (article_id,)))
+
+        shared_people = dict(self._execute(
+            f'''SELECT article_id, SUM(weight) FROM (
+                    SELECT credited.article_id, query.weight, ROW_NUMBER() OVER (
+                        PARTITION BY query.person_name, query.role ORDER BY articles.position DESC) AS recency
+                    FROM (SELECT person_name, role, CASE role WHEN ? THEN ? ELSE 1.0 END AS weight
+                          FROM credits WHERE article_id = ?) AS query
+                    JOIN (SELECT DISTINCT person_name, article_id FROM credits) AS credited
+                        ON credited.person_name = query.person_name
+                    JOIN articles ON articles.id = credited.article_id AND {_HAS_DETAILS})
+                WHERE recency <= ? AND article_id != ? GROUP BY article_id''',
+            (Person.DIRECTOR, DIRECTOR_WEIGHT, article_id, CANDIDATES_PER_POSTING, article_id)))
+
+        genre_names = sorted(genres)
+        genre_candidates = self._column(
+            f'''SELECT DISTINCT article_id FROM (
+                    SELECT article_tags.article_id, ROW_NUMBER() OVER (
+                        PARTITION BY article_tags.tag_name, articles.year ORDER BY articles.position DESC) AS recency
+                    FROM article_tags JOIN articles ON articles.id = article_tags.article_id
+                    WHERE article_tags.tag_name IN ({", ".join("?" * len(genre_names))})
+                        AND articles.year BETWEEN ? AND ?)
+                WHERE recency <= ? AND article_id != ?''',
+            genre_names + [year - 1, year + 1, CANDIDATES_PER_POSTING, article_id])
+
+        candidates = sorted(set(shared_people).union(genre_candidates))
+        if len(candidates) == 0:
+            return list()
+
+        placeholders = ', '.join('?' * len(candidates))
+        features = {id: (candidate_year, candidate_rating) for id, candidate_year, candidate_rating in self._execute(
+            f'SELECT id, year, rating FROM articles WHERE id IN ({placeholders})', candidates)}
+        candidate_genres = {id: set() for id in candidates}
+        for id, tag_name in self._execute(f'SELECT article_id, tag_name FROM article_tags '
+                                          f'WHERE article_id IN ({placeholders})', candidates):
+            candidate_genres[id].add(tag_name)
+
+        scores = similarity_scores(
+            [len(genres & candidate_genres[id]) for id in candidates],
+            [len(genres | candidate_genres[id]) for id in candidates],
+            [shared_people.get(id, 0.0) for id in candidates],
+            [features[id][0] - year for id in candidates],
+            [features[id][1] - rating for id in candidates]
+        )
+        order = np.argsort(-scores, kind='stable')[:SIMILAR_ARTICLES]
+        return [candidates[index] for index in order.tolist()][:limit]
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        conditions, params = _stats_conditions(filters)
+        order_by = 'position'
+        if sort_by is not None:
+            _check_column(sort_by)
+            order_by = f'{sort_by} IS NULL, {sort_by} {"DESC" if descending else "ASC"}, position'
+        return self._column(f'SELECT id FROM articles WHERE {conditions} ORDER BY {order_by} LIMIT ?',
+                            params + [-1 if limit is None else limit])
+
+    def get_number_of_articles_by_stats(self, filters):
+        conditions, params = _stats_conditions(filters)
+        return self._execute(f'SELECT COUNT(*) FROM articles WHERE {conditions}', params).fetchone()[0]
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        conditions, params = _facet_conditions(selection)
+        return self._column(f'SELECT id FROM articles WHERE {conditions} ORDER BY position LIMIT ? OFFSET ?',
+                            params + [-1 if limit is None else limit, cursor])
+
+    def get_number_of_articles_for_facets(self, selection):
+        conditions, params = _facet_conditions(selection)
+        return self._execute(f'SELECT COUNT(*) FROM articles WHERE {conditions}', params).fetchone()[0]
+
+    def get_facet_counts(self, selection):
+        # As FacetIndex.counts: each facet's counts are against the other facets' choices.
+        counts = dict()
+        for facet in FacetIndex.FACETS:
+            conditions, params = _facet_conditions(selection, excluding=facet)
+            if facet == 'genre':
+                values = self._column(f'SELECT DISTINCT tag_name FROM article_tags JOIN articles '
+                                      f'ON articles.id = article_tags.article_id WHERE {_HAS_DETAILS}')
+                matching = self._execute(f'SELECT tag_name, COUNT(*) FROM article_tags JOIN articles '
+                                         f'ON articles.id = article_tags.article_id WHERE {conditions} '
+                                         f'GROUP BY tag_name', params)
+            else:
+                column = _FACET_COLUMNS[facet]
+                values = self._column(f'SELECT DISTINCT {column} FROM articles WHERE {_HAS_DETAILS}')
+                matching = self._execute(f'SELECT {column}, COUNT(*) FROM articles WHERE {conditions} '
+                                         f'GROUP BY {column}', params)
+            facet_counts = dict.fromkeys(values, 0)
+            facet_counts.update(matching)
+            counts[facet] = dict(sorted(facet_counts.items()))
+        return counts
+
+
+_FACET_COLUMNS = {'year': 'year', 'rating': 'rating_band'}
+
+
+def _check_column(name: str):
+    # Column names are written into queries, so only the known numeric columns are accepted.
+    if name not in COLUMNS:
+        raise RepositoryException(f'Unknown column {name}')
+
+
+def _stats_conditions(filters) -> Tuple[str, List]:
+    # As ColumnStore.mask: minimums are inclusive, maximums exclusive, and missing values never match.
+    conditions = [_HAS_DETAILS]
+    params = list()
+    for name, (minimum, maximum) in filters.items():
+        _check_column(name)
+        if minimum is not None:
+            conditions.append(f'{name} >= ?')
+            params.append(minimum)
+        if maximum is not None:
+            conditions.append(f'{name} < ?')
+            params.append(maximum)
+    return ' AND '.join(conditions), params
+
+
+def _facet_conditions(selection, excluding: str = None) -> Tuple[str, List]:
+    # As FacetIndex.select: any of the chosen values within a facet, and every facet other than excluding.
+    conditions = [_HAS_DETAILS]
+    params = list()
+    for facet, values in selection.items():
+        if not values or facet == excluding:
+            continue
+        if facet not in FacetIndex.FACETS:
+            raise RepositoryException(f'Unknown facet {facet}')
+        values = list(values)
+        placeholders = ', '.join('?' * len(values))
+        if facet == 'genre':
+            conditions.append(f'articles.id IN (SELECT article_id FROM article_tags WHERE tag_name IN ({placeholders}))')
+        else:
+            conditions.append(f'{_FACET_COLUMNS[facet]} IN ({placeholders})')
+        params.extend(values)
+    return ' AND '.join(conditions), params
+
+
+def _tag_query_sql(query) -> Tuple[str, List]:
+    # Compiles a parsed tag query to a SELECT of the matching Article ids, in a column named id.
+    if isinstance(query, TagTerm):
+        return 'SELECT article_id AS id FROM article_tags WHERE tag_name = ?', [query.tag_name]
+    if isinstance(query, NotQuery):
+        sql, params = _tag_query_sql(query.operand)
+        return f'SELECT id FROM articles WHERE id NOT IN ({sql})', params
+    if isinstance(query, OrQuery):
+        parts = [_tag_query_sql(operand) for operand in query.operands]
+        return (' UNION '.join(f'SELECT id FROM ({sql})' for sql, _ in parts),
+                [param for _, params in parts for param in params])
+
+    if not isinstance(query, AndQuery):
+        raise TagQueryException(f'Unexpected tag query node {type(query).__name__}')
+
+    # AND: select from the first included operand, keeping the ids in every other included operand and in none of
+    # the excluded ones.
+    included = [operand for operand in query.operands if not isinstance(operand, NotQuery)]
+    excluded = [operand.operand for operand in query.operands if isinstance(operand, NotQuery)]
+    if included:
+        sql, params = _tag_query_sql(included[0])
+        sql = f'SELECT id FROM ({sql})'
+    else:
+        sql, params = 'SELECT id FROM articles', list()
+
+    conditions = list()
+    for operands, operator in ((included[1:], 'IN'), (excluded, 'NOT IN')):
+        for operand in operands:
+            operand_sql, operand_params = _tag_query_sql(operand)
+            conditions.append(f'id {operator} ({operand_sql})')
+            params = params + operand_params
+    if conditions:
+        sql = f'{sql} WHERE {" AND ".join(conditions)}'
+    return sql, params
@@ -0,0 +1,24 @@
+import sys
+from typing import Dict
+
+
+class StringPool:
+    # Hands out one shared copy of each distinct string, so that a value repeated across many rows (a director's or an
+    # actor's name) is stored once. Strings parsed from a file, or returned by a worker process, are separate objects
+    # even when they're equal; passing them through the pool lets all but the first be freed. Counts the copies it
+    # replaced and their size.
+
+    def __init__(self):
+        self._strings: Dict[str, str] = dict()
+        self.duplicates = 0
+        self.saved_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: str) -> str:
+        shared = self._strings.setdefault(value, value)
+        if shared is not value:
+            self.duplicates += 1
+            self.saved_bytes += sys.getsizeof(value)
+        return shared
@@ -0,0 +1,270 @@
+import re
+from bisect import bisect_left
+from itertools import groupby, islice
+from typing import Callable, Dict, List, Union
+
+from movie.adapters.bitmap_index import Bitmap
+from movie.domain.model import Tag
+
+
+# A Tag whose Articles make up at least this fraction of the catalog is evaluated as a Bitmap rather than a sorted
+# list of ids, since testing membership in a bitmap is cheaper than searching a long list.
+DENSE_FRACTION = 1 / 32
+
+_TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+# An evaluated query: either sorted Article ids or a Bitmap of them.
+Postings = Union[List[int], Bitmap]
+
+
+class TagQueryException(ValueError):
+    pass
+
+
+class TagTerm:
+    def __init__(self, tag_name: str):
+        self.tag_name = tag_name
+
+    def __str__(self):
+        return f'"{self.tag_name}"' if re.search(r'[\s()"]', self.tag_name) or self.tag_name in _OPERATORS \
+            else self.tag_name
+
+
+class NotQuery:
+    def __init__(self, operand):
+        self.operand = operand
+
+    def __str__(self):
+        return f'NOT {self.operand}'
+
+
+class AndQuery:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+    def __str__(self):
+        return '(' + ' AND '.join(str(operand) for operand in self.operands) + ')'
+
+
+class OrQuery:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+    def __str__(self):
+        return '(' + ' OR '.join(str(operand) for operand in self.operands) + ')'
+
+
+def parse_tag_query(text: str):
+    # Parses a boolean tag expression, e.g. 'Sci-Fi AND Comedy NOT Horror' or '(Action OR Adventure) AND NOT Drama'.
+    # Operators are upper case; NOT binds tightest, then AND, then OR, and 'A NOT B' means 'A AND NOT B'. Tag names
+    # containing spaces or parentheses are written in double quotes.
+    tokens = list()
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise TagQueryException(f'Unexpected character at position {position}')
+        opening, closing, quoted, word = match.groups()
+        if quoted is not None:
+            tokens.append(('tag', quoted))
+        elif word is not None:
+            tokens.append(('operator', word) if word in _OPERATORS else ('tag', word))
+        else:
+            tokens.append(('bracket', opening or closing))
+        position = match.end()
+
+    if len(tokens) == 0:
+        raise TagQueryException('The query is empty')
+
+    parser = _Parser(tokens)
+    query = parser.parse_or()
+    if parser.peek() is not None:
+        raise TagQueryException(f'Unexpected {parser.peek()[1]}')
+    return query
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise TagQueryException('The query ends unexpectedly')
+        self._position += 1
+        return token
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() == ('operator', 'OR'):
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else OrQuery(operands)
+
+    def parse_and(self):
+        operands = [self.parse_unary()]
+        while self.peek() in (('operator', 'AND'), ('operator', 'NOT')):
+            if self.peek() == ('operator', 'AND'):
+                self.take()
+            operands.append(self.parse_unary())
+        return operands[0] if len(operands) == 1 else AndQuery(operands)
+
+    def parse_unary(self):
+        kind, value = self.take()
+        if (kind, value) == ('operator', 'NOT'):
+            return NotQuery(self.parse_unary())
+        if (kind, value) == ('bracket', '('):
+            query = self.parse_or()
+            if self.take() != ('bracket', ')'):
+                raise TagQueryException('Missing )')
+            return query
+        if kind == 'tag':
+            return TagTerm(value)
+        raise TagQueryException(f'Unexpected {value}')
+
+
+class TagPostings:
+    # The sorted ids of each Tag's Articles, kept in step with Tag.tagged_articles. Articles are only ever added to a
+    # Tag, so the Articles not yet indexed are those past the number already seen.
+
+    def __init__(self):
+        self._ids: Dict[str, List[int]] = dict()
+        self._bitmaps: Dict[str, Bitmap] = dict()
+
+    def postings(self, tag: Tag, number_of_articles: int) -> Postings:
+        ids = self._ids.setdefault(tag.tag_name, list())
+        if len(ids) < tag.number_of_tagged_articles:
+            ids.extend(article.id for article in islice(tag.tagged_articles, len(ids), None))
+            ids.sort()
+            self._bitmaps.pop(tag.tag_name, None)
+
+        if len(ids) < DENSE_FRACTION * number_of_articles:
+            return ids
+
+        bitmap = self._bitmaps.get(tag.tag_name)
+        if bitmap is None:
+            bitmap = self._bitmaps[tag.tag_name] = Bitmap.from_rows(ids)
+        return bitmap
+
+
+def evaluate_tag_query(query, postings: Callable[[str], Postings], universe: Callable[[], Bitmap]) -> List[int]:
+    # Returns the sorted ids of the Articles matching query. postings returns the ids for a tag name, and universe
+    # the ids of every Article (only needed for NOT at the top level or within OR).
+    return _to_ids(_Evaluator(postings, universe).evaluate(query))
+
+
+class _Evaluator:
+    def __init__(self, postings, universe):
+        self._postings = postings
+        self._make_universe = universe
+        self._universe_postings = None
+        self._terms = dict()
+
+    def _universe(self) -> Bitmap:
+        if self._universe_postings is None:
+            self._universe_postings = self._make_universe()
+        return self._universe_postings
+
+    def term(self, tag_name: str) -> Postings:
+        if tag_name not in self._terms:
+            self._terms[tag_name] = self._postings(tag_name)
+        return self._terms[tag_name]
+
+    def estimate(self, query) -> int:
+        # An upper bound on the number of matching Articles, used to evaluate the cheapest operands first.
+        if isinstance(query, TagTerm):
+            return len(self.term(query.tag_name))
+        if isinstance(query, AndQuery):
+            return min(self.estimate(operand) for operand in query.operands)
+        if isinstance(query, OrQuery):
+            return sum(self.estimate(operand) for operand in query.operands)
+        return len(self._universe())
+
+    def evaluate(self, query) -> Postings:
+        if isinstance(query, TagTerm):
+            return self.term(query.tag_name)
+        if isinstance(query, NotQuery):
+            return _difference(self._universe(), self.evaluate(query.operand))
+        if isinstance(query, OrQuery):
+            result = list()
+            for operand in sorted(query.operands, key=self.estimate):
+                result = _union(result, self.evaluate(operand))
+            return result
+        return self._evaluate_and(query)
+
+    def _evaluate_and(self, query: AndQuery) -> Postings:
+        # Intersect the included operands smallest first, stopping as soon as nothing is left, then remove the
+        # excluded ones from what remains.
+        included = sorted((operand for operand in query.operands if not isinstance(operand, NotQuery)),
+                          key=self.estimate)
+        excluded = [operand.operand for operand in query.operands if isinstance(operand, NotQuery)]
+
+        result = self.evaluate(included[0]) if included else self._universe()
+        for operand in included[1:]:
+            if len(result) == 0:
+                return result
+            result = _intersect(result, self.evaluate(operand))
+        for operand in excluded:
+            if len(result) == 0:
+                return result
+            result = _difference(result, self.evaluate(operand))
+        return result
+
+
+def _to_ids(postings: Postings) -> List[int]:
+    return list(postings.rows()) if isinstance(postings, Bitmap) else list(postings)
+
+
+def _intersect(first: Postings, second: Postings) -> Postings:
+    if isinstance(first, Bitmap) and isinstance(second, Bitmap):
+        return first & second
+    if isinstance(first, Bitmap):
+        first, second = second, first
+    if isinstance(second, Bitmap):
+        return [id for id in first if id in second]
+
+    # Search the longer list for each id of the shorter one; both are sorted, so each search starts where the last
+    # one ended.
+    shorter, longer = sorted((first, second), key=len)
+    result = list()
+    position = 0
+    for id in shorter:
+        position = bisect_left(longer, id, position)
+        if position == len(longer):
+            break
+        if longer[position] == id:
+            result.append(id)
+    return result
+
+
+def _difference(first: Postings, second: Postings) -> Postings:
+    if isinstance(first, Bitmap):
+        return first - (second if isinstance(second, Bitmap) else Bitmap.from_rows(second))
+    if isinstance(second, Bitmap):
+        return [id for id in first if id not in second]
+
+    result = list()
+    position = 0
+    for id in first:
+        position = bisect_left(second, id, position)
+        if position == len(second) or second[position] != id:
+            result.append(id)
+    return result
+
+
+def _union(first: Postings, second: Postings) -> Postings:
+    if isinstance(first, Bitmap) or isinstance(second, Bitmap):
+        first = first if isinstance(first, Bitmap) else Bitmap.from_rows(first)
+        second = second if isinstance(second, Bitmap) else Bitmap.from_rows(second)
+        return first | second
+
+    # Sorting two concatenated sorted lists is a linear merge.
+    merged = first + second
+    merged.sort()
+    return [id for id, _ in groupby(merged)]
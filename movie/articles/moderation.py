@@ -0,0 +1,51 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+from better_profanity import profanity
+from better_profanity.constants import ALLOWED_CHARACTERS
+
+
+# A word, as better_profanity splits text: a run of the characters it allows in words.
+_WORD_PATTERN = re.compile('[' + ''.join(re.escape(char) for char in sorted(ALLOWED_CHARACTERS)) + ']+')
+
+
+@lru_cache(maxsize=100000)
+def is_censored(text: str) -> bool:
+    # Whether better_profanity finds profanity in text, which is a word or a run of words.
+    return profanity.contains_profanity(text)
+
+
+def contains_profanity(texts: List[str]) -> np.ndarray:
+    # Returns a boolean array saying which texts better_profanity's contains_profanity would reject. Rather than
+    # scanning each text on its own, the words of every text, and the runs of consecutive words that could form a
+    # censored phrase, are gathered and each distinct one is checked once; the results are then combined per text.
+    next_words = profanity.MAX_NUMBER_COMBINATIONS
+    string_ids: Dict[str, int] = dict()
+    text_strings = list()
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+
+    for index, text in enumerate(texts):
+        words = list(_WORD_PATTERN.finditer(text))
+        for position, word in enumerate(words):
+            # better_profanity also matches a word followed by the next few words, both run together and with the
+            # characters between them.
+            joined = word.group()
+            candidates = [joined]
+            for next_word in words[position + 1:position + 1 + next_words]:
+                joined += next_word.group()
+                candidates.append(joined)
+                candidates.append(text[word.start():next_word.end()])
+            for candidate in candidates:
+                text_strings.append(string_ids.setdefault(candidate.lower(), len(string_ids)))
+        offsets[index + 1] = len(text_strings)
+
+    censored = np.fromiter((is_censored(string) for string in string_ids), dtype=bool, count=len(string_ids))
+    hits = np.append(censored[np.array(text_strings, dtype=np.int64)], False)
+    counts = np.diff(offsets)
+
+    # Any censored string makes its text profane. reduceat gives an empty text the next text's first result, so
+    # texts without words are masked out.
+    result = np.logical_or.reduceat(hits, offsets[:-1]) if len(texts) > 0 else np.zeros(0, dtype=bool)
+    return result & (counts > 0)
@@ -1,7 +1,7 @@
-from datetime import date
+from datetime import MAXYEAR, MINYEAR, date, timedelta
 
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import request, render_template, redirect, url_for, session, current_app, abort, jsonify
 
 from better_profanity import profanity
 from flask_wtf import FlaskForm
@@ -12,13 +12,22 @@ import movie.adapters.repository as repo
 import movie.utilities.utilities as utilities
 import movie.articles.services as services
 
+from movie.adapters.tag_query import TagQueryException
+
 from movie.authentication.authentication import login_required
+from movie.compression.compression import render_page
 
 
 # Configure Blueprint.
 news_blueprint = Blueprint(
     'news_bp', __name__)
 
+# Numeric movie fields that articles can be filtered and sorted by.
+STAT_FIELDS = ('rating', 'votes', 'revenue', 'metascore', 'runtime', 'year')
+
+# Facets that articles can be browsed by, with the type of their values. Ratings are browsed by whole-number band.
+FACET_TYPES = {'genre': str, 'year': int, 'rating': int}
+
 
 @news_blueprint.route('/articles_by_date', methods=['GET'])
 @login_required
@@ -27,13 +36,13 @@ def articles_by_date():
     target_date = request.args.get('date')
     article_to_show_comments = request.args.get('view_comments_for')
 
-    # Fetch the first and last articles in the series.
-    first_article = services.get_first_article(repo.repo_instance)
-    last_article = services.get_last_article(repo.repo_instance)
+    # Fetch the dates of the first and last articles in the series.
+    first_date = services.get_first_date(repo.repo_instance)
+    last_date = services.get_last_date(repo.repo_instance)
 
     if target_date is None:
         # No date query parameter, so return articles from day 1 of the series.
-        target_date = first_article['date']
+        target_date = first_date
     else:
         # Convert target_date from string to date.
         target_date = date.fromisoformat(target_date)
@@ -59,20 +68,21 @@ def articles_by_date():
         if previous_date is not None:
             # There are articles on a previous date, so generate URLs for the 'previous' and 'first' navigation buttons.
             prev_article_url = url_for('news_bp.articles_by_date', date=previous_date.isoformat())
-            first_article_url = url_for('news_bp.articles_by_date', date=first_article['date'].isoformat())
+            first_article_url = url_for('news_bp.articles_by_date', date=first_date.isoformat())
 
         # There are articles on a subsequent date, so generate URLs for the 'next' and 'last' navigation buttons.
         if next_date is not None:
             next_article_url = url_for('news_bp.articles_by_date', date=next_date.isoformat())
-            last_article_url = url_for('news_bp.articles_by_date', date=last_article['date'].isoformat())
+            last_article_url = url_for('news_bp.articles_by_date', date=last_date.isoformat())
 
         # Construct urls for viewing article comments and adding comments.
         for article in articles:
             article['view_comment_url'] = url_for('news_bp.articles_by_date', date=target_date, view_comments_for=article['id'])
             article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+            article['similar_articles'] = get_similar_articles_and_urls(article['id'])
 
         # Generate the webpage to display the articles.
-        return render_template(
+        return render_page(
             'articles/articles.html',
             title='Articles',
             articles_title=target_date.strftime('%A %B %e %Y'),
@@ -120,35 +130,327 @@ def articles_by_tag():
     # Retrieve the batch of articles to display on the Web page.
     articles = services.get_articles_by_id(article_ids[cursor:cursor + articles_per_page], repo.repo_instance)
 
-    first_article_url = None
-    last_article_url = None
-    next_article_url = None
-    prev_article_url = None
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_tag', cursor, articles_per_page, len(article_ids), tag=tag_name)
 
-    if cursor > 0:
-        # There are preceding articles, so generate URLs for the 'previous' and 'first' navigation buttons.
-        prev_article_url = url_for('news_bp.articles_by_tag', tag=tag_name, cursor=cursor - articles_per_page)
-        first_article_url = url_for('news_bp.articles_by_tag', tag=tag_name)
+    # Construct urls for viewing article comments and adding comments.
+    for article in articles:
+        article['view_comment_url'] = url_for('news_bp.articles_by_tag', tag=tag_name, cursor=cursor, view_comments_for=article['id'])
+        article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
 
-    if cursor + articles_per_page < len(article_ids):
-        # There are further articles, so generate URLs for the 'next' and 'last' navigation buttons.
-        next_article_url = url_for('news_bp.articles_by_tag', tag=tag_name, cursor=cursor + articles_per_page)
+    # Generate the webpage to display the articles.
+    return render_page(
+        'articles/articles.html',
+        title='Articles',
+        articles_title='Articles tagged by ' + tag_name,
+        articles=articles,
+        selected_articles=utilities.get_selected_articles(len(articles) * 2),
+        tag_urls=utilities.get_tags_and_urls(),
+        first_article_url=first_article_url,
+        last_article_url=last_article_url,
+        prev_article_url=prev_article_url,
+        next_article_url=next_article_url,
+        show_comments_for_article=article_to_show_comments
+    )
 
-        last_cursor = articles_per_page * int(len(article_ids) / articles_per_page)
-        if len(article_ids) % articles_per_page == 0:
-            last_cursor -= articles_per_page
-        last_article_url = url_for('news_bp.articles_by_tag', tag=tag_name, cursor=last_cursor)
+
+@news_blueprint.route('/articles_by_tags', methods=['GET'])
+@login_required
+def articles_by_tags():
+    articles_per_page = 3
+
+    # Read query parameters. q is a boolean tag query, e.g. 'Sci-Fi AND Comedy NOT Horror'.
+    query_text = request.args.get('q', '')
+    cursor = request.args.get('cursor')
+    article_to_show_comments = request.args.get('view_comments_for')
+
+    if article_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent article id.
+        article_to_show_comments = -1
+    else:
+        # Convert article_to_show_comments from string to int.
+        article_to_show_comments = int(article_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = int(cursor)
+
+    # Retrieve article ids for articles that match the query.
+    try:
+        article_ids = services.get_article_ids_for_tag_query(query_text, repo.repo_instance)
+        articles_title = 'Articles tagged ' + query_text
+    except TagQueryException as e:
+        article_ids = list()
+        articles_title = f'Invalid tag query: {e}'
+
+    # Retrieve the batch of articles to display on the Web page.
+    articles = services.get_articles_by_id(article_ids[cursor:cursor + articles_per_page], repo.repo_instance)
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_tags', cursor, articles_per_page, len(article_ids), q=query_text)
 
     # Construct urls for viewing article comments and adding comments.
     for article in articles:
-        article['view_comment_url'] = url_for('news_bp.articles_by_tag', tag=tag_name, cursor=cursor, view_comments_for=article['id'])
+        article['view_comment_url'] = url_for('news_bp.articles_by_tags', q=query_text, cursor=cursor, view_comments_for=article['id'])
         article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
 
     # Generate the webpage to display the articles.
-    return render_template(
+    return render_page(
         'articles/articles.html',
         title='Articles',
-        articles_title='Articles tagged by ' + tag_name,
+        articles_title=articles_title,
+        articles=articles,
+        selected_articles=utilities.get_selected_articles(len(articles) * 2),
+        tag_urls=utilities.get_tags_and_urls(),
+        first_article_url=first_article_url,
+        last_article_url=last_article_url,
+        prev_article_url=prev_article_url,
+        next_article_url=next_article_url,
+        show_comments_for_article=article_to_show_comments
+    )
+
+
+@news_blueprint.route('/articles_by_person', methods=['GET'])
+@login_required
+def articles_by_person():
+    articles_per_page = 3
+
+    # Read query parameters. person may be given several times, to find movies with all of them.
+    full_names = request.args.getlist('person')
+    cursor = request.args.get('cursor')
+    article_to_show_comments = request.args.get('view_comments_for')
+
+    if article_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent article id.
+        article_to_show_comments = -1
+    else:
+        # Convert article_to_show_comments from string to int.
+        article_to_show_comments = int(article_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = int(cursor)
+
+    # Retrieve article ids for articles about movies with everyone in full_names.
+    article_ids = services.get_article_ids_for_people(full_names, repo.repo_instance)
+
+    # Retrieve the batch of articles to display on the Web page.
+    articles = services.get_articles_by_id(article_ids[cursor:cursor + articles_per_page], repo.repo_instance)
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_person', cursor, articles_per_page, len(article_ids), person=full_names)
+
+    # Construct urls for viewing article comments and adding comments.
+    for article in articles:
+        article['view_comment_url'] = url_for('news_bp.articles_by_person', person=full_names, cursor=cursor, view_comments_for=article['id'])
+        article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
+
+    # Generate the webpage to display the articles.
+    return render_page(
+        'articles/articles.html',
+        title='Articles',
+        articles_title='Movies with ' + ' and '.join(full_names),
+        articles=articles,
+        selected_articles=utilities.get_selected_articles(len(articles) * 2),
+        tag_urls=utilities.get_tags_and_urls(),
+        first_article_url=first_article_url,
+        last_article_url=last_article_url,
+        prev_article_url=prev_article_url,
+        next_article_url=next_article_url,
+        show_comments_for_article=article_to_show_comments
+    )
+
+
+@news_blueprint.route('/articles_by_stats', methods=['GET'])
+@login_required
+def articles_by_stats():
+    articles_per_page = 3
+
+    # Read query parameters. Each numeric field may be bounded by min_<field> (inclusive) and max_<field> (exclusive),
+    # and the articles may be sorted by a field, highest first unless order is asc.
+    filters = dict()
+    for field in STAT_FIELDS:
+        minimum = request.args.get('min_' + field, type=float)
+        maximum = request.args.get('max_' + field, type=float)
+        if minimum is not None or maximum is not None:
+            filters[field] = (minimum, maximum)
+
+    sort_by = request.args.get('sort')
+    if sort_by not in STAT_FIELDS:
+        sort_by = None
+    descending = request.args.get('order') != 'asc'
+
+    cursor = request.args.get('cursor')
+    article_to_show_comments = request.args.get('view_comments_for')
+
+    if article_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent article id.
+        article_to_show_comments = -1
+    else:
+        # Convert article_to_show_comments from string to int.
+        article_to_show_comments = int(article_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int.
+        cursor = int(cursor)
+
+    # Only the articles up to the end of this page are selected (and sorted) by the repository.
+    number_of_articles = services.get_number_of_articles_by_stats(filters, repo.repo_instance)
+    article_ids = services.get_article_ids_by_stats(
+        filters, sort_by, descending, cursor + articles_per_page, repo.repo_instance)
+
+    # Retrieve the batch of articles to display on the Web page.
+    articles = services.get_articles_by_id(article_ids[cursor:cursor + articles_per_page], repo.repo_instance)
+
+    # Keep the filters and sort order in the navigation URLs.
+    query = {key: value for key, value in request.args.items() if key not in ('cursor', 'view_comments_for')}
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_stats', cursor, articles_per_page, number_of_articles, **query)
+
+    # Construct urls for viewing article comments and adding comments.
+    for article in articles:
+        article['view_comment_url'] = url_for('news_bp.articles_by_stats', cursor=cursor, view_comments_for=article['id'], **query)
+        article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
+
+    # Generate the webpage to display the articles.
+    return render_page(
+        'articles/articles.html',
+        title='Articles',
+        articles_title=describe_stats_query(filters, sort_by, descending),
+        articles=articles,
+        selected_articles=utilities.get_selected_articles(len(articles) * 2),
+        tag_urls=utilities.get_tags_and_urls(),
+        first_article_url=first_article_url,
+        last_article_url=last_article_url,
+        prev_article_url=prev_article_url,
+        next_article_url=next_article_url,
+        show_comments_for_article=article_to_show_comments
+    )
+
+
+@news_blueprint.route('/articles_by_facet', methods=['GET'])
+@login_required
+def articles_by_facet():
+    articles_per_page = 3
+
+    # Read query parameters. Each facet may be given several times, e.g. genre=Action&genre=Comedy&year=2016 selects
+    # action or comedy movies released in 2016.
+    selection = {facet: request.args.getlist(facet, type=value_type) for facet, value_type in FACET_TYPES.items()}
+    cursor = request.args.get('cursor')
+    article_to_show_comments = request.args.get('view_comments_for')
+
+    if article_to_show_comments is None:
+        # No view-comments query parameter, so set to a non-existent article id.
+        article_to_show_comments = -1
+    else:
+        # Convert article_to_show_comments from string to int.
+        article_to_show_comments = int(article_to_show_comments)
+
+    if cursor is None:
+        # No cursor query parameter, so initialise cursor to start at the beginning.
+        cursor = 0
+    else:
+        # Convert cursor from string to int; a negative cursor starts at the beginning.
+        cursor = max(int(cursor), 0)
+
+    # Retrieve the batch of articles to display on the Web page.
+    number_of_articles = services.get_number_of_articles_for_facets(selection, repo.repo_instance)
+    article_ids = services.get_article_ids_for_facets(selection, cursor, articles_per_page, repo.repo_instance)
+    articles = services.get_articles_by_id(article_ids, repo.repo_instance)
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_facet', cursor, articles_per_page, number_of_articles, **selection)
+
+    # Construct urls for viewing article comments and adding comments.
+    for article in articles:
+        article['view_comment_url'] = url_for('news_bp.articles_by_facet', cursor=cursor, view_comments_for=article['id'], **selection)
+        article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
+
+    # Generate the webpage to display the articles.
+    return render_page(
+        'articles/articles.html',
+        title='Articles',
+        articles_title=f'{number_of_articles} matching articles',
+        articles=articles,
+        facets=get_facet_panels(selection, services.get_facet_counts(selection, repo.repo_instance)),
+        selected_articles=utilities.get_selected_articles(len(articles) * 2),
+        tag_urls=utilities.get_tags_and_urls(),
+        first_article_url=first_article_url,
+        last_article_url=last_article_url,
+        prev_article_url=prev_article_url,
+        next_article_url=next_article_url,
+        show_comments_for_article=article_to_show_comments
+    )
+
+
+@news_blueprint.route('/articles_by_date_range', methods=['GET'])
+@login_required
+def articles_by_date_range():
+    articles_per_page = 3
+
+    # Read query parameters. The range runs from start to end, inclusive, or covers a whole year.
+    year = request.args.get('year', type=int)
+    try:
+        if year is not None:
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start = date.fromisoformat(request.args.get('start', ''))
+            end = date.fromisoformat(request.args.get('end', ''))
+    except ValueError:
+        abort(400)
+
+    cursor = request.args.get('cursor', 0, type=int)
+    if cursor < 0:
+        abort(400)
+    article_to_show_comments = request.args.get('view_comments_for', -1, type=int)
+
+    # Only the page is read from the repository, however wide the range.
+    articles, number_of_articles = services.get_articles_between(
+        start, end, cursor, articles_per_page, repo.repo_instance)
+
+    # Keep the range in the navigation URLs.
+    query = {key: value for key, value in request.args.items() if key not in ('cursor', 'view_comments_for')}
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_article_url, prev_article_url, next_article_url, last_article_url = get_page_urls(
+        'news_bp.articles_by_date_range', cursor, articles_per_page, number_of_articles, **query)
+
+    # Construct urls for viewing article comments and adding comments.
+    for article in articles:
+        article['view_comment_url'] = url_for('news_bp.articles_by_date_range', cursor=cursor, view_comments_for=article['id'], **query)
+        article['add_comment_url'] = url_for('news_bp.comment_on_article', article=article['id'])
+        article['similar_articles'] = get_similar_articles_and_urls(article['id'])
+
+    if year is not None:
+        articles_title = f'Movies from {year}'
+    else:
+        articles_title = f"Movies from {start.strftime('%B %e %Y')} to {end.strftime('%B %e %Y')}"
+
+    # Generate the webpage to display the articles.
+    return render_page(
+        'articles/articles.html',
+        title='Articles',
+        articles_title=f'{articles_title} ({number_of_articles})',
         articles=articles,
         selected_articles=utilities.get_selected_articles(len(articles) * 2),
         tag_urls=utilities.get_tags_and_urls(),
@@ -160,6 +462,93 @@ def articles_by_tag():
     )
 
 
+@news_blueprint.route('/archive', methods=['GET'])
+@login_required
+def archive():
+    # Read query parameters. Without a year, the years are listed; with one, its months; with a month too, its days.
+    year = request.args.get('year', type=int)
+    month = request.args.get('month', type=int) if year is not None else None
+    # A month's days are found up to the first day of the next month, so the last year a date can have is left out.
+    if year is not None and not MINYEAR <= year < MAXYEAR:
+        abort(404)
+    if month is not None and not 1 <= month <= 12:
+        abort(404)
+
+    # The counts come from the repository's calendar index, so no articles are loaded.
+    entries = services.get_archive(repo.repo_instance, year, month)
+    for entry in entries:
+        if 'date' in entry:
+            entry['label'] = entry['date'].strftime('%A %B %e %Y')
+            entry['url'] = url_for('news_bp.articles_by_date', date=entry['date'].isoformat())
+        elif 'month' in entry:
+            entry['label'] = date(entry['year'], entry['month'], 1).strftime('%B %Y')
+            entry['url'] = url_for('news_bp.archive', year=entry['year'], month=entry['month'])
+        else:
+            entry['label'] = str(entry['year'])
+            entry['url'] = url_for('news_bp.archive', year=entry['year'])
+
+    if year is None:
+        archive_title, parent_url, range_url = 'Archive', None, None
+    elif month is None:
+        archive_title, parent_url = f'Archive for {year}', url_for('news_bp.archive')
+        range_url = url_for('news_bp.articles_by_date_range', year=year)
+    else:
+        first_day = date(year, month, 1)
+        archive_title = 'Archive for ' + first_day.strftime('%B %Y')
+        parent_url = url_for('news_bp.archive', year=year)
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        range_url = url_for('news_bp.articles_by_date_range', start=first_day.isoformat(),
+                            end=(next_month - timedelta(days=1)).isoformat())
+
+    return render_template(
+        'articles/archive.html',
+        title='Archive',
+        archive_title=archive_title,
+        entries=entries,
+        parent_url=parent_url,
+        range_url=range_url,
+        tag_urls=utilities.get_tags_and_urls()
+    )
+
+
+@news_blueprint.route('/profile', methods=['GET'])
+@login_required
+def profile():
+    comments_per_page = 10
+
+    # Read query parameters. Without a user, the logged in user's profile is shown.
+    username = request.args.get('user', session['username'])
+    cursor = request.args.get('cursor', 0, type=int)
+
+    # Only the page is read from the repository's per-user index, however many comments the user has written.
+    try:
+        comments, number_of_comments = services.get_comments_for_user(
+            username, cursor, comments_per_page, repo.repo_instance)
+    except services.UnknownUserException:
+        abort(404)
+
+    # Generate URLs for the 'first', 'previous', 'next' and 'last' navigation buttons.
+    first_comment_url, prev_comment_url, next_comment_url, last_comment_url = get_page_urls(
+        'news_bp.profile', cursor, comments_per_page, number_of_comments, user=username)
+
+    # Link each comment to its article, with the article's comments shown.
+    for comment in comments:
+        comment['article_url'] = url_for('news_bp.articles_by_date', date=comment['article_date'].isoformat(),
+                                         view_comments_for=comment['article_id'])
+
+    return render_template(
+        'articles/profile.html',
+        title='Profile',
+        profile_title=f'Comments by {username} ({number_of_comments})',
+        comments=comments,
+        first_comment_url=first_comment_url,
+        last_comment_url=last_comment_url,
+        prev_comment_url=prev_comment_url,
+        next_comment_url=next_comment_url,
+        tag_urls=utilities.get_tags_and_urls()
+    )
+
+
 @news_blueprint.route('/comment', methods=['GET', 'POST'])
 @login_required
 def comment_on_article():
@@ -212,6 +601,100 @@ def comment_on_article():
     )
 
 
+def get_page_urls(endpoint, cursor, articles_per_page, number_of_articles, **args):
+    # Returns URLs for the first, previous, next and last pages of a cursor-paginated listing. URLs are None when
+    # there's no such page.
+    first_article_url = None
+    last_article_url = None
+    next_article_url = None
+    prev_article_url = None
+
+    if cursor > 0:
+        # There are preceding articles, so generate URLs for the 'previous' and 'first' navigation buttons.
+        prev_article_url = url_for(endpoint, cursor=cursor - articles_per_page, **args)
+        first_article_url = url_for(endpoint, **args)
+
+    if cursor + articles_per_page < number_of_articles:
+        # There are further articles, so generate URLs for the 'next' and 'last' navigation buttons.
+        next_article_url = url_for(endpoint, cursor=cursor + articles_per_page, **args)
+
+        last_cursor = articles_per_page * int(number_of_articles / articles_per_page)
+        if number_of_articles % articles_per_page == 0:
+            last_cursor -= articles_per_page
+        last_article_url = url_for(endpoint, cursor=last_cursor, **args)
+
+    return first_article_url, prev_article_url, next_article_url, last_article_url
+
+
+def get_similar_articles_and_urls(article_id):
+    similar_articles = services.get_similar_articles(
+        article_id, current_app.config['SIMILAR_MOVIES_COUNT'], repo.repo_instance)
+
+    for article in similar_articles:
+        article['hyperlink'] = url_for('news_bp.articles_by_date', date=article['date'].isoformat())
+    return similar_articles
+
+
+def describe_stats_query(filters, sort_by, descending):
+    # E.g. 'Articles with rating ≥ 8, runtime < 120, sorted by highest revenue'.
+    conditions = list()
+    for field, (minimum, maximum) in filters.items():
+        if minimum is not None:
+            conditions.append(f'{field} ≥ {minimum:g}')
+        if maximum is not None:
+            conditions.append(f'{field} < {maximum:g}')
+
+    description = 'Articles with ' + ', '.join(conditions) if conditions else 'All articles'
+    if sort_by is not None:
+        description += f", sorted by {'highest' if descending else 'lowest'} {sort_by}"
+    return description
+
+
+def get_facet_panels(selection, counts):
+    # Returns, for each facet, its values with their counts and a URL that toggles the value in or out of the
+    # selection. Values that would match nothing are left out unless they're selected.
+    facets = list()
+    for facet in FACET_TYPES:
+        values = list()
+        for value, count in counts[facet].items():
+            selected = value in selection[facet]
+            if count == 0 and not selected:
+                continue
+            toggled = dict(selection)
+            toggled[facet] = [other for other in selection[facet] if other != value] if selected \
+                else selection[facet] + [value]
+            values.append({
+                'label': f'{value}–{value + 1}' if facet == 'rating' else str(value),
+                'count': count,
+                'selected': selected,
+                'url': url_for('news_bp.articles_by_facet', **toggled)
+            })
+        facets.append({'name': facet.capitalize(), 'values': values})
+    return facets
+
+
+@news_blueprint.route('/comments', methods=['POST'])
+def import_comments():
+    # Adds a JSON list of comments, each with an article_id, a username, comment text and optionally a timestamp, and
+    # reports which were rejected and why. The request must carry COMMENT_IMPORT_TOKEN in COMMENT_IMPORT_HEADER; with
+    # no token configured, the endpoint is disabled.
+    config = current_app.config
+    token = config['COMMENT_IMPORT_TOKEN']
+    if not token:
+        abort(404)
+    if request.headers.get(config['COMMENT_IMPORT_HEADER']) != token:
+        abort(403)
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        abort(400)
+    if len(items) > config['COMMENT_IMPORT_MAX_ITEMS']:
+        abort(413)
+
+    number_added, errors = services.add_comments(items, repo.repo_instance)
+    return jsonify(added=number_added, errors=errors)
+
+
 class ProfanityFree:
     def __init__(self, message=None):
         if not message:
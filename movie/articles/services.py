@@ -1,6 +1,12 @@
-from typing import List, Iterable
+from datetime import datetime
+from typing import Dict, List, Iterable
 
+import numpy as np
+
+from movie.adapters.async_repository import AsyncAbstractRepository
 from movie.adapters.repository import AbstractRepository
+from movie.adapters.tag_query import parse_tag_query
+from movie.articles.moderation import contains_profanity
 from movie.domain.model import make_comment, Article, Comment, Tag
 
 
@@ -29,6 +35,74 @@ def add_comment(article_id: int, comment_text: str, username: str, repo: Abstrac
     repo.add_comment(comment)
 
 
+# The same rules as CommentForm's, applied to a batch of comments by add_comments.
+COMMENT_MIN_LENGTH = 4
+COMMENT_REQUIRED_MESSAGE = 'Your comment is required'
+COMMENT_TOO_SHORT_MESSAGE = 'Your comment is too short'
+COMMENT_PROFANITY_MESSAGE = 'Your comment must not contain profanity'
+
+
+def add_comments(items: List[Dict], repo: AbstractRepository):
+    # Adds a batch of comments, each a dict with an article_id, a username, comment text and optionally an ISO 8601
+    # timestamp, which is converted to local time if it has an offset. Every item is validated, the text rules for the
+    # whole batch at once, and each distinct User and Article is looked up once. Valid comments are added together;
+    # returns the number added and, for each invalid item, its index and the reasons it was rejected.
+    errors: Dict[int, List[str]] = dict()
+    now = datetime.now()
+
+    texts = list()
+    article_ids = list()
+    usernames = list()
+    timestamps = list()
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else dict()
+        text = item.get('comment')
+        texts.append(text.strip() if isinstance(text, str) else '')
+        username = item.get('username')
+        try:
+            article_id = int(item.get('article_id'))
+            timestamp = datetime.fromisoformat(item['timestamp']) if 'timestamp' in item else now
+            if not isinstance(username, str):
+                raise TypeError
+        except (TypeError, ValueError):
+            username, article_id, timestamp = None, None, now
+            errors.setdefault(index, list()).append('Invalid comment')
+        # Comments are timestamped in naive local time, like those made through the site.
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        usernames.append(username)
+        article_ids.append(article_id)
+        timestamps.append(timestamp)
+
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    profane = contains_profanity(texts)
+    for index in np.flatnonzero(lengths == 0).tolist():
+        errors.setdefault(index, list()).append(COMMENT_REQUIRED_MESSAGE)
+    for index in np.flatnonzero((lengths > 0) & (lengths < COMMENT_MIN_LENGTH)).tolist():
+        errors.setdefault(index, list()).append(COMMENT_TOO_SHORT_MESSAGE)
+    for index in np.flatnonzero(profane).tolist():
+        errors.setdefault(index, list()).append(COMMENT_PROFANITY_MESSAGE)
+
+    candidates = [index for index in range(len(items)) if index not in errors]
+    users = {username: repo.get_user(username) for username in {usernames[index] for index in candidates}}
+    articles = {article.id: article
+                for article in repo.get_articles_by_id(list({article_ids[index] for index in candidates}))}
+
+    comments = list()
+    for index in candidates:
+        user = users.get(usernames[index])
+        article = articles.get(article_ids[index])
+        if user is None:
+            errors.setdefault(index, list()).append('Unknown user')
+        if article is None:
+            errors.setdefault(index, list()).append('Unknown article')
+        if user is not None and article is not None:
+            comments.append(make_comment(texts[index], user, article, timestamps[index]))
+
+    repo.add_comments(comments)
+    return len(comments), [{'index': index, 'errors': messages} for index, messages in sorted(errors.items())]
+
+
 def get_article(article_id: int, repo: AbstractRepository):
     article = repo.get_article(article_id)
 
@@ -51,6 +125,26 @@ def get_last_article(repo: AbstractRepository):
     return article_to_dict(article)
 
 
+def get_first_date(repo: AbstractRepository):
+    # The date of the first article, without building the article.
+    return repo.get_calendar().first_date()
+
+
+def get_last_date(repo: AbstractRepository):
+    return repo.get_calendar().last_date()
+
+
+def get_archive(repo: AbstractRepository, year: int = None, month: int = None):
+    # Returns the number of articles in each year, or in each month of year, or on each day of year and month, read
+    # from the repository's calendar index rather than from the articles.
+    calendar = repo.get_calendar()
+    if year is None:
+        return [{'year': year, 'count': count} for year, count in calendar.years()]
+    if month is None:
+        return [{'year': year, 'month': month, 'count': count} for month, count in calendar.months(year)]
+    return [{'date': day, 'count': count} for day, count in calendar.days(year, month)]
+
+
 def get_articles_by_date(date, repo: AbstractRepository):
     # Returns articles for the target date (empty if no matches), the date of the previous article (might be null), the date of the next article (might be null)
 
@@ -60,8 +154,9 @@ def get_articles_by_date(date, repo: AbstractRepository):
     prev_date = next_date = None
 
     if len(articles) > 0:
-        prev_date = repo.get_date_of_previous_article(articles[0])
-        next_date = repo.get_date_of_next_article(articles[0])
+        calendar = repo.get_calendar()
+        prev_date = calendar.previous_date(date)
+        next_date = calendar.next_date(date)
 
         # Convert Articles to dictionary form.
         articles_dto = articles_to_dict(articles)
@@ -69,12 +164,79 @@ def get_articles_by_date(date, repo: AbstractRepository):
     return articles_dto, prev_date, next_date
 
 
+def get_articles_between(start, end, cursor: int, limit: int, repo: AbstractRepository):
+    # Returns a page of the articles published from start to end, inclusive, and the number of articles in the range.
+    articles = repo.get_articles_between(start, end, cursor, limit)
+    return articles_to_dict(articles), repo.get_number_of_articles_between(start, end)
+
+
+def get_comments_for_user(username: str, cursor: int, limit: int, repo: AbstractRepository):
+    # Returns a page of the user's comments, newest first, each with the title and date of the article it's on, and the
+    # number of comments the user has written. Raises UnknownUserException if there's no such user.
+    if repo.get_user(username) is None:
+        raise UnknownUserException
+
+    comments = repo.get_comments_for_user(username, cursor, limit)
+    page = comments_to_dict(comments)
+    for comment_dict, comment in zip(page, comments):
+        comment_dict['article_title'] = comment.article.title
+        comment_dict['article_date'] = comment.article.date
+    return page, repo.get_number_of_comments_for_user(username)
+
+
 def get_article_ids_for_tag(tag_name, repo: AbstractRepository):
     article_ids = repo.get_article_ids_for_tag(tag_name)
 
     return article_ids
 
 
+def get_article_ids_for_tag_query(query_text, repo: AbstractRepository):
+    # Raises TagQueryException if query_text isn't a valid tag query.
+    article_ids = repo.get_article_ids_for_tag_query(parse_tag_query(query_text))
+
+    return article_ids
+
+
+def get_article_ids_for_people(full_names, repo: AbstractRepository):
+    # Articles about movies that every one of full_names directed or starred in.
+    if len(full_names) == 1:
+        article_ids = repo.get_article_ids_for_person(full_names[0])
+    else:
+        article_ids = repo.get_article_ids_for_people(full_names)
+
+    return article_ids
+
+
+def get_similar_articles(article_id, limit, repo: AbstractRepository):
+    article_ids = repo.get_similar_article_ids(article_id, limit)
+
+    return article_links_to_dict(repo.get_articles_by_id(article_ids))
+
+
+def get_article_ids_by_stats(filters, sort_by, descending, limit, repo: AbstractRepository):
+    article_ids = repo.get_article_ids_by_stats(filters, sort_by, descending, limit)
+
+    return article_ids
+
+
+def get_number_of_articles_by_stats(filters, repo: AbstractRepository):
+    return repo.get_number_of_articles_by_stats(filters)
+
+
+def get_article_ids_for_facets(selection, cursor, limit, repo: AbstractRepository):
+    article_ids = repo.get_article_ids_for_facets(selection, cursor, limit)
+
+    return article_ids
+
+
+def get_number_of_articles_for_facets(selection, repo: AbstractRepository):
+    return repo.get_number_of_articles_for_facets(selection)
+
+
+def get_facet_counts(selection, repo: AbstractRepository):
+    return repo.get_facet_counts(selection)
+
+
 def get_articles_by_id(id_list, repo: AbstractRepository):
     articles = repo.get_articles_by_id(id_list)
 
@@ -93,6 +255,111 @@ def get_comments_for_article(article_id, repo: AbstractRepository):
     return comments_to_dict(article.comments)
 
 
+# ====================================================================
+# Async variants of the functions above, for an AsyncAbstractRepository
+# ====================================================================
+
+async def add_comment_async(article_id: int, comment_text: str, username: str, repo: AsyncAbstractRepository):
+    article = await repo.get_article(article_id)
+    if article is None:
+        raise NonExistentArticleException
+
+    user = await repo.get_user(username)
+    if user is None:
+        raise UnknownUserException
+
+    comment = make_comment(comment_text, user, article)
+    await repo.add_comment(comment)
+
+
+async def get_article_async(article_id: int, repo: AsyncAbstractRepository):
+    article = await repo.get_article(article_id)
+    if article is None:
+        raise NonExistentArticleException
+
+    return article_to_dict(article)
+
+
+async def get_first_article_async(repo: AsyncAbstractRepository):
+    return article_to_dict(await repo.get_first_article())
+
+
+async def get_last_article_async(repo: AsyncAbstractRepository):
+    return article_to_dict(await repo.get_last_article())
+
+
+async def get_articles_by_date_async(date, repo: AsyncAbstractRepository):
+    articles = await repo.get_articles_by_date(target_date=date)
+
+    articles_dto = list()
+    prev_date = next_date = None
+
+    if len(articles) > 0:
+        calendar = await repo.get_calendar()
+        prev_date = calendar.previous_date(date)
+        next_date = calendar.next_date(date)
+        articles_dto = articles_to_dict(articles)
+
+    return articles_dto, prev_date, next_date
+
+
+async def get_articles_between_async(start, end, cursor: int, limit: int, repo: AsyncAbstractRepository):
+    articles = await repo.get_articles_between(start, end, cursor, limit)
+    return articles_to_dict(articles), await repo.get_number_of_articles_between(start, end)
+
+
+async def get_article_ids_for_tag_async(tag_name, repo: AsyncAbstractRepository):
+    return await repo.get_article_ids_for_tag(tag_name)
+
+
+async def get_article_ids_for_tag_query_async(query_text, repo: AsyncAbstractRepository):
+    return await repo.get_article_ids_for_tag_query(parse_tag_query(query_text))
+
+
+async def get_article_ids_for_people_async(full_names, repo: AsyncAbstractRepository):
+    if len(full_names) == 1:
+        return await repo.get_article_ids_for_person(full_names[0])
+    return await repo.get_article_ids_for_people(full_names)
+
+
+async def get_similar_articles_async(article_id, limit, repo: AsyncAbstractRepository):
+    article_ids = await repo.get_similar_article_ids(article_id, limit)
+
+    return article_links_to_dict(await repo.get_articles_by_id(article_ids))
+
+
+async def get_article_ids_by_stats_async(filters, sort_by, descending, limit, repo: AsyncAbstractRepository):
+    return await repo.get_article_ids_by_stats(filters, sort_by, descending, limit)
+
+
+async def get_number_of_articles_by_stats_async(filters, repo: AsyncAbstractRepository):
+    return await repo.get_number_of_articles_by_stats(filters)
+
+
+async def get_article_ids_for_facets_async(selection, cursor, limit, repo: AsyncAbstractRepository):
+    return await repo.get_article_ids_for_facets(selection, cursor, limit)
+
+
+async def get_number_of_articles_for_facets_async(selection, repo: AsyncAbstractRepository):
+    return await repo.get_number_of_articles_for_facets(selection)
+
+
+async def get_facet_counts_async(selection, repo: AsyncAbstractRepository):
+    return await repo.get_facet_counts(selection)
+
+
+async def get_articles_by_id_async(id_list, repo: AsyncAbstractRepository):
+    return articles_to_dict(await repo.get_articles_by_id(id_list))
+
+
+async def get_comments_for_article_async(article_id, repo: AsyncAbstractRepository):
+    article = await repo.get_article(article_id)
+    if article is None:
+        raise NonExistentArticleException
+
+    return comments_to_dict(article.comments)
+
+
 # ============================================
 # Functions to convert model entities to dicts
 # ============================================
@@ -106,8 +373,12 @@ def article_to_dict(article: Article):
         'hyperlink': article.hyperlink,
         'image_hyperlink': article.image_hyperlink,
         'comments': comments_to_dict(article.comments),
-        'tags': tags_to_dict(article.tags)
+        'tags': tags_to_dict(article.tags),
+        'director': article.details.director if article.details is not None else None,
+        'actors': article.details.actor_names if article.details is not None else list()
     }
+    # Comments and Tags are only ever added to an Article, so their numbers change whenever what's shown about it does.
+    article_dict['version'] = (article.number_of_comments, len(article_dict['tags']))
     return article_dict
 
 
@@ -115,6 +386,20 @@ def articles_to_dict(articles: Iterable[Article]):
     return [article_to_dict(article) for article in articles]
 
 
+def article_link_to_dict(article: Article):
+    # Just enough to link to an Article, e.g. from another Article's list of similar movies.
+    article_dict = {
+        'id': article.id,
+        'title': article.title,
+        'date': article.date
+    }
+    return article_dict
+
+
+def article_links_to_dict(articles: Iterable[Article]):
+    return [article_link_to_dict(article) for article in articles]
+
+
 def comment_to_dict(comment: Comment):
     comment_dict = {
         'username': comment.user.username,
@@ -0,0 +1,66 @@
+import mimetypes
+import os
+
+import click
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+
+from movie.assets.build import ENCODING_EXTENSIONS, build_assets, load_manifest
+
+
+# Built asset names change whenever their content does, so browsers and proxies can keep them for good.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+# Configure Blueprint.
+assets_blueprint = Blueprint(
+    'assets_bp', __name__, url_prefix='/assets')
+
+
+@assets_blueprint.route('/<path:filename>', methods=['GET'])
+def asset(filename):
+    encodings = current_app.extensions['assets']['encodings'].get(filename)
+    if encodings is None:
+        abort(404)
+
+    # Send the best precompressed variant the client accepts, if there is one.
+    encoding = next((encoding for encoding in encodings if request.accept_encodings[encoding] > 0), None)
+    sent_filename = filename if encoding is None else filename + ENCODING_EXTENSIONS[encoding]
+    response = send_from_directory(current_app.config['ASSETS_DIR'], sent_filename,
+                                   mimetype=mimetypes.guess_type(filename)[0])
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def asset_url(filename: str) -> str:
+    # The URL of a built static asset, or of the static file itself when assets haven't been built.
+    assets = current_app.extensions.get('assets')
+    if assets is not None and filename in assets['manifest']:
+        return url_for('assets_bp.asset', filename=assets['manifest'][filename]['file'])
+    return url_for('static', filename=filename)
+
+
+def init_assets(app, enabled: bool):
+    # Makes asset_url available to templates and adds the build-assets command. When enabled, assets are served from
+    # ASSETS_DIR, and are built there first if that hasn't been done already.
+    app.add_template_global(asset_url)
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Build fingerprinted, precompressed static assets."""
+        manifest = build_assets(app.static_folder, app.config['ASSETS_DIR'])
+        click.echo(f"Built {len(manifest)} assets in {app.config['ASSETS_DIR']}")
+
+    if enabled:
+        output_dir = app.config['ASSETS_DIR']
+        manifest = load_manifest(output_dir)
+        if manifest is None:
+            os.makedirs(output_dir, exist_ok=True)
+            manifest = build_assets(app.static_folder, output_dir)
+        app.extensions['assets'] = {
+            'manifest': manifest,
+            'encodings': {entry['file']: entry['encodings'] for entry in manifest.values()}
+        }
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli, assets are only precompressed with gzip.
+    brotli = None
+
+
+MANIFEST_FILENAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Images such as PNGs are already compressed, so only text formats (and icons, which usually aren't) are compressed.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.json')
+
+# File extensions of the precompressed variants, by content coding.
+ENCODING_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def build_assets(static_dir: str, output_dir: str) -> Dict[str, dict]:
+    # Copies every file in static_dir to output_dir under a name that includes a hash of its content, e.g.
+    # css/main.css becomes css/main.3f2a9c01d2b4.css, and writes gzip and brotli compressed variants beside the
+    # compressible ones. Returns the manifest, which maps each original name to its built name and the content codings
+    # it's available in, and writes it to output_dir/manifest.json.
+    manifest = dict()
+    for directory, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            with open(path, 'rb') as infile:
+                content = infile.read()
+
+            stem, extension = os.path.splitext(name)
+            built_name = f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{extension}'
+            _write(output_dir, built_name, content)
+
+            encodings = list()
+            if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+                for encoding, compressed in compress(content).items():
+                    # A variant that isn't smaller than the original isn't worth sending.
+                    if len(compressed) < len(content):
+                        _write(output_dir, built_name + ENCODING_EXTENSIONS[encoding], compressed)
+                        encodings.append(encoding)
+
+            manifest[name] = {'file': built_name, 'encodings': encodings}
+
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w') as outfile:
+        json.dump(manifest, outfile, indent=2, sort_keys=True)
+    return manifest
+
+
+def compress(content: bytes) -> Dict[str, bytes]:
+    # The content compressed with each available content coding, best first.
+    compressed = dict()
+    if brotli is not None:
+        compressed['br'] = brotli.compress(content, quality=11)
+    compressed['gzip'] = gzip.compress(content, compresslevel=9, mtime=0)
+    return compressed
+
+
+def load_manifest(output_dir: str) -> Dict[str, dict]:
+    # Returns the manifest written by build_assets, or None if the assets haven't been built.
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILENAME)) as infile:
+            return json.load(infile)
+    except FileNotFoundError:
+        return None
+
+
+def _write(output_dir: str, name: str, content: bytes):
+    path = os.path.join(output_dir, *name.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as outfile:
+        outfile.write(content)
@@ -1,5 +1,8 @@
+import asyncio
+
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from movie.adapters.async_repository import AsyncAbstractRepository
 from movie.adapters.repository import AbstractRepository
 from movie.domain.model import User
 
@@ -48,6 +51,41 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
         raise AuthenticationException
 
 
+# ====================================================================
+# Async variants of the functions above, for an AsyncAbstractRepository
+# ====================================================================
+
+async def add_user_async(username: str, password: str, repo: AsyncAbstractRepository):
+    user = await repo.get_user(username)
+    if user is not None:
+        raise NameNotUniqueException
+
+    # Hashing is deliberately slow, so it runs on the loop's default executor rather than blocking the loop.
+    password_hash = await asyncio.get_running_loop().run_in_executor(None, generate_password_hash, password)
+
+    user = User(username, password_hash)
+    await repo.add_user(user)
+
+
+async def get_user_async(username: str, repo: AsyncAbstractRepository):
+    user = await repo.get_user(username)
+    if user is None:
+        raise UnknownUserException
+
+    return user_to_dict(user)
+
+
+async def authenticate_user_async(username: str, password: str, repo: AsyncAbstractRepository):
+    authenticated = False
+
+    user = await repo.get_user(username)
+    if user is not None:
+        authenticated = await asyncio.get_running_loop().run_in_executor(
+            None, check_password_hash, user.password, password)
+    if not authenticated:
+        raise AuthenticationException
+
+
 # ===================================================
 # Functions to convert model entities to dictionaries
 # ===================================================
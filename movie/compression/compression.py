@@ -0,0 +1,66 @@
+import gzip
+import zlib
+
+from flask import Response, current_app, render_template, request, stream_with_context
+
+
+# Compressing responses of other types (e.g. images) saves little or nothing.
+COMPRESSIBLE_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'text/csv', 'application/json', 'application/javascript')
+
+
+def stream_template(template_name: str, **context) -> Response:
+    # Renders a template as it's sent, so the start of the page reaches the client before the rest is rendered. The
+    # output is sent in chunks of STREAM_BUFFER_SIZE template pieces rather than piece by piece.
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(app.config['STREAM_BUFFER_SIZE'])
+    return Response(stream_with_context(stream))
+
+
+def render_page(template_name: str, **context):
+    # Renders a page, streaming it when STREAM_TEMPLATES is enabled.
+    if current_app.config['STREAM_TEMPLATES']:
+        return stream_template(template_name, **context)
+    return render_template(template_name, **context)
+
+
+def compress_stream(chunks, level: int):
+    # Compresses a streamed body chunk by chunk. Each chunk is flushed so the client can decompress what it has
+    # received so far without waiting for the end of the response.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def init_compression(app):
+    # Gzips text responses for clients that accept it. Buffered responses are only compressed when they're at least
+    # COMPRESSION_MIN_SIZE bytes; streamed responses, whose size isn't known in advance, always are.
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+    level = app.config['COMPRESSION_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 304) or response.direct_passthrough or
+                'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip'] <= 0:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
@@ -0,0 +1,74 @@
+import json
+
+import click
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+import movie.adapters.repository as repo
+from movie.adapters.budgeted_repository import MemoryBudget, MemoryBudgetExceeded
+from movie.diagnostics.memory import memory_report
+
+
+# Requests that are POSTed but don't store anything.
+READ_ONLY_ENDPOINTS = {'authentication_bp.login'}
+
+
+# Configure Blueprint.
+diagnostics_blueprint = Blueprint(
+    'diagnostics_bp', __name__, url_prefix='/diagnostics')
+
+
+@diagnostics_blueprint.route('/memory', methods=['GET'])
+def memory():
+    # Reports how the repository's memory is used, e.g. /diagnostics/memory?allocators=50. The request must carry
+    # DIAGNOSTICS_TOKEN in DIAGNOSTICS_HEADER; with no token configured, the endpoint is disabled.
+    config = current_app.config
+    token = config['DIAGNOSTICS_TOKEN']
+    if not token:
+        abort(404)
+    if request.headers.get(config['DIAGNOSTICS_HEADER']) != token:
+        abort(403)
+
+    allocators = request.args.get('allocators', 20, type=int)
+    diagnostics = current_app.extensions['diagnostics']
+    return jsonify(memory_report(repo.repo_instance, diagnostics['caches'], diagnostics['budget'], allocators))
+
+
+def init_diagnostics(app, caches=None, budget: MemoryBudget = None):
+    # Adds the memory-report command, and answers writes rejected by the memory budget with 503 Service Unavailable.
+    # caches, by name, are reported beside the repository's structures.
+    app.extensions['diagnostics'] = {'caches': caches or dict(), 'budget': budget}
+
+    if budget is not None and budget.reject_writes:
+        @app.before_request
+        def check_budget():
+            # Domain objects are linked (e.g. a Comment to its Article) before they're added to the repository, so
+            # writing requests are turned away before their views run, not only when they reach the repository.
+            if request.method not in ('GET', 'HEAD', 'OPTIONS') and request.endpoint not in READ_ONLY_ENDPOINTS:
+                budget.check()
+
+    @app.errorhandler(MemoryBudgetExceeded)
+    def reject_write(error):
+        return Response('The server is out of memory for new data; please try again later.', status=503,
+                        mimetype='text/plain')
+
+    @app.cli.command('memory-report')
+    @click.option('--allocators', type=int, default=20, show_default=True, help='Number of top allocators to list.')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON.')
+    def memory_report_command(allocators, as_json):
+        """Report the memory used by the repository's entities, indexes and caches."""
+        report = memory_report(repo.repo_instance, caches, budget, allocators)
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+            return
+
+        for name, structure in report['structures'].items():
+            click.echo(f"{name:<30} {structure['entities']:>10} entities {structure['objects']:>12} objects "
+                       f"{structure['bytes'] / 2 ** 20:>10.2f} MiB")
+        if report['traced_bytes'] is not None:
+            click.echo(f"\nTraced since startup: {report['traced_bytes'] / 2 ** 20:.2f} MiB")
+            for allocator in report['top_allocators']:
+                click.echo(f"{allocator['bytes'] / 2 ** 20:>10.2f} MiB {allocator['blocks']:>10} blocks  "
+                           f"{allocator['location']}")
+        if 'budget' in report:
+            click.echo(f"\nIn use: {report['budget']['used_bytes'] / 2 ** 20:.2f} MiB of a "
+                       f"{report['budget']['limit_bytes'] / 2 ** 20:.0f} MiB budget")
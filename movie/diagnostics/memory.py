@@ -0,0 +1,124 @@
+import gc
+import sys
+import tracemalloc
+from types import FunctionType, ModuleType
+from typing import Dict, List
+
+from movie.adapters.budgeted_repository import MemoryBudget
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import Article, Comment, MovieDetails, Person, Tag, User
+
+
+DOMAIN_TYPES = (Article, MovieDetails, Comment, Person, Tag, User)
+
+# The MemoryRepository attributes that hold the entities themselves, with the types each one owns, in the order they're
+# measured. Every other attribute is an index, which owns none of the entities it refers to.
+ENTITY_STRUCTURES = [
+    ('articles', '_articles', (Article, MovieDetails)),
+    ('tags', '_tags', (Tag,)),
+    ('people', '_people', (Person,)),
+    ('users', '_users', (User,)),
+    ('comments', '_comments', (Comment,))
+]
+
+
+def deep_size(root, seen: set, own_types=()) -> Dict[str, int]:
+    # The number of objects reachable from root, the number of those that are of the first of own_types (e.g. Articles,
+    # but not their MovieDetails), and their total size in bytes. Domain objects of other types belong to other
+    # structures, so the walk stops at them; objects whose ids are in seen have been counted already. Classes, modules
+    # and functions are never counted. The ids of the objects counted are added to seen.
+    objects = entities = size = 0
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+            continue
+        if isinstance(obj, DOMAIN_TYPES) and not isinstance(obj, own_types):
+            continue
+        seen.add(id(obj))
+        objects += 1
+        size += sys.getsizeof(obj)
+        if own_types and isinstance(obj, own_types[0]):
+            entities += 1
+        pending.extend(gc.get_referents(obj))
+    return {'entities': entities, 'objects': objects, 'bytes': size}
+
+
+def unwrap(repo: AbstractRepository) -> AbstractRepository:
+    # The repository at the bottom of a stack of wrappers (caching, metrics, memory budget).
+    while hasattr(repo, 'wrapped'):
+        repo = repo.wrapped
+    return repo
+
+
+def repository_memory(repo: AbstractRepository, caches: Dict[str, object] = None) -> Dict[str, Dict[str, int]]:
+    # How the repository's memory splits between its entities (Articles with their text and details, Tags and their
+    # lists of Articles, people, users and comments), each of its indexes, and caches, which are given by name. Each
+    # object is counted once, in the first structure it's reachable from; indexes and caches are measured after the
+    # entities, so they're charged only for what they add. Walks every object, so it takes a while on a large catalog.
+    repo = unwrap(repo)
+    structures = vars(repo)
+    seen = set()
+    report = dict()
+
+    for name, attribute, own_types in ENTITY_STRUCTURES:
+        if attribute in structures:
+            report[name] = deep_size(structures[attribute], seen, own_types)
+
+    entity_attributes = set(attribute for _, attribute, _ in ENTITY_STRUCTURES)
+    for attribute, value in structures.items():
+        # Settings and flags aren't structures.
+        if attribute not in entity_attributes and not isinstance(value, (bool, int, float, str, type(None))):
+            report[f"index.{attribute.lstrip('_')}"] = deep_size(value, seen)
+
+    for name, cache in (caches or dict()).items():
+        report[f'cache.{name}'] = deep_size(cache, seen)
+
+    report['total'] = {
+        field: sum(structure[field] for structure in report.values()) for field in ('entities', 'objects', 'bytes')
+    }
+    return report
+
+
+def start_tracing(frames: int = 1):
+    # Traces allocations from now on, so that top_allocators can report where the memory in use was allocated.
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def top_allocators(limit: int = 20) -> List[Dict]:
+    # The source lines that allocated the most memory still in use since tracing started, largest first, or nothing
+    # when allocations aren't being traced.
+    if not tracemalloc.is_tracing():
+        return list()
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')
+    ])
+    return [{
+        'location': f'{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}',
+        'bytes': statistic.size,
+        'blocks': statistic.count
+    } for statistic in snapshot.statistics('lineno')[:limit]]
+
+
+def memory_report(repo: AbstractRepository, caches: Dict[str, object] = None, budget: MemoryBudget = None,
+                  allocators: int = 20) -> Dict:
+    # Everything the diagnostics endpoint and command report: the repository's structures, the top allocators and the
+    # memory budget, if there is one.
+    report = {
+        'structures': repository_memory(repo, caches),
+        'traced_bytes': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        'top_allocators': top_allocators(allocators)
+    }
+    if budget is not None:
+        used_bytes = budget.used_bytes()
+        report['budget'] = {
+            'limit_bytes': budget.limit_bytes,
+            'used_bytes': used_bytes,
+            'exceeded': used_bytes > budget.limit_bytes,
+            'reject_writes': budget.reject_writes
+        }
+    return report
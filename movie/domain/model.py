@@ -1,6 +1,12 @@
+import math
 from datetime import date, datetime
 from typing import List, Iterable
 
+from movie.domain.narrative import first_para_cache, render_first_para
+
+
+IMDB_SEARCH_URL = "https://www.imdb.com/find?q="
+
 
 class User:
     def __init__(
@@ -65,14 +71,93 @@ class Comment:
         return other._user == self._user and other._article == self._article and other._comment == self._comment and other._timestamp == self._timestamp
 
 
+class MovieDetails:
+    # The catalog fields an Article's narrative text is rendered from. Slots keep one instance per movie small.
+    __slots__ = ('_name', '_year', '_plot', '_director', '_actors', '_rating', '_metascore', '_runtime', '_revenue',
+                 '_votes')
+
+    def __init__(
+            self, name: str, year: int, plot: str, director: str, actors: str, rating: float, metascore: int,
+            runtime: int, revenue: float, votes: int = None
+    ):
+        self._name: str = name
+        self._year: int = year
+        self._plot: str = plot
+        self._director: str = director
+        self._actors: str = actors
+        self._rating: float = rating
+        self._metascore: int = metascore
+        self._runtime: int = runtime
+        self._revenue: float = revenue
+        self._votes: int = votes
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def year(self) -> int:
+        return self._year
+
+    @property
+    def plot(self) -> str:
+        return self._plot
+
+    @property
+    def director(self) -> str:
+        return self._director
+
+    @property
+    def actors(self) -> str:
+        # As in the source column, which the narrative text quotes.
+        return self._actors
+
+    @property
+    def actor_names(self) -> List[str]:
+        # The actors column lists names separated by commas.
+        return [name.strip() for name in self._actors.split(',') if name.strip()]
+
+    def share_names(self, intern):
+        # Replaces the director's name and the actors column with the copies intern returns for them (e.g.
+        # StringPool.intern), so that each is stored once however many movies it's credited on.
+        self._director = intern(self._director)
+        self._actors = intern(self._actors)
+
+    @property
+    def rating(self) -> float:
+        return self._rating
+
+    @property
+    def metascore(self) -> int:
+        return self._metascore
+
+    @property
+    def runtime(self) -> int:
+        return self._runtime
+
+    @property
+    def revenue(self) -> float:
+        return self._revenue
+
+    @property
+    def votes(self) -> int:
+        return self._votes
+
+
 class Article:
+    # Slots keep the per-Article overhead small in large catalogs.
+    __slots__ = ('_id', '_date', '_title', '_first_para', '_hyperlink', '_image_hyperlink', '_details', '_comments',
+                 '_tags')
+
     def __init__(
-            self, date: date, title: str, first_para: str, hyperlink: str, image_hyperlink: str, id: int = None
+            self, date: date, title: str, first_para: str, hyperlink: str, image_hyperlink: str, id: int = None,
+            details: MovieDetails = None
     ):
         self._id: int = id
         self._date: date = date
         self._title: str = title
         self._first_para: str = first_para
+        self._details: MovieDetails = details
         self._hyperlink: str = hyperlink
         self._image_hyperlink: str = image_hyperlink
         self._comments: List[Comment] = list()
@@ -88,14 +173,27 @@ class Article:
 
     @property
     def title(self) -> str:
+        if self._title is None and self._details is not None:
+            details = self._details
+            return f'{details.name} ({details.year})    -   {math.floor(details.rating)}/10'
         return self._title
 
     @property
     def first_para(self) -> str:
+        # Articles created from MovieDetails render their text when it's read rather than storing it.
+        if self._first_para is None and self._details is not None:
+            return first_para_cache.get(self._details, lambda: render_first_para(self._details))
         return self._first_para
 
+    @property
+    def details(self) -> MovieDetails:
+        return self._details
+
     @property
     def hyperlink(self) -> str:
+        # Articles created from MovieDetails link to an IMDb search for the movie, built when it's read.
+        if self._hyperlink is None and self._details is not None:
+            return imdb_search_url(self._details.name)
         return self._hyperlink
 
     @property
@@ -131,17 +229,17 @@ class Article:
         self._tags.append(tag)
 
     def __repr__(self):
-        return f'<Article {self._date.isoformat()} {self._title}>'
+        return f'<Article {self._date.isoformat()} {self.title}>'
 
     def __eq__(self, other):
         if not isinstance(other, Article):
             return False
         return (
                 other._date == self._date and
-                other._title == self._title and
-                other._first_para == self._first_para and
-                other._hyperlink == self._hyperlink and
-                other._image_hyperlink == self._image_hyperlink
+                other.title == self.title and
+                other.hyperlink == self.hyperlink and
+                other._image_hyperlink == self._image_hyperlink and
+                other.first_para == self.first_para
         )
 
     def __lt__(self, other):
@@ -179,10 +277,60 @@ class Tag:
         return other._tag_name == self._tag_name
 
 
+class Person:
+    # A director or actor, and the Articles about the movies they directed or starred in.
+
+    DIRECTOR = 'director'
+    ACTOR = 'actor'
+
+    def __init__(
+            self, full_name: str
+    ):
+        self._full_name: str = full_name
+        self._directed_articles: List[Article] = list()
+        self._starring_articles: List[Article] = list()
+
+    @property
+    def full_name(self) -> str:
+        return self._full_name
+
+    @property
+    def directed_articles(self) -> Iterable[Article]:
+        return iter(self._directed_articles)
+
+    @property
+    def starring_articles(self) -> Iterable[Article]:
+        return iter(self._starring_articles)
+
+    @property
+    def number_of_articles(self) -> int:
+        return len(self._directed_articles) + len(self._starring_articles)
+
+    def add_article(self, article: Article, role: str):
+        if role == Person.DIRECTOR:
+            self._directed_articles.append(article)
+        elif role == Person.ACTOR:
+            self._starring_articles.append(article)
+        else:
+            raise ModelException(f'Unknown role {role}')
+
+    def __repr__(self) -> str:
+        return f'<Person {self._full_name}>'
+
+    def __eq__(self, other):
+        if not isinstance(other, Person):
+            return False
+        return other._full_name == self._full_name
+
+
 class ModelException(Exception):
     pass
 
 
+def imdb_search_url(title: str) -> str:
+    return IMDB_SEARCH_URL + "+".join(title.split(" ")) + "+&ref_=nv_sr_sm"
+
+
 def make_comment(comment_text: str, user: User, article: Article, timestamp: datetime = datetime.today()):
     comment = Comment(user, article, comment_text, timestamp)
     user.add_comment(comment)
@@ -192,7 +340,8 @@ def make_comment(comment_text: str, user: User, article: Article, timestamp: dat
 
 
 def make_tag_association(article: Article, tag: Tag):
-    if tag.is_applied_to(article):
+    # Check the Article's few Tags rather than the Tag's potentially very long list of Articles.
+    if article.is_tagged_by(tag):
         raise ModelException(f'Tag {tag.tag_name} already applied to Article "{article.title}"')
 
     article.add_tag(tag)
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+def format_number(value: float) -> str:
+    # Numbers are written as they appear in the catalog, e.g. 43 rather than 43.0.
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def describe_rating(rating: float) -> str:
+    if rating < 5:
+        return ". This terrible movie is directed by "
+    elif rating < 7:
+        return ". This average movie is directed by "
+    elif rating < 9:
+        return ". This great movie is directed by "
+    elif rating <= 10:
+        return ". This amazing movie is directed by "
+    return ""
+
+
+def describe_metascore(metascore: int) -> str:
+    if metascore is None:
+        return ""
+
+    if metascore < 50:
+        return f" With a shockingly low Metascore of {metascore} this movie straight up stinks!"
+    elif metascore < 70:
+        return f" With a somewhat decent Metascore of {metascore} this movie is watchable."
+    elif metascore < 90:
+        return f" With a awesome Metascore of {metascore} this movie is a must recommend."
+    elif metascore <= 100:
+        return f" With an almost perfect Metascore of  {metascore} this movie is a no brainer."
+    return ""
+
+
+def describe_running_time(running_time: int) -> str:
+    if running_time < 90:
+        return f" With a less than average running time of {running_time} minutes, this movie won't take long too watch."
+    elif running_time < 120:
+        return f" With an average running time of {running_time} minutes, this movie will be as long as most."
+    return f" With a longer than average running time of {running_time} minutes, this movie needs more of your time " \
+           f"so make sure you schedule some time in!"
+
+
+def describe_revenue(name: str, revenue: float) -> str:
+    if revenue is None:
+        return " Enjoy!.... or not"
+    return f" Showing why {name} made ${format_number(revenue)} million dollars!"
+
+
+def render_first_para(details) -> str:
+    # Builds an Article's narrative text from its MovieDetails.
+    return "".join((
+        details.name, " came out last year in ", str(details.year), ". Starring ", details.actors,
+        describe_rating(details.rating), details.director, " as shown by the following plot: ", details.plot,
+        describe_metascore(details.metascore), describe_running_time(details.runtime),
+        describe_revenue(details.name, details.revenue)
+    ))
+
+
+class RenderedTextCache:
+    # A bounded, thread-safe LRU of rendered text. With a max_size of 0, text is rendered on every access and nothing
+    # is retained.
+
+    def __init__(self, max_size: int = 0):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def resize(self, max_size: int):
+        with self._lock:
+            self._max_size = max_size
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def get(self, key, render) -> str:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+
+        text = render()
+        if self._max_size > 0:
+            with self._lock:
+                self._entries[key] = text
+                if len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+        return text
+
+
+# Shared by every Article whose narrative is rendered from MovieDetails. Sized by create_app().
+first_para_cache = RenderedTextCache()
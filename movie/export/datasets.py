@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from movie.adapters.repository import AbstractRepository
+from movie.compression.compression import compress_stream
+
+
+# Articles are read from the repository a page at a time, and CSV rows are written out in chunks.
+ARTICLES_PER_PAGE = 1000
+ROWS_PER_CHUNK = 500
+
+ARTICLE_FIELDS = ['id', 'date', 'name', 'year', 'genres', 'director', 'actors', 'runtime', 'rating', 'votes',
+                  'revenue', 'metascore', 'description', 'hyperlink', 'image_hyperlink']
+TAG_FIELDS = ['tag', 'article_id']
+USER_FIELDS = ['username']
+COMMENT_FIELDS = ['article_id', 'username', 'comment', 'timestamp']
+
+FORMATS = ('csv', 'jsonl')
+
+
+def article_records(repo: AbstractRepository) -> Iterator[Dict]:
+    # The Articles stored when this is called, in date order. Their ids are fixed up front and the Articles are then
+    # read a page of ids at a time, so only one page is held in memory and an Article added while the export is being
+    # read neither appears nor shifts the pages after it.
+    calendar = repo.get_calendar()
+    first_date, last_date = calendar.first_date(), calendar.last_date()
+    if first_date is None:
+        return iter(())
+    article_ids = repo.get_article_ids_between(first_date, last_date)
+
+    def records():
+        for cursor in range(0, len(article_ids), ARTICLES_PER_PAGE):
+            for article in repo.get_articles_by_id(article_ids[cursor:cursor + ARTICLES_PER_PAGE]):
+                details = article.details
+                yield {
+                    'id': article.id,
+                    'date': article.date.isoformat(),
+                    'name': details.name if details is not None else article.title,
+                    'year': details.year if details is not None else None,
+                    'genres': [tag.tag_name for tag in article.tags],
+                    'director': details.director if details is not None else None,
+                    'actors': details.actor_names if details is not None else list(),
+                    'runtime': details.runtime if details is not None else None,
+                    'rating': details.rating if details is not None else None,
+                    'votes': details.votes if details is not None else None,
+                    'revenue': details.revenue if details is not None else None,
+                    'metascore': details.metascore if details is not None else None,
+                    'description': details.plot if details is not None else article.first_para,
+                    'hyperlink': article.hyperlink,
+                    'image_hyperlink': article.image_hyperlink
+                }
+    return records()
+
+
+def tag_records(repo: AbstractRepository) -> Iterator[Dict]:
+    # One record for each Article a Tag is applied to.
+    tags = repo.get_tags()
+    return ({'tag': tag.tag_name, 'article_id': article.id}
+            for tag in islice(tags, len(tags)) for article in tag.tagged_articles)
+
+
+def user_records(repo: AbstractRepository) -> Iterator[Dict]:
+    # Usernames only: passwords, even hashed, are never exported.
+    return ({'username': user.username} for user in repo.get_users())
+
+
+def comment_records(repo: AbstractRepository) -> Iterator[Dict]:
+    # The Comments stored when this is called. Comments are only ever appended, so those added while the export is
+    # being read are left out by stopping at the number stored now. The records have the fields POST /comments
+    # imports.
+    comments = repo.get_comments()
+    return ({
+        'article_id': comment.article.id,
+        'username': comment.user.username,
+        'comment': comment.comment,
+        'timestamp': comment.timestamp.isoformat(sep=' ')
+    } for comment in islice(comments, len(comments)))
+
+
+DATASETS = {
+    'articles': (ARTICLE_FIELDS, article_records),
+    'tags': (TAG_FIELDS, tag_records),
+    'users': (USER_FIELDS, user_records),
+    'comments': (COMMENT_FIELDS, comment_records)
+}
+
+
+def to_csv(records: Iterable[Dict], fields: List[str]) -> Iterator[str]:
+    # Writes a header and then the records, with list values joined by commas, in chunks of ROWS_PER_CHUNK rows.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for number, record in enumerate(records, 1):
+        writer.writerow([','.join(value) if isinstance(value, list) else value for value in
+                         (record[field] for field in fields)])
+        if number % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def to_jsonl(records: Iterable[Dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+def export(dataset: str, format: str, repo: AbstractRepository, compress_level: int = None) -> Iterator:
+    # Streams a dataset (articles, tags, users or comments) as CSV or JSON Lines, gzipped when compress_level is given.
+    # The dataset's snapshot is taken when this is called; the output is produced as it's read.
+    fields, records = DATASETS[dataset]
+    if format == 'csv':
+        output = to_csv(records(repo), fields)
+    else:
+        output = to_jsonl(records(repo))
+    return compress_stream(output, compress_level) if compress_level is not None else output
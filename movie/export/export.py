@@ -0,0 +1,59 @@
+import click
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+
+import movie.adapters.repository as repo
+from movie.export.datasets import DATASETS, FORMATS, export
+
+
+MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+# Configure Blueprint.
+export_blueprint = Blueprint(
+    'export_bp', __name__, url_prefix='/export')
+
+
+@export_blueprint.route('/<dataset>.<format>', methods=['GET'])
+@export_blueprint.route('/<dataset>.<format>.gz', methods=['GET'], defaults={'compressed': True})
+def export_dataset(dataset, format, compressed=False):
+    # Streams a dataset, e.g. /export/comments.csv or /export/articles.jsonl.gz. The request must carry EXPORT_TOKEN in
+    # EXPORT_HEADER; with no token configured, the endpoint is disabled.
+    config = current_app.config
+    token = config['EXPORT_TOKEN']
+    if not token:
+        abort(404)
+    if request.headers.get(config['EXPORT_HEADER']) != token:
+        abort(403)
+    if dataset not in DATASETS or format not in FORMATS:
+        abort(404)
+
+    compress_level = config['EXPORT_COMPRESSION_LEVEL'] if compressed else None
+    response = Response(stream_with_context(export(dataset, format, repo.repo_instance, compress_level)),
+                        mimetype='application/gzip' if compressed else MIMETYPES[format])
+    filename = f'{dataset}.{format}.gz' if compressed else f'{dataset}.{format}'
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def init_export(app):
+    # Adds the export command, which writes a dataset to a file or standard output.
+
+    @app.cli.command('export')
+    @click.argument('dataset', type=click.Choice(sorted(DATASETS)))
+    @click.option('--format', 'format', type=click.Choice(FORMATS), default='csv', show_default=True)
+    @click.option('--gzip', 'compressed', is_flag=True, help='Compress the output with gzip.')
+    @click.option('--output', type=click.Path(dir_okay=False), help='File to write to (standard output by default).')
+    def export_command(dataset, format, compressed, output):
+        """Export articles, tags, users or comments as CSV or JSON Lines."""
+        compress_level = app.config['EXPORT_COMPRESSION_LEVEL'] if compressed else None
+        chunks = export(dataset, format, repo.repo_instance, compress_level)
+        if output is None:
+            stream = click.get_binary_stream('stdout') if compressed else click.get_text_stream('stdout')
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+        else:
+            with open(output, 'wb' if compressed else 'w', encoding=None if compressed else 'utf-8',
+                      newline=None if compressed else '') as outfile:
+                for chunk in chunks:
+                    outfile.write(chunk)
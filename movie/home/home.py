@@ -12,5 +12,6 @@ def home():
     return render_template(
         'home/home.html',
         #selected_articles=utilities.get_selected_articles(),
+        leaderboards=utilities.get_leaderboards(),
         tag_urls=utilities.get_tags_and_urls()
     )
@@ -0,0 +1,63 @@
+from time import perf_counter
+
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+from jinja2 import Template
+
+from movie.metrics.registry import MetricsRegistry
+
+
+REQUEST_DURATION = 'movie_request_duration_seconds'
+REQUEST_RENDER_DURATION = 'movie_request_render_seconds'
+REQUEST_SERVICE_DURATION = 'movie_request_service_seconds'
+REPOSITORY_CALL_DURATION = 'movie_repository_call_seconds'
+
+
+# Configure Blueprint.
+metrics_blueprint = Blueprint(
+    'metrics_bp', __name__)
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    registry = current_app.extensions['metrics']
+    return Response(registry.to_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+class TimedTemplate(Template):
+    # Adds the time spent rendering a page to the current request's render time. Included templates are rendered as
+    # part of the page, so they're counted once.
+
+    def render(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            if has_request_context() and '_metrics_start' in g:
+                g._metrics_render += perf_counter() - start
+
+
+def init_metrics(app, registry: MetricsRegistry):
+    # Records, for every request, its total latency and how it splits between rendering templates and everything
+    # else (the view and the service layer), labelled by endpoint, e.g. news_bp.articles_by_date.
+    registry.describe(REQUEST_DURATION, 'Time spent handling requests, by endpoint.')
+    registry.describe(REQUEST_RENDER_DURATION, 'Time spent rendering templates, by endpoint.')
+    registry.describe(REQUEST_SERVICE_DURATION, 'Time spent handling requests outside templates, by endpoint.')
+    registry.describe(REPOSITORY_CALL_DURATION, 'Time spent in repository calls, by AbstractRepository method.')
+
+    app.extensions['metrics'] = registry
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_timer():
+        g._metrics_start = perf_counter()
+        g._metrics_render = 0.0
+
+    @app.after_request
+    def record_request(response):
+        if '_metrics_start' in g:
+            total = perf_counter() - g._metrics_start
+            endpoint = request.endpoint or 'unmatched'
+            registry.observe(REQUEST_DURATION, 'endpoint', endpoint, total)
+            registry.observe(REQUEST_RENDER_DURATION, 'endpoint', endpoint, g._metrics_render)
+            registry.observe(REQUEST_SERVICE_DURATION, 'endpoint', endpoint, max(total - g._metrics_render, 0.0))
+        return response
@@ -0,0 +1,117 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Tuple
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    # Counts observations into fixed buckets. Recording an observation is a bisect and two additions under a lock, so
+    # it's cheap enough to do on every request and repository call.
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    @property
+    def buckets(self) -> Tuple[float, ...]:
+        return self._buckets
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def cumulative_counts(self):
+        # Returns the number of observations less than or equal to each bucket bound, ending with the total.
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        cumulative = list()
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+class MetricsRegistry:
+    # Holds labelled histograms, and the caches whose hit ratios are reported alongside them. A cache is any object
+    # with hits and misses attributes.
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Tuple[str, str], Histogram]] = dict()
+        self._help: Dict[str, str] = dict()
+        self._caches = dict()
+        self._lock = Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, label: str, label_value: str, value: float):
+        key = (label, label_value)
+        family = self._histograms.get(name)
+        histogram = family.get(key) if family is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, dict()).setdefault(key, Histogram())
+        histogram.observe(value)
+
+    def histogram(self, name: str, label: str, label_value: str) -> Histogram:
+        return self._histograms.get(name, dict()).get((label, label_value))
+
+    def register_cache(self, name: str, cache):
+        self._caches[name] = cache
+
+    def cache_hit_ratio(self, name: str) -> float:
+        cache = self._caches[name]
+        lookups = cache.hits + cache.misses
+        return cache.hits / lookups if lookups > 0 else 0.0
+
+    def to_prometheus(self) -> str:
+        # Renders every metric in the Prometheus text exposition format.
+        lines = list()
+
+        for name, family in sorted(self._histograms.items()):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for (label, label_value), histogram in sorted(family.items()):
+                labels = f'{label}="{escape_label(label_value)}"'
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.cumulative_counts()):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        if self._caches:
+            for metric, help_text, value in (
+                    ('movie_cache_hits_total', 'Cache lookups that found an entry.', lambda cache: cache.hits),
+                    ('movie_cache_misses_total', 'Cache lookups that missed.', lambda cache: cache.misses)
+            ):
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} counter')
+                for name, cache in sorted(self._caches.items()):
+                    lines.append(f'{metric}{{cache="{escape_label(name)}"}} {value(cache)}')
+
+            lines.append('# HELP movie_cache_hit_ratio Fraction of cache lookups that found an entry.')
+            lines.append('# TYPE movie_cache_hit_ratio gauge')
+            for name in sorted(self._caches):
+                lines.append(f'movie_cache_hit_ratio{{cache="{escape_label(name)}"}} {self.cache_hit_ratio(name)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
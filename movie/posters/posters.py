@@ -0,0 +1,41 @@
+from flask import Blueprint, abort, current_app, send_from_directory, url_for
+
+from movie.posters.store import PosterStore
+
+
+# Thumbnail URLs change whenever their content does, so browsers and proxies can keep them for good.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+# Configure Blueprint.
+posters_blueprint = Blueprint(
+    'posters_bp', __name__, url_prefix='/posters')
+
+
+@posters_blueprint.route('/<filename>', methods=['GET'])
+def poster(filename):
+    store = current_app.extensions.get('posters')
+    if store is None:
+        abort(404)
+    response = send_from_directory(store.cache_dir, filename)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def poster_url(article, size: str) -> str:
+    # The URL of an article's poster thumbnail of the given size, or its remote image while the thumbnail isn't ready
+    # (or when local posters are disabled).
+    store = current_app.extensions.get('posters')
+    if store is not None:
+        filename = store.poster_filename(article['id'], size)
+        if filename is not None:
+            return url_for('posters_bp.poster', filename=filename)
+    return article['image_hyperlink']
+
+
+def init_posters(app, store: PosterStore = None):
+    # Makes poster_url available to templates and, when a store is given, starts processing its posters.
+    app.add_template_global(poster_url)
+    if store is not None:
+        app.extensions['posters'] = store
+        store.start()
@@ -0,0 +1,135 @@
+from datetime import date
+from typing import List
+
+from movie.adapters.calendar_index import CalendarIndex
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import User, Article, Tag, Comment, Person
+from movie.posters.store import PosterStore
+
+
+class PosterRepository(AbstractRepository):
+    # Wraps another repository and queues the poster of each Article added through it with a PosterStore, so that
+    # Articles added after startup get thumbnails too. Everything else is passed straight through.
+
+    def __init__(self, repo: AbstractRepository, store: PosterStore):
+        self._repo = repo
+        self._store = store
+
+    @property
+    def wrapped(self) -> AbstractRepository:
+        return self._repo
+
+    def add_user(self, user: User):
+        return self._repo.add_user(user)
+
+    def get_user(self, username) -> User:
+        return self._repo.get_user(username)
+
+    def get_users(self) -> List[User]:
+        return self._repo.get_users()
+
+    def add_article(self, article: Article):
+        self._repo.add_article(article)
+        self._store.add_article(article.id, article.image_hyperlink)
+
+    def get_article(self, id: int) -> Article:
+        return self._repo.get_article(id)
+
+    def get_articles_by_date(self, target_date: date) -> List[Article]:
+        return self._repo.get_articles_by_date(target_date)
+
+    def get_number_of_articles(self):
+        return self._repo.get_number_of_articles()
+
+    def get_first_article(self) -> Article:
+        return self._repo.get_first_article()
+
+    def get_last_article(self) -> Article:
+        return self._repo.get_last_article()
+
+    def get_articles_by_id(self, id_list):
+        return self._repo.get_articles_by_id(id_list)
+
+    def get_article_ids_for_tag(self, tag_name: str):
+        return self._repo.get_article_ids_for_tag(tag_name)
+
+    def get_article_ids_for_tag_query(self, query):
+        return self._repo.get_article_ids_for_tag_query(query)
+
+    def get_date_of_previous_article(self, article: Article):
+        return self._repo.get_date_of_previous_article(article)
+
+    def get_date_of_next_article(self, article: Article):
+        return self._repo.get_date_of_next_article(article)
+
+    def get_articles_between(self, start: date, end: date, cursor: int = 0, limit: int = None) -> List[Article]:
+        return self._repo.get_articles_between(start, end, cursor, limit)
+
+    def get_article_ids_between(self, start: date, end: date):
+        return self._repo.get_article_ids_between(start, end)
+
+    def get_number_of_articles_between(self, start: date, end: date) -> int:
+        return self._repo.get_number_of_articles_between(start, end)
+
+    def get_calendar(self) -> CalendarIndex:
+        return self._repo.get_calendar()
+
+    def add_tag(self, tag: Tag):
+        return self._repo.add_tag(tag)
+
+    def get_tags(self) -> List[Tag]:
+        return self._repo.get_tags()
+
+    def add_person(self, person: Person):
+        return self._repo.add_person(person)
+
+    def get_person(self, full_name: str) -> Person:
+        return self._repo.get_person(full_name)
+
+    def get_article_ids_for_person(self, full_name: str):
+        return self._repo.get_article_ids_for_person(full_name)
+
+    def get_article_ids_for_people(self, full_names: List[str]):
+        return self._repo.get_article_ids_for_people(full_names)
+
+    def add_comment(self, comment: Comment):
+        return self._repo.add_comment(comment)
+
+    def add_comments(self, comments: List[Comment]):
+        return self._repo.add_comments(comments)
+
+    def get_comments(self):
+        return self._repo.get_comments()
+
+    def get_comments_for_user(self, username: str, cursor: int = 0, limit: int = None) -> List[Comment]:
+        return self._repo.get_comments_for_user(username, cursor, limit)
+
+    def get_number_of_comments_for_user(self, username: str) -> int:
+        return self._repo.get_number_of_comments_for_user(username)
+
+    def get_most_commented_article_ids(self, limit: int = None):
+        return self._repo.get_most_commented_article_ids(limit)
+
+    def get_recently_discussed_article_ids(self, limit: int = None):
+        return self._repo.get_recently_discussed_article_ids(limit)
+
+    def get_highest_rated_article_ids(self, limit: int = None):
+        return self._repo.get_highest_rated_article_ids(limit)
+
+    def get_similar_article_ids(self, article_id: int, limit: int = None):
+        return self._repo.get_similar_article_ids(article_id, limit)
+
+    def get_article_ids_by_stats(self, filters, sort_by: str = None, descending: bool = True, limit: int = None):
+        return self._repo.get_article_ids_by_stats(filters, sort_by, descending, limit)
+
+    def get_number_of_articles_by_stats(self, filters):
+        return self._repo.get_number_of_articles_by_stats(filters)
+
+    def get_article_ids_for_facets(self, selection, cursor: int = 0, limit: int = None):
+        return self._repo.get_article_ids_for_facets(selection, cursor, limit)
+
+    def get_number_of_articles_for_facets(self, selection):
+        return self._repo.get_number_of_articles_for_facets(selection)
+
+    def get_facet_counts(self, selection):
+        return self._repo.get_facet_counts(selection)
@@ -0,0 +1,184 @@
+import hashlib
+import io
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import urllib.parse
+import urllib.request
+from threading import Lock, Thread
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:
+    # Without Pillow, posters are stored at their original size.
+    Image = None
+
+
+logger = logging.getLogger(__name__)
+
+POSTER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+HASH_LENGTH = 16
+DOWNLOAD_TIMEOUT = 30
+
+
+def parse_sizes(sizes: str) -> Dict[str, int]:
+    # Parses thumbnail sizes written as name:width pairs, e.g. 'small:300,large:500'.
+    parsed = dict()
+    for size in sizes.split(','):
+        name, _, width = size.strip().partition(':')
+        parsed[name] = int(width)
+    return parsed
+
+
+class PosterStore:
+    # Keeps local copies of article posters, resized into thumbnails of a few widths. A poster is read from
+    # <source_dir>/<article id>.png (or .jpg); articles without one are shown default_poster, a file or a URL. A URL is
+    # downloaded once, into source_dir, and read from there afterwards. Thumbnails are named after a hash of their
+    # content, so their URLs only change when the image does and can be cached indefinitely.
+    #
+    # Posters are processed by a background worker: until an article's thumbnails are ready, poster_filename returns
+    # None and pages fall back to the article's remote image.
+
+    def __init__(self, cache_dir: str, sizes: Dict[str, int], source_dir: str = None, default_poster: str = None):
+        self._cache_dir = cache_dir
+        self._sizes = sizes
+        self._source_dir = source_dir
+        self._default_poster = default_poster
+        self._manifest: Dict[int, Dict[str, str]] = dict()
+        self._default_thumbnails: Dict[str, str] = None
+        self._thumbnails_by_source: Dict[str, Dict[str, str]] = dict()
+        self._lock = Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    def poster_filename(self, article_id: int, size: str) -> Optional[str]:
+        thumbnails = self._manifest.get(article_id, self._default_thumbnails)
+        if thumbnails is None:
+            return None
+        return thumbnails.get(size)
+
+    def start(self):
+        # Queues the default poster and every poster in source_dir, and starts the worker that processes them.
+        if self._default_poster is not None:
+            self._queue.put((None, self._default_poster))
+        if self._source_dir is not None and os.path.isdir(self._source_dir):
+            for filename in sorted(os.listdir(self._source_dir)):
+                stem, extension = os.path.splitext(filename)
+                if extension.lower() in POSTER_EXTENSIONS and stem.isdigit():
+                    self._queue.put((int(stem), os.path.join(self._source_dir, filename)))
+
+        self._worker = Thread(target=self._run, name='poster-worker', daemon=True)
+        self._worker.start()
+
+    def add_poster(self, article_id: int, path: str):
+        # Queues a new or changed poster for an article.
+        self._queue.put((article_id, path))
+
+    def add_article(self, article_id: int, image_hyperlink: str = None):
+        # Queues the poster of an article added since start: its file in source_dir if it has one, otherwise its
+        # remote image, unless that's the default poster, which it's shown already.
+        if self._source_dir is not None:
+            for extension in POSTER_EXTENSIONS:
+                path = os.path.join(self._source_dir, f'{article_id}{extension}')
+                if os.path.exists(path):
+                    self.add_poster(article_id, path)
+                    return
+        if image_hyperlink and image_hyperlink != self._default_poster and is_url(image_hyperlink):
+            self.add_poster(article_id, image_hyperlink)
+
+    def join(self):
+        # Waits until every queued poster has been processed.
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            article_id, path = self._queue.get()
+            try:
+                self.process(article_id, path)
+            except Exception:
+                # An unreadable poster (or one Pillow refuses, e.g. as a decompression bomb) leaves the article showing
+                # the default poster, and the worker carries on with the next one.
+                logger.exception('Could not process poster %s', path)
+            finally:
+                self._queue.task_done()
+
+    def process(self, article_id: Optional[int], path: str):
+        # Writes the thumbnails of the poster at path, and records them for article_id (None for the default poster).
+        if is_url(path):
+            path = self._download(path)
+        with open(path, 'rb') as infile:
+            source = infile.read()
+        source_hash = hashlib.sha256(source).hexdigest()
+
+        # The default poster is often also an article's poster, and rebuilt posters are often unchanged, so each
+        # distinct source image is only resized once.
+        thumbnails = self._thumbnails_by_source.get(source_hash)
+        if thumbnails is None:
+            extension = os.path.splitext(path)[1].lower()
+            thumbnails = {
+                name: self._write_thumbnail(resize(source, width), extension) for name, width in self._sizes.items()
+            }
+            self._thumbnails_by_source[source_hash] = thumbnails
+
+        with self._lock:
+            if article_id is None:
+                self._default_thumbnails = thumbnails
+            else:
+                self._manifest[article_id] = thumbnails
+
+    def _download(self, url: str) -> str:
+        # Returns the path of a local copy of the image at url, named after a hash of the URL, downloading it if it
+        # hasn't been already. Without a source_dir, the copy is kept in cache_dir.
+        extension = os.path.splitext(urllib.parse.urlsplit(url).path)[1].lower()
+        if extension not in POSTER_EXTENSIONS:
+            extension = '.png'
+        directory = self._source_dir or self._cache_dir
+        target = os.path.join(directory, 'remote-' + hashlib.sha256(url.encode('utf-8')).hexdigest()[:HASH_LENGTH] +
+                              extension)
+        if not os.path.exists(target):
+            with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+                content = response.read()
+            os.makedirs(directory, exist_ok=True)
+            write_atomically(directory, target, content)
+        return target
+
+    def _write_thumbnail(self, content: bytes, extension: str) -> str:
+        filename = hashlib.sha256(content).hexdigest()[:HASH_LENGTH] + extension
+        target = os.path.join(self._cache_dir, filename)
+        if not os.path.exists(target):
+            write_atomically(self._cache_dir, target, content)
+        return filename
+
+
+def is_url(path: str) -> bool:
+    return urllib.parse.urlsplit(path).scheme in ('http', 'https', 'file')
+
+
+def write_atomically(directory: str, target: str, content: bytes):
+    # Written to a temporary file first, so a file is never read, or served, half written.
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as outfile:
+        outfile.write(content)
+    shutil.move(outfile.name, target)
+
+
+def resize(source: bytes, width: int) -> bytes:
+    # Scales an image down to width pixels wide, keeping its format and aspect ratio. Images that are already narrow
+    # enough, and all images when Pillow isn't installed, are returned unchanged.
+    if Image is None:
+        return source
+
+    with Image.open(io.BytesIO(source)) as image:
+        if image.width <= width:
+            return source
+        height = max(round(image.height * width / image.width), 1)
+        output = io.BytesIO()
+        image.resize((width, height), Image.LANCZOS).save(output, format=image.format)
+        return output.getvalue()
@@ -0,0 +1,126 @@
+import cProfile
+import json
+import os
+import random
+from datetime import datetime
+from time import perf_counter
+
+from flask import Blueprint, abort, current_app, g, render_template, request, send_from_directory
+
+
+# Configure Blueprint.
+profiling_blueprint = Blueprint(
+    'profiling_bp', __name__, url_prefix='/profiles')
+
+
+@profiling_blueprint.before_request
+def require_token():
+    # Profiles record requests' parameters, so they're only served to requests carrying PROFILING_TOKEN in
+    # PROFILING_HEADER; with no token configured, they aren't served at all.
+    config = current_app.config
+    token = config['PROFILING_TOKEN']
+    if not token:
+        abort(404)
+    if request.headers.get(config['PROFILING_HEADER']) != token:
+        abort(403)
+
+
+@profiling_blueprint.route('/', methods=['GET'])
+def profiles():
+    # List the slowest captured requests first.
+    captured = sorted(read_profile_index(current_app.config['PROFILING_DIR']),
+                      key=lambda profile: profile['duration_ms'], reverse=True)
+    return render_template(
+        'profiling/profiles.html',
+        title='Profiles',
+        profiles=captured[:current_app.config['PROFILING_INDEX_SIZE']]
+    )
+
+
+@profiling_blueprint.route('/<filename>', methods=['GET'])
+def download_profile(filename):
+    if not filename.endswith('.prof'):
+        abort(404)
+    return send_from_directory(os.path.abspath(current_app.config['PROFILING_DIR']), filename, as_attachment=True)
+
+
+def should_profile(config) -> bool:
+    # A request is profiled when it carries PROFILING_TOKEN in the profiling header, or when it's picked by the sampling
+    # rate. With no token configured, only sampled requests are profiled.
+    token = config['PROFILING_TOKEN']
+    if token and request.headers.get(config['PROFILING_HEADER']) == token:
+        return True
+    return random.random() < config['PROFILING_SAMPLE_RATE']
+
+
+def init_profiling(app):
+    # Profiles selected requests with cProfile. Each profile is written to PROFILING_DIR as a .prof file (readable with
+    # pstats or snakeviz), beside a .json file that records the route, parameters and duration. Only the newest
+    # PROFILING_MAX_FILES profiles are kept.
+    profile_dir = app.config['PROFILING_DIR']
+    os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def start_profiler():
+        if request.blueprint == 'profiling_bp' or not should_profile(app.config):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            return
+        g._profiler = profiler
+        g._profiler_start = perf_counter()
+
+    @app.after_request
+    def write_profile(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return response
+
+        profiler.disable()
+        duration_ms = (perf_counter() - g._profiler_start) * 1000
+        captured = datetime.now()
+        endpoint = request.endpoint or 'unmatched'
+        name = f"{captured.strftime('%Y%m%dT%H%M%S%f')}-{endpoint.replace('.', '-')}"
+
+        profiler.dump_stats(os.path.join(profile_dir, name + '.prof'))
+        with open(os.path.join(profile_dir, name + '.json'), 'w') as outfile:
+            json.dump({
+                'file': name + '.prof',
+                'endpoint': endpoint,
+                'method': request.method,
+                'path': request.path,
+                'args': request.args.to_dict(flat=False),
+                'status': response.status_code,
+                'duration_ms': duration_ms,
+                'captured': captured.isoformat(timespec='seconds')
+            }, outfile)
+
+        rotate_profiles(profile_dir, app.config['PROFILING_MAX_FILES'])
+        return response
+
+
+def read_profile_index(profile_dir: str):
+    profiles = list()
+    for filename in os.listdir(profile_dir):
+        if filename.endswith('.json'):
+            try:
+                with open(os.path.join(profile_dir, filename)) as infile:
+                    profiles.append(json.load(infile))
+            except (OSError, ValueError):
+                # The profile was rotated away, or is still being written.
+                pass
+    return profiles
+
+
+def rotate_profiles(profile_dir: str, max_files: int):
+    # Profile names start with their capture time, so sorting them puts the oldest first.
+    names = sorted(filename[:-len('.prof')] for filename in os.listdir(profile_dir) if filename.endswith('.prof'))
+    for name in names[:max(len(names) - max_files, 0)]:
+        for extension in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(profile_dir, name + extension))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,67 @@
+import os
+import stat
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from movie.adapters.caching_repository import ExpiringLRUCache
+
+
+class FragmentCacheExtension(Extension):
+    # Adds a cache tag that renders its body once per key and reuses the output until the key changes:
+    #
+    #     {% cache 'article', article.id, article.version %} ... {% endcache %}
+    #
+    # The key is the tag's arguments, so it must include a version of everything the body shows; there's no other
+    # invalidation. Without a fragment_cache set on the environment, the body is rendered every time.
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(key)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+
+        key = tuple(key)
+        output = cache.get(key)
+        if output is None:
+            output = caller()
+            cache.put(key, output)
+        return output
+
+
+def init_templating(app, fragment_cache: ExpiringLRUCache = None, bytecode_cache: bool = False,
+                    bytecode_cache_dir: str = None):
+    # Enables the cache tag, with rendered fragments kept in fragment_cache, and, with bytecode_cache, keeps compiled
+    # templates on disk so that new processes load them instead of compiling every template again. They're kept in
+    # bytecode_cache_dir, which must be private to this user, or else in Jinja's per-user cache directory.
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = fragment_cache
+    if bytecode_cache:
+        if bytecode_cache_dir is None:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+        else:
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(private_directory(bytecode_cache_dir))
+
+
+def private_directory(path: str) -> str:
+    # Creates path, readable and writable only by this user, if it doesn't exist. Compiled templates are loaded from it
+    # and run, so an existing directory must belong to this user and be writable by no one else.
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or \
+            (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+        raise RuntimeError(f'{path} must be a directory owned by this user that no one else can write to')
+    return path
@@ -26,15 +26,27 @@ def get_random_articles(quantity, repo: AbstractRepository):
     return articles_to_dict(articles)
 
 
+def get_leaderboards(quantity, repo: AbstractRepository):
+    # Returns the most commented, most recently discussed and highest rated articles.
+    return {
+        'Most commented': articles_to_dict(repo.get_articles_by_id(repo.get_most_commented_article_ids(quantity))),
+        'Recently discussed': articles_to_dict(
+            repo.get_articles_by_id(repo.get_recently_discussed_article_ids(quantity))),
+        'Highest rated': articles_to_dict(repo.get_articles_by_id(repo.get_highest_rated_article_ids(quantity)))
+    }
+
+
 # ============================================
 # Functions to convert dicts to model entities
 # ============================================
 
 def article_to_dict(article: Article):
     article_dict = {
+        'id': article.id,
         'date': article.date,
         'title': article.title,
-        'image_hyperlink': article.image_hyperlink
+        'image_hyperlink': article.image_hyperlink,
+        'number_of_comments': article.number_of_comments
     }
     return article_dict
 
@@ -24,3 +24,12 @@ def get_selected_articles(quantity=3):
     for article in articles:
         article['hyperlink'] = url_for('news_bp.articles_by_date', date=article['date'].isoformat())
     return articles
+
+
+def get_leaderboards(quantity=5):
+    leaderboards = services.get_leaderboards(quantity, repo.repo_instance)
+
+    for articles in leaderboards.values():
+        for article in articles:
+            article['hyperlink'] = url_for('news_bp.articles_by_date', date=article['date'].isoformat())
+    return leaderboards
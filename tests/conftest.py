@@ -4,10 +4,10 @@ import pytest
 from movie import create_app
 from movie.adapters import memory_repository
 from movie.adapters.memory_repository import MemoryRepository
+from movie.adapters.sqlite_repository import SqliteRepository
 
 
-TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'nicho', 'Documents', 'University 2020', 'Compsci 235',
-                              'A2', 'tests', 'data')
+TEST_DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')  # LOCAL
 #TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'nicho', 'Documents', 'University 2020', 'Compsci 235',
 # 'A2', 'tests', 'data')
 
@@ -19,6 +19,22 @@ def in_memory_repo():
     return repo
 
 
+@pytest.fixture
+def batch_loaded_repo():
+    # Loaded in small batches by worker processes, to exercise the streaming loader.
+    repo = MemoryRepository()
+    memory_repository.populate(TEST_DATA_PATH, repo, batch_size=64, workers=2)
+    return repo
+
+
+@pytest.fixture
+def sqlite_repo():
+    repo = SqliteRepository()
+    memory_repository.populate(TEST_DATA_PATH, repo)
+    yield repo
+    repo.close()
+
+
 @pytest.fixture
 def client():
     my_app = create_app({
@@ -30,6 +46,21 @@ def client():
     return my_app.test_client()
 
 
+@pytest.fixture
+def profiling_client(tmp_path):
+    my_app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'WTF_CSRF_ENABLED': False,
+        'PROFILING_ENABLED': True,                      # Profile requests that send the token in the X-Profile header.
+        'PROFILING_TOKEN': 'profiling-token',
+        'PROFILING_DIR': str(tmp_path),
+        'PROFILING_MAX_FILES': 2
+    })
+
+    return my_app.test_client()
+
+
 class AuthenticationManager:
     def __init__(self, client):
         self._client = client
@@ -47,3 +78,8 @@ class AuthenticationManager:
 @pytest.fixture
 def auth(client):
     return AuthenticationManager(client)
+
+
+@pytest.fixture
+def profiling_auth(profiling_client):
+    return AuthenticationManager(profiling_client)
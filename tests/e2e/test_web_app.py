@@ -1,7 +1,15 @@
+import gzip
+import os
+import re
+
 import pytest
 
 from flask import session
 
+from movie import create_app
+from movie.articles import news
+from tests.conftest import AuthenticationManager, TEST_DATA_PATH
+
 
 def test_register(client):
     # Check that we retrieve the register page.
@@ -65,6 +73,12 @@ def test_index(client):
     assert response.status_code == 200
     assert b"Nic's Movie Blog" in response.data
 
+    # The home page lists the leaderboards.
+    assert b'Most commented' in response.data
+    assert b'Guardians of the Galaxy (2014)    -   8/10</a> (3 comments)' in response.data
+    assert b'Highest rated' in response.data
+    assert b'The Dark Knight (2008)' in response.data
+
 
 def test_login_required_to_comment(client):
     response = client.post('/comment')
@@ -85,6 +99,15 @@ def test_comment(client, auth):
     assert response.headers['Location'] == 'http://localhost/articles_by_date?date=2015-02-02&view_comments_for=1'
 
 
+def test_cached_article_blocks_show_new_comments(client, auth):
+    auth.login()
+    client.get('/articles_by_date?date=2015-02-02&view_comments_for=1')
+
+    client.post('/comment', data={'comment': 'Better the second time', 'article_id': 1})
+    response = client.get('/articles_by_date?date=2015-02-02&view_comments_for=1')
+    assert b'Better the second time' in response.data
+
+
 @pytest.mark.parametrize(('comment', 'messages'), (
         ('Who thinks Trump is a fuckwit?', (b'Your comment must not contain profanity')),
         ('Hey', (b'Your comment is too short')),
@@ -165,4 +188,340 @@ def test_articles_with_tag(client, auth):
     response = client.get('/articles_by_tag?tag=Action')
     assert response.status_code == 200
 
-    assert b'Articles tagged by Action' in response.data
\ No newline at end of file
+    assert b'Articles tagged by Action' in response.data
+
+def test_metrics(client, auth):
+    auth.login()
+    client.get('/articles_by_date?date=2015-02-02')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    # Request latency is recorded per route and split into template rendering and service time.
+    assert b'movie_request_duration_seconds_count{endpoint="news_bp.articles_by_date"} 1' in response.data
+    assert b'movie_request_render_seconds_count{endpoint="news_bp.articles_by_date"} 1' in response.data
+    assert b'movie_request_service_seconds_count{endpoint="news_bp.articles_by_date"} 1' in response.data
+
+    # Repository calls are recorded per method, and cache hit ratios are reported.
+    assert b'movie_repository_call_seconds_count{method="get_articles_by_date"}' in response.data
+    assert b'movie_cache_hit_ratio{cache="article_text"}' in response.data
+
+
+def test_repository_cache_is_reported_in_metrics():
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'CACHE_ENABLED': True
+    })
+    client = app.test_client()
+    AuthenticationManager(client).login()
+    client.get('/articles_by_date?date=2015-02-02')
+    client.get('/articles_by_date?date=2015-02-02')
+
+    response = client.get('/metrics')
+    assert b'movie_cache_hits_total{cache="repository"}' in response.data
+    assert b'movie_cache_hits_total{cache="repository"} 0\n' not in response.data
+
+
+def test_import_comments():
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'COMMENT_IMPORT_TOKEN': 'secret'
+    })
+    client = app.test_client()
+    comments = [
+        {'article_id': 2, 'username': 'thorke', 'comment': 'Imported from the moderation queue'},
+        {'article_id': 2, 'username': 'thorke', 'comment': 'no'}
+    ]
+
+    assert client.post('/comments', json=comments).status_code == 403
+    assert client.post('/comments', json={'article_id': 2}, headers={'X-Import-Token': 'secret'}).status_code == 400
+
+    response = client.post('/comments', json=comments, headers={'X-Import-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json() == {'added': 1, 'errors': [{'index': 1, 'errors': ['Your comment is too short']}]}
+
+
+def test_import_comments_is_disabled_without_a_token(client):
+    assert client.post('/comments', json=[]).status_code == 404
+
+
+def test_export(client):
+    assert client.get('/export/comments.csv').status_code == 404
+
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'EXPORT_TOKEN': 'secret'})
+    client = app.test_client()
+    assert client.get('/export/comments.csv').status_code == 403
+    assert client.get('/export/passwords.csv', headers={'X-Export-Token': 'secret'}).status_code == 404
+
+    response = client.get('/export/users.csv', headers={'X-Export-Token': 'secret'})
+    assert response.headers['Content-Disposition'] == 'attachment; filename=users.csv'
+    assert response.data == b'username\r\nthorke\r\nfmercury\r\nmjackson\r\n'
+
+    response = client.get('/export/tags.jsonl.gz', headers={'X-Export-Token': 'secret'})
+    assert response.mimetype == 'application/gzip'
+    assert b'{"tag": "Action", "article_id": 1}' in gzip.decompress(response.data)
+
+
+def test_pages_are_compressed_for_clients_that_accept_it(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_date?date=2015-02-02', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'Guardians of the Galaxy' in gzip.decompress(response.data)
+
+    response = client.get('/articles_by_date?date=2015-02-02')
+    assert 'Content-Encoding' not in response.headers
+    assert b'Guardians of the Galaxy' in response.data
+
+
+def test_streamed_pages_are_compressed_as_they_are_sent():
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'STREAM_TEMPLATES': True,
+        'STREAM_BUFFER_SIZE': 5
+    })
+    client = app.test_client()
+    AuthenticationManager(client).login()
+
+    response = client.get('/articles_by_date?date=2015-02-02', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    assert b'Guardians of the Galaxy' in gzip.decompress(b''.join(chunks))
+
+
+def test_static_assets_are_fingerprinted_and_precompressed(tmp_path):
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'ASSETS_ENABLED': True,
+        'ASSETS_DIR': str(tmp_path)
+    })
+    client = app.test_client()
+    css_url = '/assets/' + app.extensions['assets']['manifest']['css/home.css']['file']
+
+    response = client.get('/')
+    assert css_url.encode() in response.data
+
+    response = client.get(css_url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.mimetype == 'text/css'
+    assert b'body' in gzip.decompress(response.data)
+
+    response = client.get(css_url)
+    assert 'Content-Encoding' not in response.headers
+    assert b'body' in response.data
+    assert client.get('/assets/css/home.css').status_code == 404
+
+
+def test_posters_are_served_from_local_thumbnails(tmp_path):
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'POSTERS_ENABLED': True,
+        'POSTER_CACHE_DIR': str(tmp_path), 'POSTER_SOURCE_DIR': str(tmp_path / 'source'),
+        'POSTER_DEFAULT': os.path.join('static', 'logo.png')
+    })
+    app.extensions['posters'].join()
+    client = app.test_client()
+    AuthenticationManager(client).login()
+
+    response = client.get('/articles_by_date?date=2015-02-02')
+    filename = app.extensions['posters'].poster_filename(1, 'large')
+    assert f'/posters/{filename}'.encode() in response.data
+    assert b'blogspot' not in response.data
+
+    response = client.get(f'/posters/{filename}')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_profiling(profiling_client, profiling_auth):
+    profiling_auth.login()
+    token = {'X-Profile': 'profiling-token'}
+
+    # Requests without the profiling token aren't profiled, and profiles are only listed for requests with it.
+    profiling_client.get('/articles_by_date?date=2015-02-02')
+    profiling_client.get('/articles_by_date?date=2015-02-02', headers={'X-Profile': '1'})
+    assert profiling_client.get('/profiles/').status_code == 403
+    assert profiling_client.get('/profiles/', headers={'X-Profile': '1'}).status_code == 403
+    response = profiling_client.get('/profiles/', headers=token)
+    assert b'No requests have been profiled yet.' in response.data
+
+    for target_date in ('2015-02-02', '2007-02-02', '2007-02-07'):
+        profiling_client.get(f'/articles_by_date?date={target_date}', headers=token)
+
+    # Only the newest two profiles are kept, and the index lists them with their route and parameters.
+    response = profiling_client.get('/profiles/', headers=token)
+    assert response.data.count(b'news_bp.articles_by_date') == 2
+    assert b'date=2015-02-02' not in response.data
+    assert b'date=2007-02-07' in response.data
+
+    filename = re.search(rb'/profiles/([^"]+\.prof)', response.data).group(1).decode()
+    assert profiling_client.get(f'/profiles/{filename}').status_code == 403
+    assert profiling_client.get(f'/profiles/{filename}', headers=token).status_code == 200
+
+
+def test_profiling_without_a_token_only_samples(tmp_path):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'PROFILING_ENABLED': True,
+                      'PROFILING_DIR': str(tmp_path)})
+    client = app.test_client()
+
+    client.get('/articles_by_date?date=2015-02-02', headers={'X-Profile': '1'})
+    assert os.listdir(tmp_path) == []
+    assert client.get('/profiles/', headers={'X-Profile': '1'}).status_code == 404
+
+
+def test_articles_by_date_range(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_date_range?year=2014&cursor=3')
+    assert b'Movies from 2014 (91)' in response.data
+    assert b'/articles_by_date_range?cursor=6&amp;year=2014' in response.data
+    assert b'/articles_by_date_range?cursor=90&amp;year=2014' in response.data
+
+    response = client.get('/articles_by_date_range?start=2015-02-02&end=2015-02-02')
+    assert b'Guardians of the Galaxy (2014)    -   8/10' in response.data
+    assert client.get('/articles_by_date_range?start=2015-02-02').status_code == 400
+    assert client.get('/articles_by_date_range?year=2014&cursor=-5').status_code == 400
+
+
+def test_archive(client, auth):
+    auth.login()
+
+    response = client.get('/archive')
+    assert b'href="/archive?year=2007"' in response.data
+    assert b'(44 movies)' in response.data
+
+    response = client.get('/archive?year=2015')
+    assert b'Archive for 2015' in response.data
+    assert b'href="/archive?year=2015&amp;month=2"' in response.data
+
+    response = client.get('/archive?year=2015&month=2')
+    assert b'href="/articles_by_date?date=2015-02-02"' in response.data
+    assert client.get('/archive?year=2015&month=13').status_code == 404
+    assert client.get('/archive?year=9999&month=12').status_code == 404
+    assert client.get('/archive?year=10000&month=1').status_code == 404
+    assert client.get('/archive?year=0').status_code == 404
+
+
+def test_profile(client, auth):
+    auth.login()
+    for i in range(11):
+        client.post('/comment', data={'comment': f'Comment number {i}', 'article_id': 2})
+
+    response = client.get('/profile')
+    assert b'Comments by thorke (12)' in response.data
+    assert b'Comment number 10' in response.data
+    assert b'Comment number 1,' in response.data
+    assert b'Comment number 0' not in response.data
+    assert b'/profile?cursor=10&amp;user=thorke' in response.data
+
+    response = client.get('/profile?user=thorke&cursor=10')
+    assert b'Comment number 0' in response.data
+    assert b'I love this movie!' in response.data
+    assert b'href="/articles_by_date?date=2015-02-02&amp;view_comments_for=1"' in response.data
+
+    # Commenters' names link to their profiles.
+    response = client.get('/articles_by_date?date=2015-02-02&view_comments_for=1')
+    assert b'href="/profile?user=fmercury"' in response.data
+
+    assert b'Comments by fmercury (1)' in client.get('/profile?user=fmercury').data
+    assert client.get('/profile?user=nobody').status_code == 404
+
+
+def test_articles_by_stats(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_stats?min_rating=8&max_runtime=120&sort=revenue')
+    assert response.status_code == 200
+    assert 'Articles with rating ≥ 8, runtime &lt; 120, sorted by highest revenue'.encode() in response.data
+
+    # The highest grossing movies rated 8 or more that run for under two hours, in order.
+    titles = [b'Toy Story 3 (2010)    -   8/10', b'Deadpool (2016)    -   8/10', b'Inside Out (2015)    -   8/10']
+    positions = [response.data.index(title) for title in titles]
+    assert positions == sorted(positions)
+    assert b'/articles_by_stats?cursor=3&amp;min_rating=8&amp;max_runtime=120&amp;sort=revenue' in response.data
+
+
+def test_articles_by_facet(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_facet?genre=Animation&year=2016')
+    assert response.status_code == 200
+    assert b'18 matching articles' in response.data
+    assert b'Sing (2016)' in response.data
+    assert b'/articles_by_facet?cursor=3&amp;genre=Animation&amp;year=2016' in response.data
+
+    # A negative cursor starts at the beginning.
+    response = client.get('/articles_by_facet?genre=Animation&year=2016&cursor=-3')
+    assert response.status_code == 200
+    assert b'Sing (2016)' in response.data
+
+    # Each facet value links to the selection with that value toggled.
+    assert b'/articles_by_facet?genre=Animation&amp;genre=Comedy&amp;year=2016' in response.data
+    assert b'/articles_by_facet?genre=Animation' in response.data
+
+
+def test_articles_by_tag_query(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_tags', query_string={'q': 'Animation AND Comedy NOT Family'})
+    assert response.status_code == 200
+    assert b'Articles tagged Animation AND Comedy NOT Family' in response.data
+    assert b'/articles_by_tags?cursor=3&amp;q=Animation+AND+Comedy+NOT+Family' in response.data
+
+    response = client.get('/articles_by_tags', query_string={'q': 'Animation AND'})
+    assert response.status_code == 200
+    assert b'Invalid tag query: The query ends unexpectedly' in response.data
+
+
+def test_articles_by_person(client, auth):
+    auth.login()
+
+    response = client.get('/articles_by_person', query_string={'person': ['Christopher Nolan', 'Christian Bale']})
+    assert response.status_code == 200
+    assert b'Movies with Christopher Nolan and Christian Bale' in response.data
+    assert b'The Dark Knight (2008)' in response.data
+
+    # Names link to their person pages.
+    assert b'/articles_by_person?person=Heath+Ledger' in response.data
+
+
+def test_articles_list_similar_movies(client, auth, monkeypatch):
+    auth.login()
+
+    response = client.get('/articles_by_person?person=Christopher+Nolan&person=Heath+Ledger')
+    assert b'Similar movies:' in response.data
+    assert b'The Prestige (2006)' in response.data
+
+    # Similar movies change as movies are added, so they aren't kept in the cached article fragment.
+    monkeypatch.setattr(news, 'get_similar_articles_and_urls',
+                        lambda article_id: [{'title': 'A Newly Added Movie', 'hyperlink': '/articles_by_date'}])
+    response = client.get('/articles_by_person?person=Christopher+Nolan&person=Heath+Ledger')
+    assert b'A Newly Added Movie' in response.data
+    assert b'The Prestige (2006)' not in response.data
+
+
+def test_memory_diagnostics(client):
+    assert client.get('/diagnostics/memory').status_code == 404
+
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'DIAGNOSTICS_TOKEN': 'secret'})
+    client = app.test_client()
+    assert client.get('/diagnostics/memory').status_code == 403
+
+    report = client.get('/diagnostics/memory', headers={'X-Diagnostics-Token': 'secret'}).get_json()
+    assert report['structures']['articles']['entities'] == 1000
+    assert 'cache.article_text' in report['structures']
+    assert 'budget' not in report
+
+
+def test_writes_are_rejected_over_the_memory_budget():
+    app = create_app({
+        'TESTING': True, 'TEST_DATA_PATH': TEST_DATA_PATH, 'WTF_CSRF_ENABLED': False, 'MEMORY_BUDGET_MB': 0.001,
+        'MEMORY_BUDGET_REJECT_WRITES': True
+    })
+    client = app.test_client()
+
+    # Logging in stores nothing, so it's allowed.
+    assert AuthenticationManager(client).login().status_code == 302
+
+    response = client.post('/comment', data={'comment': 'Over budget?', 'article_id': 2})
+    assert response.status_code == 503
+    assert 'Over budget?' not in client.get('/articles_by_date?date=2015-02-02&view_comments_for=2').get_data(
+        as_text=True)
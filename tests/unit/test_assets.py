@@ -0,0 +1,38 @@
+import gzip
+import os
+
+from movie.assets.build import build_assets, load_manifest
+
+
+def test_build_assets_writes_fingerprinted_and_compressed_files(tmp_path):
+    static_dir = tmp_path / 'static'
+    (static_dir / 'css').mkdir(parents=True)
+    (static_dir / 'css' / 'main.css').write_text('body { margin: 0; }\n' * 50)
+    (static_dir / 'logo.png').write_bytes(b'\x89PNG not really')
+    output_dir = tmp_path / 'assets'
+
+    manifest = build_assets(str(static_dir), str(output_dir))
+
+    css = manifest['css/main.css']
+    assert css['file'].startswith('css/main.') and css['file'].endswith('.css')
+    assert 'gzip' in css['encodings']
+    with gzip.open(str(output_dir / (css['file'] + '.gz')), 'rt') as infile:
+        assert infile.read() == 'body { margin: 0; }\n' * 50
+
+    # Images aren't compressed.
+    assert manifest['logo.png']['encodings'] == list()
+    assert not os.path.exists(str(output_dir / (manifest['logo.png']['file'] + '.gz')))
+
+    assert load_manifest(str(output_dir)) == manifest
+    assert load_manifest(str(tmp_path)) is None
+
+
+def test_built_names_change_with_content(tmp_path):
+    static_dir = tmp_path / 'static'
+    static_dir.mkdir()
+    (static_dir / 'site.css').write_text('a {}')
+    first = build_assets(str(static_dir), str(tmp_path / 'first'))['site.css']['file']
+    (static_dir / 'site.css').write_text('b {}')
+    second = build_assets(str(static_dir), str(tmp_path / 'second'))['site.css']['file']
+
+    assert first != second
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from movie.adapters.async_repository import AsyncAbstractRepository, AsyncSqliteRepository, ThreadPoolRepository
+from movie.adapters.repository import AbstractRepository
+from movie.articles import services as article_services
+from movie.authentication import services as auth_services
+
+from tests.conftest import TEST_DATA_PATH
+
+
+def test_async_interface_mirrors_the_repository_interface():
+    assert AsyncAbstractRepository.__abstractmethods__ == AbstractRepository.__abstractmethods__
+    assert AsyncAbstractRepository.__abstractmethods__ <= set(vars(ThreadPoolRepository))
+
+
+def test_thread_pool_repository_runs_the_wrapped_repository(in_memory_repo):
+    async def browse(repo):
+        articles, prev_date, next_date = await article_services.get_articles_by_date_async(
+            in_memory_repo.get_first_article().date, repo)
+        tag_ids = await article_services.get_article_ids_for_tag_async('Sci-Fi', repo)
+        return articles, prev_date, next_date, tag_ids
+
+    repo = ThreadPoolRepository(in_memory_repo)
+    articles, prev_date, next_date, tag_ids = asyncio.run(browse(repo))
+    repo.close()
+
+    first_date = in_memory_repo.get_first_article().date
+    assert (articles, prev_date, next_date) == article_services.get_articles_by_date(first_date, in_memory_repo)
+    assert tag_ids == in_memory_repo.get_article_ids_for_tag('Sci-Fi')
+
+
+def test_thread_pool_repository_serves_concurrent_requests(in_memory_repo):
+    async def fetch_all(repo):
+        return await asyncio.gather(*(article_services.get_article_async(id, repo) for id in range(1, 51)))
+
+    repo = ThreadPoolRepository(in_memory_repo, max_workers=8, concurrent_reads=True)
+    articles = asyncio.run(fetch_all(repo))
+    repo.close()
+
+    assert [article['id'] for article in articles] == list(range(1, 51))
+
+
+def test_async_services_can_add_a_user_and_comment(in_memory_repo):
+    async def sign_up_and_comment(repo):
+        await auth_services.add_user_async('pmccartney', 'abcd1A23', repo)
+        await auth_services.authenticate_user_async('pmccartney', 'abcd1A23', repo)
+        with pytest.raises(auth_services.AuthenticationException):
+            await auth_services.authenticate_user_async('pmccartney', 'wrong', repo)
+        with pytest.raises(auth_services.NameNotUniqueException):
+            await auth_services.add_user_async('pmccartney', 'abcd1A23', repo)
+
+        await article_services.add_comment_async(3, 'Great soundtrack', 'pmccartney', repo)
+        with pytest.raises(article_services.NonExistentArticleException):
+            await article_services.add_comment_async(5000, 'Hmm', 'pmccartney', repo)
+        return await article_services.get_comments_for_article_async(3, repo)
+
+    repo = ThreadPoolRepository(in_memory_repo)
+    comments = asyncio.run(sign_up_and_comment(repo))
+    repo.close()
+
+    assert comments[-1]['username'] == 'pmccartney'
+    assert comments[-1]['comment_text'] == 'Great soundtrack'
+
+
+def test_async_sqlite_repository_can_be_populated_and_queried(in_memory_repo):
+    async def load_and_query(repo):
+        await repo.populate(TEST_DATA_PATH)
+        return (await repo.get_number_of_articles(),
+                await article_services.get_article_ids_for_tag_query_async('Sci-Fi AND NOT Action', repo),
+                await article_services.get_similar_articles_async(1, 3, repo))
+
+    repo = AsyncSqliteRepository()
+    number_of_articles, tag_query_ids, similar = asyncio.run(load_and_query(repo))
+    repo.close()
+
+    assert number_of_articles == 1000
+    assert tag_query_ids == article_services.get_article_ids_for_tag_query('Sci-Fi AND NOT Action', in_memory_repo)
+    assert [article['id'] for article in similar] == in_memory_repo.get_similar_article_ids(1, 3)
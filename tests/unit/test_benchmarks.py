@@ -0,0 +1,55 @@
+from benchmarks.generate import generate_catalog
+from benchmarks.load import FlaskClientTransport, percentile, run_load
+from benchmarks.run import compare
+from movie import create_app
+from movie.adapters import memory_repository
+import movie.adapters.repository as repo
+from movie.adapters.memory_repository import MemoryRepository
+
+
+def test_generated_catalog_can_be_loaded(tmp_path):
+    generate_catalog(str(tmp_path), 250, users=2, comments=30)
+
+    repo = MemoryRepository()
+    memory_repository.populate(str(tmp_path), repo)
+
+    assert repo.get_number_of_articles() == 250
+    assert len(repo.get_comments()) == 30
+    assert repo.get_user('user2') is not None
+    assert len(repo.get_tags()) > 0
+
+    # Every generated article has text that can be rendered.
+    assert all(article.first_para for article in repo.get_articles_by_id(range(1, 251)))
+
+
+def test_compare_reports_only_significant_slowdowns():
+    baseline = {'fast': {'median_ms': 1.0}, 'noisy': {'median_ms': 0.001}, 'stable': {'median_ms': 5.0}}
+    results = {'fast': {'median_ms': 1.5}, 'noisy': {'median_ms': 0.004}, 'stable': {'median_ms': 5.1},
+               'new': {'median_ms': 3.0}}
+
+    assert compare(results, baseline, threshold=0.2) == [('fast', 1.0, 1.5)]
+
+
+def test_percentile():
+    samples = list(range(100, 0, -1))
+
+    assert percentile(samples, 0.5) == 51
+    assert percentile(samples, 0.99) == 100
+    assert percentile([7.0], 0.95) == 7.0
+
+
+def test_load_sessions_cover_the_visitor_routes(tmp_path):
+    generate_catalog(str(tmp_path), 250, users=2, comments=30)
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': str(tmp_path)})
+
+    # Every session registers or logs in, with CSRF tokens taken from the forms, and posts a comment.
+    report = run_load(lambda: FlaskClientTransport(app), sessions=4, concurrency=2, users=2, register_fraction=0.5,
+                      comment_probability=1.0)
+
+    assert report['all']['errors'] == 0
+    assert report['POST /authentication/login']['requests'] == 4
+    assert report['POST /comment']['requests'] == 4
+    assert report['GET /articles_by_date']['requests'] >= 4
+    assert report['GET /articles_by_tag']['requests'] >= 4
+    assert report['all']['p50_ms'] <= report['all']['p95_ms'] <= report['all']['p99_ms']
+    assert len(repo.repo_instance.get_comments()) == 34
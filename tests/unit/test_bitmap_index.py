@@ -0,0 +1,58 @@
+from movie.adapters.bitmap_index import Bitmap, FacetIndex, rating_band
+
+
+def test_bitmap_set_operations():
+    first = Bitmap.from_rows([1, 5, 70000, 140000])
+    second = Bitmap.from_rows([5, 6, 140000])
+
+    assert list((first & second).rows()) == [5, 140000]
+    assert list((first | second).rows()) == [1, 5, 6, 70000, 140000]
+    assert list((first - second).rows()) == [1, 70000]
+    assert first.intersection_count(second) == 2
+    assert len(first) == 4
+    assert 70000 in first and 70001 not in first
+
+
+def test_bitmap_sets_rows_added_after_it_was_read():
+    bitmap = Bitmap()
+    bitmap.add(3)
+    assert list(bitmap.rows()) == [3]
+
+    bitmap.add(1)
+    bitmap.add(200000)
+    assert list(bitmap.rows()) == [1, 3, 200000]
+    assert not Bitmap()
+
+
+def test_rating_band():
+    assert rating_band(7.9) == 7
+    assert rating_band(8.0) == 8
+    assert rating_band(10.0) == 9
+
+
+def test_facet_index_selects_any_value_within_a_facet_and_all_facets():
+    index = FacetIndex()
+    index.add(0, ['Action', 'Comedy'], 2016, 7.5)
+    index.add(1, ['Action'], 2015, 8.1)
+    index.add(2, ['Comedy'], 2016, 6.0)
+    index.add(3, ['Drama'], 2016, 7.2)
+
+    assert list(index.select({'genre': ['Action', 'Comedy']}).rows()) == [0, 1, 2]
+    assert list(index.select({'genre': ['Action', 'Comedy'], 'year': [2016]}).rows()) == [0, 2]
+    assert list(index.select({'genre': ['Action'], 'rating': [7]}).rows()) == [0]
+    assert list(index.select({'genre': [], 'year': []}).rows()) == [0, 1, 2, 3]
+    assert list(index.select({'genre': ['Western']}).rows()) == []
+
+
+def test_facet_counts_ignore_the_facets_own_selection():
+    index = FacetIndex()
+    index.add(0, ['Action', 'Comedy'], 2016, 7.5)
+    index.add(1, ['Action'], 2015, 8.1)
+    index.add(2, ['Comedy'], 2016, 6.0)
+    index.add(3, ['Drama'], 2016, 7.2)
+
+    counts = index.counts({'genre': ['Action'], 'year': [2016]})
+
+    assert counts['genre'] == {'Action': 1, 'Comedy': 2, 'Drama': 1}
+    assert counts['year'] == {2015: 1, 2016: 1}
+    assert counts['rating'] == {6: 0, 7: 1, 8: 0}
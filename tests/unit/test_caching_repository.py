@@ -0,0 +1,151 @@
+from datetime import date, datetime
+
+from movie.adapters.caching_repository import CachingRepository, ExpiringLRUCache, approximate_size
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import Article, Tag, make_comment, make_tag_association
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRepository:
+    # Counts the calls made to the wrapped repository.
+
+    def __init__(self, repo):
+        self._repo = repo
+        self.calls = dict()
+
+    def __getattr__(self, name):
+        method = getattr(self._repo, name)
+        if not callable(method):
+            return method
+
+        def call(*args):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return method(*args)
+        return call
+
+
+def test_caching_repository_implements_every_method():
+    assert AbstractRepository.__abstractmethods__ <= set(vars(CachingRepository))
+
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = ExpiringLRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.evictions == 1
+
+
+def test_cache_keeps_within_its_memory_cap():
+    cache = ExpiringLRUCache(max_bytes=2000)
+    for key in range(10):
+        cache.put(key, list(range(40)))
+
+    assert 0 < cache.bytes <= 2000
+    assert cache.size < 10
+
+
+def test_cache_entries_expire():
+    clock = FakeClock()
+    cache = ExpiringLRUCache(ttl=10, clock=clock)
+    cache.put('a', 1)
+
+    clock.now = 9
+    assert cache.get('a') == 1
+    clock.now = 11
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+
+
+def test_caching_repository_serves_repeated_reads_from_the_cache(in_memory_repo):
+    counting_repo = CountingRepository(in_memory_repo)
+    repo = CachingRepository(counting_repo)
+
+    for _ in range(3):
+        article = repo.get_article(1)
+        repo.get_articles_by_date(article.date)
+        repo.get_date_of_next_article(article)
+        repo.get_article_ids_for_tag('Sci-Fi')
+        repo.get_article(5000)
+
+    assert counting_repo.calls == {'get_article': 2, 'get_articles_by_date': 1, 'get_date_of_next_article': 1,
+                                   'get_article_ids_for_tag': 1}
+    assert repo.cache.hits == 10
+    assert repo.get_article(1) is in_memory_repo.get_article(1)
+
+
+def test_adding_a_comment_invalidates_only_its_article(in_memory_repo):
+    counting_repo = CountingRepository(in_memory_repo)
+    repo = CachingRepository(counting_repo)
+    article = repo.get_article(1)
+    repo.get_article(2)
+
+    comment = make_comment('Loved it', in_memory_repo.get_user('thorke'), article, datetime(2020, 3, 1))
+    repo.add_comment(comment)
+    repo.get_article(1)
+    repo.get_article(2)
+
+    assert counting_repo.calls['get_article'] == 3
+    assert repo.cache.invalidations == 1
+
+
+def test_adding_an_article_invalidates_the_dates_it_changes(in_memory_repo):
+    repo = CachingRepository(in_memory_repo)
+    first = in_memory_repo.get_first_article()
+    last = in_memory_repo.get_last_article()
+
+    assert repo.get_date_of_previous_article(last) is not None
+    assert repo.get_date_of_previous_article(first) is None
+    assert repo.get_article_ids_for_tag('Documentary') == list()
+
+    earlier_date = date(first.date.year - 1, 1, 1)
+    new_article = Article(earlier_date, 'Early', 'An early movie', 'https://example.com', 'https://example.com', 5001)
+    make_tag_association(new_article, Tag('Documentary'))
+    repo.add_article(new_article)
+
+    # The first article now has a previous date, but the last article's previous date is unchanged.
+    assert repo.get_date_of_previous_article(first) == earlier_date
+    assert repo.get_date_of_next_article(new_article) == first.date
+    assert repo.get_article(5001) is new_article
+    assert repo.cache.invalidations == 2
+
+
+def test_adding_an_article_only_invalidates_the_dates_around_it(in_memory_repo):
+    repo = CachingRepository(in_memory_repo)
+    dates = in_memory_repo.get_calendar()
+    first_date = in_memory_repo.get_first_article().date
+    second_date = dates.next_date(first_date)
+    third_date = dates.next_date(second_date)
+    while (third_date - second_date).days < 2:
+        first_date, second_date, third_date = second_date, third_date, dates.next_date(third_date)
+    for day in (first_date, second_date, third_date):
+        article = in_memory_repo.get_articles_by_date(day)[0]
+        repo.get_date_of_previous_article(article)
+        repo.get_date_of_next_article(article)
+
+    # A new date between the second and third dates is the third's previous date and the second's next date.
+    new_date = second_date + (third_date - second_date) / 2
+    assert second_date < new_date < third_date
+    repo.add_article(Article(new_date, 'Between', 'A movie', 'https://example.com', 'https://example.com', 5001))
+
+    assert repo.cache.invalidations == 2
+    assert repo.get_date_of_previous_article(in_memory_repo.get_articles_by_date(third_date)[0]) == new_date
+    assert repo.get_date_of_next_article(in_memory_repo.get_articles_by_date(second_date)[0]) == new_date
+
+
+def test_caching_repository_sizes_snapshots_with_everything_they_hold(sqlite_repo):
+    repo = CachingRepository(sqlite_repo)
+    article = repo.get_article(1)
+
+    assert repo.cache.bytes > approximate_size(article) + sum(approximate_size(tag) for tag in article.tags)
@@ -0,0 +1,45 @@
+from datetime import date
+
+from movie.adapters.calendar_index import CalendarIndex
+
+
+def make_calendar():
+    calendar = CalendarIndex()
+    for day in (date(2020, 3, 15), date(2019, 12, 31), date(2020, 3, 15), date(2020, 1, 2), date(2020, 3, 1)):
+        calendar.add(day)
+    return calendar
+
+
+def test_calendar_index_finds_first_last_and_adjacent_dates():
+    calendar = make_calendar()
+
+    assert len(calendar) == 4
+    assert calendar.first_date() == date(2019, 12, 31)
+    assert calendar.last_date() == date(2020, 3, 15)
+    assert calendar.previous_date(date(2020, 3, 1)) == date(2020, 1, 2)
+    assert calendar.next_date(date(2020, 3, 1)) == date(2020, 3, 15)
+
+    # Dates without Articles have adjacent dates too.
+    assert calendar.next_date(date(2020, 2, 1)) == date(2020, 3, 1)
+    assert calendar.previous_date(date(2019, 12, 31)) is None
+    assert calendar.next_date(date(2020, 3, 15)) is None
+
+
+def test_calendar_index_counts_articles_by_day_month_and_year():
+    calendar = make_calendar()
+
+    assert calendar.count(date(2020, 3, 15)) == 2
+    assert calendar.count(date(2020, 3, 16)) == 0
+    assert calendar.years() == [(2019, 1), (2020, 4)]
+    assert calendar.months(2020) == [(1, 1), (3, 3)]
+    assert calendar.days(2020, 3) == [(date(2020, 3, 1), 1), (date(2020, 3, 15), 2)]
+    assert calendar.days(2019, 12) == [(date(2019, 12, 31), 1)]
+    assert calendar.months(2018) == list()
+
+
+def test_empty_calendar_index():
+    calendar = CalendarIndex.from_counts(list())
+
+    assert calendar.first_date() is None
+    assert calendar.last_date() is None
+    assert calendar.years() == list()
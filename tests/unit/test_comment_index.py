@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from movie.adapters.comment_index import UserCommentIndex
+from movie.domain.model import Article, User, make_comment
+
+
+def test_user_comment_index_pages_newest_first():
+    user = User('dbowie', '1234567890')
+    article = Article(None, 'Title', 'Text', None, None, 1)
+    index = UserCommentIndex()
+    comments = [make_comment(f'Comment {hour}', user, article, datetime(2020, 1, 1, hour)) for hour in (9, 12, 10, 12)]
+    for comment in comments:
+        index.add(comment)
+
+    # The late comment from 10:00 is slotted in by time; of the two at 12:00, the one added last comes first.
+    assert index.newest_first('dbowie') == [comments[3], comments[1], comments[2], comments[0]]
+    assert index.newest_first('dbowie', 1, 2) == [comments[1], comments[2]]
+    assert index.newest_first('dbowie', 3, 2) == [comments[0]]
+    assert index.newest_first('dbowie', 4) == []
+    assert index.count('dbowie') == 4
+
+
+def test_user_comment_index_has_nothing_for_an_unknown_user():
+    index = UserCommentIndex()
+
+    assert index.newest_first('nobody', 0, 10) == []
+    assert index.count('nobody') == 0
@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+
+from movie.adapters.budgeted_repository import BudgetedRepository, MemoryBudget, MemoryBudgetExceeded
+from movie.adapters.caching_repository import CachingRepository
+from movie.diagnostics.memory import deep_size, memory_report, repository_memory
+from movie.domain.model import Article, MovieDetails, Tag, User, make_comment
+
+
+def test_deep_size_stops_at_entities_owned_elsewhere():
+    details = MovieDetails('Title', 2014, 'Plot', 'Director', 'Actor', 8.1, 76, 121, 333.13, 757074)
+    article = Article(None, 'Title', 'Text', None, None, 1, details)
+    tag = Tag('Action')
+    article.add_tag(tag)
+
+    seen = set()
+    articles = deep_size([article], seen, (Article, MovieDetails))
+    assert articles['entities'] == 1
+    assert id(details) in seen
+    assert id(tag) not in seen
+
+    # Objects already counted aren't counted again.
+    assert deep_size([article], seen, (Article, MovieDetails))['objects'] == 1
+
+
+def test_repository_memory_splits_entities_and_indexes(in_memory_repo):
+    report = repository_memory(CachingRepository(in_memory_repo))
+
+    assert report['articles']['entities'] == 1000
+    assert report['users']['entities'] == 3
+    assert report['comments']['entities'] == 3
+    assert report['index.calendar']['bytes'] > 0
+    assert report['index.calendar']['entities'] == 0
+    assert 'index.deferring_sort' not in report
+    assert report['total']['bytes'] == sum(structure['bytes'] for name, structure in report.items() if name != 'total')
+
+
+def test_memory_report_includes_the_budget(in_memory_repo):
+    report = memory_report(in_memory_repo, budget=MemoryBudget(1000, measure=lambda: 1500))
+
+    assert report['budget'] == {'limit_bytes': 1000, 'used_bytes': 1500, 'exceeded': True, 'reject_writes': False}
+    assert report['top_allocators'] == [] or report['traced_bytes'] is not None
+
+
+def test_memory_budget_warns_once_per_excess(caplog):
+    used = [500]
+    budget = MemoryBudget(1000, measure=lambda: used[0])
+
+    with caplog.at_level(logging.WARNING):
+        budget.check()
+        used[0] = 1500
+        budget.check()
+        budget.check()
+        used[0] = 500
+        budget.check()
+        used[0] = 2000
+        budget.check()
+
+    assert len(caplog.records) == 2
+    assert not budget.reject_writes
+
+
+def test_budgeted_repository_rejects_writes_over_budget(in_memory_repo):
+    used = [500]
+    repo = BudgetedRepository(in_memory_repo, MemoryBudget(1000, reject_writes=True, measure=lambda: used[0]))
+    repo.add_user(User('budget1', 'Password1'))
+
+    used[0] = 1500
+    with pytest.raises(MemoryBudgetExceeded):
+        repo.add_user(User('budget2', 'Password1'))
+    with pytest.raises(MemoryBudgetExceeded):
+        repo.add_comment(make_comment('Too late', repo.get_user('budget1'), repo.get_article(1)))
+
+    # Reads still work.
+    assert repo.get_user('budget1') is not None
+    assert repo.get_user('budget2') is None
+    assert len(repo.get_comments()) == 3
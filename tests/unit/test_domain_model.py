@@ -1,6 +1,7 @@
 from datetime import date
 
-from movie.domain.model import User, Article, Tag, make_comment, make_tag_association, ModelException
+from movie.domain.model import User, Article, Tag, MovieDetails, Person, make_comment, make_tag_association, ModelException
+from movie.domain.narrative import RenderedTextCache
 
 import pytest
 
@@ -117,3 +118,80 @@ def test_make_tag_associations_with_article_already_tagged(article, tag):
 
     with pytest.raises(ModelException):
         make_tag_association(article, tag)
+
+
+@pytest.fixture()
+def details():
+    return MovieDetails(
+        'The Devil Wears Prada', 2006,
+        'A smart but sensible new graduate lands a job as an assistant to Miranda Priestly, the demanding '
+        'editor-in-chief of a high fashion magazine.',
+        'David Frankel', 'Anne Hathaway, Meryl Streep, Adrian Grenier, Emily Blunt', 6.8, 62, 109, 124.73
+    )
+
+
+def test_article_renders_title_and_first_para_from_details(article, details):
+    lazy_article = Article(
+        date.fromisoformat('2007-02-02'), None, None, article.hyperlink, article.image_hyperlink, details=details
+    )
+
+    assert lazy_article.details is details
+    assert Article(date.fromisoformat('2007-02-02'), None, None, None, None, details=details).hyperlink == \
+        article.hyperlink
+    assert lazy_article.title == 'The Devil Wears Prada (2006)    -   6/10'
+    assert lazy_article.first_para == article.first_para
+
+
+def test_rendered_text_cache_evicts_least_recently_used_text():
+    cache = RenderedTextCache(max_size=2)
+
+    assert cache.get('a', lambda: 'A') == 'A'
+    assert cache.get('b', lambda: 'B') == 'B'
+    assert cache.get('a', lambda: 'not rendered') == 'A'
+    assert cache.get('c', lambda: 'C') == 'C'
+
+    # 'b' was the least recently used entry, so it's rendered again.
+    assert cache.get('b', lambda: 'B again') == 'B again'
+    assert cache.size == 2
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_rendered_text_cache_with_no_capacity_renders_every_time():
+    cache = RenderedTextCache()
+
+    cache.get('a', lambda: 'A')
+    assert cache.get('a', lambda: 'A again') == 'A again'
+    assert cache.size == 0
+
+
+def test_movie_details_splits_actor_names():
+    details = MovieDetails('The Dark Knight', 2008, 'Plot', 'Christopher Nolan',
+                           'Christian Bale, Heath Ledger, Aaron Eckhart,Michael Caine', 9.0, 82, 152, 533.32)
+
+    assert details.actor_names == ['Christian Bale', 'Heath Ledger', 'Aaron Eckhart', 'Michael Caine']
+    assert details.actors == 'Christian Bale, Heath Ledger, Aaron Eckhart,Michael Caine'
+
+
+def test_movie_details_can_share_names():
+    pool = dict()
+    details = [MovieDetails('Movie', 2008, 'Plot', ''.join(['Christopher', ' Nolan']), 'Christian Bale, Michael Caine',
+                            9.0, 82, 152, 533.32) for _ in range(2)]
+    for movie in details:
+        movie.share_names(lambda name: pool.setdefault(name, name))
+
+    assert details[0].director is details[1].director
+    assert details[0].actors is details[1].actors
+    assert details[1].actors == 'Christian Bale, Michael Caine'
+
+
+def test_person_is_credited_by_role(article):
+    person = Person('Ben Affleck')
+    person.add_article(article, Person.DIRECTOR)
+    person.add_article(article, Person.ACTOR)
+
+    assert list(person.directed_articles) == [article]
+    assert list(person.starring_articles) == [article]
+    assert person.number_of_articles == 2
+
+    with pytest.raises(ModelException):
+        person.add_article(article, 'producer')
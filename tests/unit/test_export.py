@@ -0,0 +1,57 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from movie.domain.model import Article, make_comment
+from movie.export import datasets
+from movie.export.datasets import export
+
+
+def test_export_articles_as_csv(in_memory_repo, monkeypatch):
+    # Small pages, so the export reads several.
+    monkeypatch.setattr(datasets, 'ARTICLES_PER_PAGE', 64)
+    rows = list(csv.DictReader(io.StringIO(''.join(export('articles', 'csv', in_memory_repo)))))
+
+    assert len(rows) == 1000
+    assert len({row['id'] for row in rows}) == 1000
+    assert [row['date'] for row in rows] == sorted(row['date'] for row in rows)
+    guardians = next(row for row in rows if row['id'] == '1')
+    assert guardians['name'] == 'Guardians of the Galaxy'
+    assert guardians['genres'] == 'Action,Adventure,Sci-Fi,Comedy'
+
+
+def test_export_articles_from_a_snapshot(in_memory_repo, monkeypatch):
+    monkeypatch.setattr(datasets, 'ARTICLES_PER_PAGE', 64)
+    records = datasets.article_records(in_memory_repo)
+    first_page = [next(records) for _ in range(64)]
+
+    # An Article added at the start of the range while the export is being read doesn't shift the later pages.
+    first_date = in_memory_repo.get_calendar().first_date()
+    in_memory_repo.add_article(Article(first_date, 'Posted mid-export', None, None, None, 1001))
+    ids = [record['id'] for record in first_page + list(records)]
+
+    assert len(ids) == 1000
+    assert sorted(ids) == list(range(1, 1001))
+
+
+def test_export_users_without_passwords(in_memory_repo):
+    records = [json.loads(line) for line in export('users', 'jsonl', in_memory_repo)]
+
+    assert records == [{'username': 'thorke'}, {'username': 'fmercury'}, {'username': 'mjackson'}]
+
+
+def test_export_comments_from_a_snapshot(in_memory_repo):
+    number_of_comments = len(in_memory_repo.get_comments())
+    chunks = export('comments', 'jsonl', in_memory_repo, compress_level=6)
+
+    # A comment added while the export is being read isn't included.
+    article = in_memory_repo.get_article(2)
+    in_memory_repo.add_comment(make_comment('Posted mid-export', in_memory_repo.get_user('thorke'), article,
+                                            datetime(2020, 3, 1)))
+    lines = gzip.decompress(b''.join(chunks)).decode('utf-8').splitlines()
+
+    assert len(lines) == number_of_comments
+    assert json.loads(lines[0]) == {'article_id': 1, 'username': 'fmercury', 'comment': 'Boo!',
+                                    'timestamp': '2020-02-28 14:31:26'}
@@ -0,0 +1,37 @@
+import random
+
+from movie.adapters.leaderboard import Leaderboard
+
+
+def test_leaderboard_keeps_the_highest_scores():
+    board = Leaderboard(size=3)
+    for article_id, score in [(1, 5), (2, 9), (3, 1), (4, 7), (5, 7)]:
+        board.update(article_id, score)
+
+    # Ties go to the lower id.
+    assert board.top() == [2, 4, 5]
+    assert board.top(2) == [2, 4]
+
+
+def test_leaderboard_moves_articles_whose_score_rises():
+    board = Leaderboard(size=2)
+    board.update(1, 1)
+    board.update(2, 2)
+    board.update(1, 3)
+    board.update(3, 3)
+
+    assert board.top() == [1, 3]
+    assert len(board) == 2
+
+
+def test_leaderboard_matches_a_full_sort_for_increasing_scores():
+    generator = random.Random(235)
+    board = Leaderboard(size=5)
+    counts = dict()
+    for _ in range(2000):
+        article_id = generator.randint(1, 100)
+        counts[article_id] = counts.get(article_id, 0) + 1
+        board.update(article_id, counts[article_id])
+
+    expected = sorted(counts, key=lambda article_id: (-counts[article_id], article_id))[:5]
+    assert board.top() == expected
@@ -1,10 +1,13 @@
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import List
 
 import pytest
 
-from movie.domain.model import User, Article, Tag, Comment, make_comment
+from movie.domain.model import User, Article, Tag, Comment, make_comment, make_tag_association
 from movie.adapters.repository import RepositoryException
+from movie.adapters.tag_query import parse_tag_query
+from movie.adapters.memory_repository import MemoryRepository, release_date_for_row
+from movie.adapters.string_pool import StringPool
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -196,6 +199,44 @@ def test_repository_can_add_a_comment(in_memory_repo):
     assert comment in in_memory_repo.get_comments()
 
 
+def test_repository_can_add_many_comments(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    comments = [make_comment(f'Comment {i}', user, in_memory_repo.get_article(2 + i % 2), datetime(2020, 4, 1, i))
+                for i in range(10)]
+
+    in_memory_repo.add_comments(comments)
+
+    assert in_memory_repo.get_comments()[-10:] == comments
+    assert in_memory_repo.get_recently_discussed_article_ids(2) == [3, 2]
+
+
+def test_repository_adds_none_of_many_comments_if_one_is_not_attached(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    article = in_memory_repo.get_article(2)
+    number_of_comments = len(in_memory_repo.get_comments())
+    comments = [make_comment('Attached', user, article), Comment(user, article, 'Detached', datetime.today())]
+
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_comments(comments)
+    assert len(in_memory_repo.get_comments()) == number_of_comments
+
+
+def test_repository_adds_none_of_many_comments_if_one_has_a_time_zone(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    article = in_memory_repo.get_article(2)
+    number_of_comments = len(in_memory_repo.get_comments())
+    number_for_user = in_memory_repo.get_number_of_comments_for_user('thorke')
+    comments = [make_comment('Naive', user, article, datetime(2020, 4, 1)),
+                make_comment('Aware', user, article, datetime(2020, 4, 1, tzinfo=timezone.utc))]
+
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_comments(comments)
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_comment(comments[1])
+    assert len(in_memory_repo.get_comments()) == number_of_comments
+    assert in_memory_repo.get_number_of_comments_for_user('thorke') == number_for_user
+
+
 def test_repository_does_not_add_a_comment_without_a_user(in_memory_repo):
     article = in_memory_repo.get_article(2)
     comment = Comment(None, article, "Wow!", datetime.today())
@@ -220,4 +261,241 @@ def test_repository_can_retrieve_comments(in_memory_repo):
     assert len(in_memory_repo.get_comments()) == 3
 
 
+def test_repository_loaded_in_batches_matches_repository_loaded_in_one_pass(in_memory_repo, batch_loaded_repo):
+    assert batch_loaded_repo.get_number_of_articles() == in_memory_repo.get_number_of_articles()
+
+    articles = in_memory_repo.get_articles_by_id(range(1, 1001))
+    batch_loaded_articles = batch_loaded_repo.get_articles_by_id(range(1, 1001))
+    assert batch_loaded_articles == articles
+    assert [article.date for article in batch_loaded_articles] == [article.date for article in articles]
+
+    assert batch_loaded_repo.get_first_article().id == 298
+    assert batch_loaded_repo.get_last_article().id == 297
+    assert batch_loaded_repo.get_article_ids_for_tag('Sport') == in_memory_repo.get_article_ids_for_tag('Sport')
+
+
+def test_release_date_cycles_through_months_and_days():
+    assert release_date_for_row(2014, 0) == date(2015, 2, 2)
+    assert release_date_for_row(2014, 10) == date(2015, 12, 12)
+    assert release_date_for_row(2014, 11) == date(2015, 2, 13)
+    assert release_date_for_row(2014, 27) == date(2015, 7, 2)
+
+
+def test_bulk_load_keeps_articles_in_date_order():
+    repo = MemoryRepository()
+    first = Article(date(2020, 3, 1), 'First', None, None, None, 1)
+    second = Article(date(2020, 1, 1), 'Second', None, None, None, 2)
+    third = Article(date(2020, 3, 1), 'Third', None, None, None, 3)
+
+    with repo.bulk_load():
+        for article in (first, second, third):
+            repo.add_article(article)
+
+    assert repo.get_first_article() is second
+    assert repo.get_articles_by_date(date(2020, 3, 1)) == [third, first]
+
+
+def test_repository_can_filter_and_sort_articles_by_stats(in_memory_repo):
+    filters = {'rating': (8, None), 'runtime': (None, 120)}
+    article_ids = in_memory_repo.get_article_ids_by_stats(filters, sort_by='revenue', limit=3)
+
+    assert len(article_ids) == 3
+    articles = in_memory_repo.get_articles_by_id(article_ids)
+    revenues = [article.details.revenue for article in articles]
+    assert revenues == sorted(revenues, reverse=True)
+    for article in articles:
+        assert article.details.rating >= 8 and article.details.runtime < 120
+
+    # The top 3 are the first 3 of the full sorted result.
+    assert in_memory_repo.get_article_ids_by_stats(filters, sort_by='revenue')[:3] == article_ids
+    assert in_memory_repo.get_number_of_articles_by_stats(filters) == \
+        len(in_memory_repo.get_article_ids_by_stats(filters))
+
+
+def test_repository_sorts_articles_with_missing_stats_last(in_memory_repo):
+    article_ids = in_memory_repo.get_article_ids_by_stats({}, sort_by='metascore', descending=False)
+    articles = in_memory_repo.get_articles_by_id(article_ids)
+
+    metascores = [article.details.metascore for article in articles]
+    known = [metascore for metascore in metascores if metascore is not None]
+    assert metascores[:len(known)] == sorted(known)
+    assert all(metascore is None for metascore in metascores[len(known):])
+
+
+def test_repository_filters_exclude_articles_with_missing_stats(in_memory_repo):
+    article_ids = in_memory_repo.get_article_ids_by_stats({'revenue': (0, None)})
+    articles = in_memory_repo.get_articles_by_id(article_ids)
+
+    assert len(articles) > 0
+    assert all(article.details.revenue is not None for article in articles)
+
+
+def test_repository_facets_match_tag_and_stats_filters(in_memory_repo):
+    selection = {'genre': ['Comedy', 'Drama'], 'year': [2014, 2016], 'rating': [7]}
+
+    expected = set(in_memory_repo.get_article_ids_for_tag('Comedy')) | set(in_memory_repo.get_article_ids_for_tag('Drama'))
+    expected &= set(in_memory_repo.get_article_ids_by_stats({'rating': (7, 8), 'year': (2014, 2015)})) | \
+        set(in_memory_repo.get_article_ids_by_stats({'rating': (7, 8), 'year': (2016, 2017)}))
+
+    assert in_memory_repo.get_number_of_articles_for_facets(selection) == len(expected)
+    assert set(in_memory_repo.get_article_ids_for_facets(selection)) == expected
+
+    # Pages are consecutive slices of the full result.
+    article_ids = in_memory_repo.get_article_ids_for_facets(selection)
+    assert in_memory_repo.get_article_ids_for_facets(selection, 3, 3) == article_ids[3:6]
+    assert in_memory_repo.get_article_ids_for_facets(selection, -3, 3) == article_ids[:3]
+
+
+def test_repository_counts_facet_values(in_memory_repo):
+    counts = in_memory_repo.get_facet_counts({'genre': ['Comedy']})
+
+    assert counts['genre']['Comedy'] == len(in_memory_repo.get_article_ids_for_tag('Comedy'))
+    assert sum(counts['year'].values()) == len(in_memory_repo.get_article_ids_for_tag('Comedy'))
+
 
+def test_repository_can_retrieve_article_ids_for_a_tag_query(in_memory_repo):
+    comedy = set(in_memory_repo.get_article_ids_for_tag('Comedy'))
+    drama = set(in_memory_repo.get_article_ids_for_tag('Drama'))
+    romance = set(in_memory_repo.get_article_ids_for_tag('Romance'))
+
+    query = parse_tag_query('Comedy AND Drama NOT Romance')
+    assert in_memory_repo.get_article_ids_for_tag_query(query) == sorted((comedy & drama) - romance)
+
+    query = parse_tag_query('Comedy OR Nonexistent')
+    assert in_memory_repo.get_article_ids_for_tag_query(query) == sorted(comedy)
+
+
+def test_repository_tag_query_includes_articles_tagged_later(in_memory_repo):
+    query = parse_tag_query('Western')
+    before = in_memory_repo.get_article_ids_for_tag_query(query)
+
+    article = in_memory_repo.get_article(1)
+    make_tag_association(article, next(tag for tag in in_memory_repo.get_tags() if tag.tag_name == 'Western'))
+
+    assert in_memory_repo.get_article_ids_for_tag_query(query) == sorted(before + [1])
+
+
+def test_repository_can_retrieve_a_person(in_memory_repo):
+    person = in_memory_repo.get_person('Christopher Nolan')
+
+    assert person.full_name == 'Christopher Nolan'
+    assert [article.id for article in person.directed_articles] == [37, 55, 65, 81, 125]
+    assert in_memory_repo.get_person('Nobody') is None
+
+
+def test_repository_can_retrieve_article_ids_for_a_person(in_memory_repo):
+    assert in_memory_repo.get_article_ids_for_person('Christopher Nolan') == [37, 55, 65, 81, 125]
+    assert in_memory_repo.get_article_ids_for_person('Nobody') == []
+
+    # Ben Affleck directed and starred in some movies; each is listed once.
+    article_ids = in_memory_repo.get_article_ids_for_person('Ben Affleck')
+    assert len(article_ids) == len(set(article_ids))
+
+
+def test_repository_can_retrieve_article_ids_for_people(in_memory_repo):
+    assert in_memory_repo.get_article_ids_for_people(['Christopher Nolan', 'Christian Bale']) == [55, 65, 125]
+    assert in_memory_repo.get_article_ids_for_people(['Christopher Nolan', 'Christian Bale', 'Hugh Jackman']) == [65]
+    assert in_memory_repo.get_article_ids_for_people(['Christopher Nolan', 'Nobody']) == []
+
+
+def test_repository_can_retrieve_articles_between_dates(in_memory_repo):
+    start, end = date(2014, 1, 1), date(2014, 12, 31)
+    articles = in_memory_repo.get_articles_between(start, end)
+
+    assert len(articles) == in_memory_repo.get_number_of_articles_between(start, end) == 91
+    assert all(start <= article.date <= end for article in articles)
+    assert [article.date for article in articles] == sorted(article.date for article in articles)
+    assert articles[:len(in_memory_repo.get_articles_by_date(articles[0].date))] == \
+           in_memory_repo.get_articles_by_date(articles[0].date)
+
+    # Pages are slices of the whole range.
+    assert in_memory_repo.get_articles_between(start, end, 30, 3) == articles[30:33]
+    assert in_memory_repo.get_articles_between(start, end, 90, 3) == articles[90:]
+    assert in_memory_repo.get_articles_between(start, end, -5, 3) == articles[:3]
+    assert in_memory_repo.get_articles_between(end, start) == []
+    assert in_memory_repo.get_number_of_articles_between(end, start) == 0
+
+
+def test_repository_can_retrieve_similar_article_ids(in_memory_repo):
+    # The Dark Knight's closest matches share its director and star.
+    article_ids = in_memory_repo.get_similar_article_ids(55, 5)
+
+    assert len(article_ids) == 5
+    assert 55 not in article_ids
+    assert {65, 125} <= set(article_ids)
+    assert in_memory_repo.get_similar_article_ids(55, 2) == article_ids[:2]
+    assert in_memory_repo.get_similar_article_ids(10 ** 6) == []
+
+
+def test_precomputed_similar_article_ids_match_those_computed_on_demand(in_memory_repo, batch_loaded_repo):
+    batch_loaded_repo.precompute_similar_articles()
+
+    for article_id in (1, 37, 500):
+        assert batch_loaded_repo.get_similar_article_ids(article_id) == in_memory_repo.get_similar_article_ids(article_id)
+
+
+def test_repository_keeps_comment_leaderboards(in_memory_repo):
+    # Article 1 has the only comments in the test data.
+    assert in_memory_repo.get_most_commented_article_ids() == [1]
+    assert in_memory_repo.get_recently_discussed_article_ids() == [1]
+
+    user = User('Dave', '123456789')
+    in_memory_repo.add_user(user)
+    article = in_memory_repo.get_article(2)
+    in_memory_repo.add_comment(make_comment('Great!', user, article, datetime(2020, 3, 1)))
+
+    assert in_memory_repo.get_most_commented_article_ids() == [1, 2]
+    assert in_memory_repo.get_recently_discussed_article_ids() == [2, 1]
+
+
+def test_repository_keeps_highest_rated_leaderboard(in_memory_repo):
+    articles = in_memory_repo.get_articles_by_id(in_memory_repo.get_highest_rated_article_ids(5))
+    ratings = [article.details.rating for article in articles]
+
+    # Ties go to the lower id.
+    assert [article.id for article in articles] == [55, 81, 118, 37, 97]
+    expected = in_memory_repo.get_articles_by_id(in_memory_repo.get_article_ids_by_stats({}, sort_by='rating', limit=5))
+    assert ratings == [article.details.rating for article in expected]
+
+
+def test_string_pool_returns_one_copy_of_each_value():
+    pool = StringPool()
+    first = ''.join(['Ridley', ' Scott'])
+    second = ''.join(['Ridley', ' Scott'])
+    assert first is not second
+
+    assert pool.intern(first) is first
+    assert pool.intern(second) is first
+    assert pool.intern('Denis Villeneuve') == 'Denis Villeneuve'
+    assert len(pool) == 2
+    assert pool.duplicates == 1
+    assert pool.saved_bytes > 0
+
+
+def test_repository_shares_names_across_movies(in_memory_repo, batch_loaded_repo):
+    for repo in (in_memory_repo, batch_loaded_repo):
+        # Ridley Scott directed several movies in the test data.
+        articles = repo.get_articles_by_id(repo.get_article_ids_for_person('Ridley Scott'))
+        directors = [article.details.director for article in articles if article.details.director == 'Ridley Scott']
+        assert len(directors) > 1
+        assert all(director is directors[0] for director in directors)
+        assert repo.get_person('Ridley Scott').full_name is directors[0]
+
+        # IMDb links are built from the title when they're read.
+        assert repo.get_article(1).hyperlink == 'https://www.imdb.com/find?q=Guardians+of+the+Galaxy+&ref_=nv_sr_sm'
+
+
+def test_repository_pages_a_users_comments_newest_first(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    article = in_memory_repo.get_article(2)
+    comments = [make_comment(f'Comment {i}', user, article, datetime(2020, 12, 1, i)) for i in range(5)]
+    in_memory_repo.add_comments(comments[1:])
+    # An older comment, added late, is put in time order.
+    in_memory_repo.add_comment(comments[0])
+
+    assert in_memory_repo.get_number_of_comments_for_user('thorke') == 6
+    assert in_memory_repo.get_comments_for_user('thorke', 0, 2) == [comments[4], comments[3]]
+    assert in_memory_repo.get_comments_for_user('thorke', 4, 10) == [comments[0], next(user.comments)]
+    assert in_memory_repo.get_comments_for_user('thorke', 6, 10) == []
+    assert in_memory_repo.get_comments_for_user('nobody') == []
+    assert in_memory_repo.get_number_of_comments_for_user('nobody') == 0
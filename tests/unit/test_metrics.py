@@ -0,0 +1,42 @@
+from movie.adapters.instrumented_repository import InstrumentedRepository
+from movie.metrics.registry import Histogram, MetricsRegistry
+
+
+class StubCache:
+    hits = 3
+    misses = 1
+
+
+def test_histogram_counts_observations_into_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [2, 3, 4]
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    registry.describe('latency_seconds', 'Latency.')
+    registry.observe('latency_seconds', 'endpoint', 'home_bp.home', 0.002)
+    registry.register_cache('pages', StubCache())
+
+    text = registry.to_prometheus()
+
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{endpoint="home_bp.home",le="0.0025"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="home_bp.home",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{endpoint="home_bp.home"} 1' in text
+    assert 'movie_cache_hit_ratio{cache="pages"} 0.75' in text
+
+
+def test_instrumented_repository_records_each_call(in_memory_repo):
+    registry = MetricsRegistry()
+    repo = InstrumentedRepository(in_memory_repo, registry)
+
+    assert repo.get_article(1) is in_memory_repo.get_article(1)
+    repo.get_article(2)
+
+    assert registry.histogram('movie_repository_call_seconds', 'method', 'get_article').count == 2
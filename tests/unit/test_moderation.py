@@ -0,0 +1,16 @@
+from better_profanity import profanity
+
+from movie.articles.moderation import contains_profanity
+
+
+def test_contains_profanity_agrees_with_better_profanity():
+    texts = [
+        'A wonderful film', 'What a load of shit', 'Sh1t happens', 'a blow job joke', 'blow-job', 'bull shit',
+        '', '!!', 'x', 'Not bad, not great', 'assassin', 'The @ss was great'
+    ]
+
+    assert contains_profanity(texts).tolist() == [profanity.contains_profanity(text) for text in texts]
+
+
+def test_contains_profanity_of_no_texts():
+    assert contains_profanity([]).tolist() == []
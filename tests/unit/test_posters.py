@@ -0,0 +1,111 @@
+import os
+import shutil
+from datetime import date
+
+from movie.adapters.repository import AbstractRepository
+from movie.domain.model import Article
+from movie.posters.repository import PosterRepository
+from movie.posters.store import PosterStore, parse_sizes
+
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'movie', 'static')
+
+
+def test_parse_sizes():
+    assert parse_sizes('small:300, large:500') == {'small': 300, 'large': 500}
+
+
+def test_poster_store_writes_content_hashed_thumbnails(tmp_path):
+    source_dir = tmp_path / 'source'
+    source_dir.mkdir()
+    shutil.copy(os.path.join(STATIC_DIR, 'covid-19.png'), str(source_dir / '3.png'))
+    (source_dir / 'notes.txt').write_text('not a poster')
+
+    store = PosterStore(str(tmp_path / 'cache'), {'small': 100, 'large': 300}, str(source_dir),
+                        os.path.join(STATIC_DIR, 'logo.png'))
+    assert store.poster_filename(3, 'small') is None
+
+    store.start()
+    store.join()
+
+    filename = store.poster_filename(3, 'small')
+    assert filename.endswith('.png') and len(filename) == len('0123456789abcdef.png')
+    assert os.path.exists(os.path.join(store.cache_dir, filename))
+
+    # Articles without a poster of their own get the default poster, and unknown sizes have no thumbnail.
+    assert store.poster_filename(1, 'large') not in (None, store.poster_filename(3, 'large'))
+    assert store.poster_filename(3, 'huge') is None
+
+
+def test_poster_store_only_stores_each_image_once(tmp_path):
+    store = PosterStore(str(tmp_path), {'small': 100})
+    poster = os.path.join(STATIC_DIR, 'covid-19.png')
+    store.process(1, poster)
+    store.process(2, poster)
+
+    assert store.poster_filename(1, 'small') == store.poster_filename(2, 'small')
+    assert len(os.listdir(str(tmp_path))) == 1
+
+
+def test_poster_store_downloads_a_remote_default_poster_once(tmp_path):
+    remote = tmp_path / 'remote.png'
+    shutil.copy(os.path.join(STATIC_DIR, 'logo.png'), str(remote))
+    source_dir = tmp_path / 'source'
+
+    store = PosterStore(str(tmp_path / 'cache'), {'small': 100}, str(source_dir), remote.as_uri())
+    store.start()
+    store.join()
+    filename = store.poster_filename(1, 'small')
+    assert filename is not None
+    assert [name.startswith('remote-') for name in os.listdir(str(source_dir))] == [True]
+
+    # The local copy is used from then on.
+    remote.unlink()
+    store = PosterStore(str(tmp_path / 'cache'), {'small': 100}, str(source_dir), remote.as_uri())
+    store.start()
+    store.join()
+    assert store.poster_filename(1, 'small') == filename
+
+
+def test_poster_store_falls_back_to_the_remote_image_if_the_download_fails(tmp_path):
+    missing = (tmp_path / 'missing.png').as_uri()
+    store = PosterStore(str(tmp_path / 'cache'), {'small': 100}, str(tmp_path / 'source'), missing)
+    store.start()
+    store.join()
+
+    assert store.poster_filename(1, 'small') is None
+
+
+def test_poster_worker_survives_any_error(tmp_path, monkeypatch):
+    store = PosterStore(str(tmp_path), {'small': 100})
+
+    def refuse(article_id, path):
+        if article_id == 1:
+            raise RuntimeError('Image too large')
+        return original(article_id, path)
+    original = store.process
+    monkeypatch.setattr(store, 'process', refuse)
+
+    store.start()
+    store.add_poster(1, os.path.join(STATIC_DIR, 'logo.png'))
+    store.add_poster(2, os.path.join(STATIC_DIR, 'covid-19.png'))
+    store.join()
+
+    assert store.poster_filename(1, 'small') is None
+    assert store.poster_filename(2, 'small') is not None
+
+
+def test_poster_repository_queues_the_posters_of_added_articles(in_memory_repo, tmp_path):
+    source_dir = tmp_path / 'source'
+    source_dir.mkdir()
+    shutil.copy(os.path.join(STATIC_DIR, 'covid-19.png'), str(source_dir / '5001.png'))
+    store = PosterStore(str(tmp_path / 'cache'), {'small': 100}, str(source_dir))
+    store.start()
+    repo = PosterRepository(in_memory_repo, store)
+    assert AbstractRepository.__abstractmethods__ <= set(vars(PosterRepository))
+
+    repo.add_article(Article(date(2020, 1, 1), 'New', 'A new movie', 'https://example.com', None, 5001))
+    store.join()
+
+    assert store.poster_filename(5001, 'small') is not None
+    assert repo.get_article(5001) is in_memory_repo.get_article(5001)
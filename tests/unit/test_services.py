@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime, timezone
 
 import pytest
 
@@ -6,6 +6,7 @@ from movie.authentication.services import AuthenticationException
 from movie.articles import services as news_services
 from movie.authentication import services as auth_services
 from movie.articles.services import NonExistentArticleException
+from movie.adapters.tag_query import TagQueryException
 
 
 def test_can_add_user(in_memory_repo):
@@ -88,6 +89,49 @@ def test_cannot_add_comment_by_unknown_user(in_memory_repo):
         news_services.add_comment(article_id, comment_text, username, in_memory_repo)
 
 
+def test_can_add_many_comments_and_report_the_invalid_ones(in_memory_repo):
+    items = [
+        {'article_id': 3, 'username': 'fmercury', 'comment': 'Great soundtrack'},
+        {'article_id': 3, 'username': 'fmercury', 'comment': 'ok'},
+        {'article_id': 4, 'username': 'thorke', 'comment': 'What a load of shit', 'timestamp': '2020-03-01T10:00:00'},
+        {'article_id': 5000, 'username': 'gmichael', 'comment': 'Which movie is this?'},
+        {'article_id': 'three', 'username': 'thorke', 'comment': 'Not a number'},
+        {'article_id': 4, 'username': 'thorke', 'comment': 'Better than the book', 'timestamp': '2020-03-01T10:00:00'}
+    ]
+
+    number_added, errors = news_services.add_comments(items, in_memory_repo)
+
+    assert number_added == 2
+    assert errors == [
+        {'index': 1, 'errors': [news_services.COMMENT_TOO_SHORT_MESSAGE]},
+        {'index': 2, 'errors': [news_services.COMMENT_PROFANITY_MESSAGE]},
+        {'index': 3, 'errors': ['Unknown user', 'Unknown article']},
+        {'index': 4, 'errors': ['Invalid comment']}
+    ]
+    assert news_services.get_comments_for_article(4, in_memory_repo)[-1]['comment_text'] == 'Better than the book'
+
+
+def test_add_many_comments_rejects_invalid_usernames_and_localises_timestamps(in_memory_repo):
+    items = [
+        {'article_id': 3, 'username': ['fmercury'], 'comment': 'Great soundtrack'},
+        {'article_id': 3, 'username': 'fmercury', 'comment': 'Loved it', 'timestamp': '2020-01-01T00:00:00+00:00'}
+    ]
+
+    number_added, errors = news_services.add_comments(items, in_memory_repo)
+
+    assert number_added == 1
+    assert errors == [{'index': 0, 'errors': ['Invalid comment']}]
+    comment = in_memory_repo.get_comments()[-1]
+    assert comment.timestamp == datetime(2020, 1, 1, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def test_similar_articles_are_only_what_is_needed_to_link_to_them(in_memory_repo):
+    similar = news_services.get_similar_articles(55, 5, in_memory_repo)
+
+    assert [article['id'] for article in similar] == in_memory_repo.get_similar_article_ids(55, 5)
+    assert all(set(article) == {'id', 'title', 'date'} for article in similar)
+
+
 def test_can_get_article(in_memory_repo):
     article_id = 298
 
@@ -179,3 +223,82 @@ def test_get_comments_for_article_without_comments(in_memory_repo):
     comments_as_dict = news_services.get_comments_for_article(2, in_memory_repo)
     assert len(comments_as_dict) == 0
 
+
+
+def test_get_article_ids_by_stats(in_memory_repo):
+    filters = {'year': (2016, 2017)}
+    article_ids = news_services.get_article_ids_by_stats(filters, 'rating', True, 5, in_memory_repo)
+    articles_as_dict = news_services.get_articles_by_id(article_ids, in_memory_repo)
+
+    assert len(articles_as_dict) == 5
+    assert all('(2016)' in article['title'] for article in articles_as_dict)
+    assert news_services.get_number_of_articles_by_stats(filters, in_memory_repo) > 5
+
+
+def test_get_article_ids_for_facets(in_memory_repo):
+    selection = {'genre': ['Animation'], 'year': [2016]}
+    article_ids = news_services.get_article_ids_for_facets(selection, 0, 3, in_memory_repo)
+    articles_as_dict = news_services.get_articles_by_id(article_ids, in_memory_repo)
+
+    assert len(articles_as_dict) == 3
+    assert all('(2016)' in article['title'] for article in articles_as_dict)
+    assert all('Animation' in [tag['name'] for tag in article['tags']] for article in articles_as_dict)
+    assert news_services.get_facet_counts(selection, in_memory_repo)['genre']['Animation'] == \
+        news_services.get_number_of_articles_for_facets(selection, in_memory_repo)
+
+
+def test_get_article_ids_for_tag_query(in_memory_repo):
+    article_ids = news_services.get_article_ids_for_tag_query('Animation AND Comedy NOT Family', in_memory_repo)
+    articles_as_dict = news_services.get_articles_by_id(article_ids, in_memory_repo)
+
+    assert len(articles_as_dict) > 0
+    for article in articles_as_dict:
+        tag_names = [tag['name'] for tag in article['tags']]
+        assert 'Animation' in tag_names and 'Comedy' in tag_names and 'Family' not in tag_names
+
+
+def test_cannot_get_article_ids_for_malformed_tag_query(in_memory_repo):
+    with pytest.raises(TagQueryException):
+        news_services.get_article_ids_for_tag_query('Animation AND', in_memory_repo)
+
+
+def test_get_article_ids_for_people(in_memory_repo):
+    assert news_services.get_article_ids_for_people(['Christopher Nolan'], in_memory_repo) == [37, 55, 65, 81, 125]
+    assert news_services.get_article_ids_for_people(['Christopher Nolan', 'Anne Hathaway'], in_memory_repo) == [37, 125]
+
+
+def test_article_dict_lists_director_and_actors(in_memory_repo):
+    article_as_dict = news_services.get_article(55, in_memory_repo)
+
+    assert article_as_dict['director'] == 'Christopher Nolan'
+    assert article_as_dict['actors'] == ['Christian Bale', 'Heath Ledger', 'Aaron Eckhart', 'Michael Caine']
+
+
+def test_get_first_and_last_dates(in_memory_repo):
+    assert news_services.get_first_date(in_memory_repo) == date(2007, 2, 2)
+    assert news_services.get_last_date(in_memory_repo) == date(2017, 12, 28)
+
+
+def test_get_archive(in_memory_repo):
+    years = news_services.get_archive(in_memory_repo)
+    assert years[0] == {'year': 2007, 'count': 44}
+    assert sum(entry['count'] for entry in years) == 1000
+
+    months = news_services.get_archive(in_memory_repo, 2015)
+    assert months[0] == {'year': 2015, 'month': 2, 'count': 11}
+
+    days = news_services.get_archive(in_memory_repo, 2015, 2)
+    assert days[0] == {'date': date(2015, 2, 2), 'count': 1}
+
+
+def test_get_comments_for_user(in_memory_repo):
+    news_services.add_comment(2, 'A second look', 'thorke', in_memory_repo)
+
+    comments, number_of_comments = news_services.get_comments_for_user('thorke', 0, 1, in_memory_repo)
+    assert number_of_comments == 2
+    assert [comment['comment_text'] for comment in comments] == ['A second look']
+    assert comments[0]['article_id'] == 2
+    assert comments[0]['article_date'] == in_memory_repo.get_article(2).date
+
+    with pytest.raises(news_services.UnknownUserException):
+        news_services.get_comments_for_user('nobody', 0, 1, in_memory_repo)
@@ -0,0 +1,51 @@
+from movie.adapters import similarity_index
+from movie.adapters.similarity_index import SimilarityIndex
+
+
+def make_index():
+    index = SimilarityIndex(neighbours_per_movie=2)
+    index.add(0, ['Action', 'Crime'], 2008, 9.0, 'Christopher Nolan', ['Christian Bale', 'Heath Ledger'])
+    index.add(1, ['Action', 'Crime'], 2008, 6.4, 'Peter Berg', ['Will Smith'])
+    index.add(2, ['Drama', 'Mystery'], 2006, 8.5, 'Christopher Nolan', ['Christian Bale', 'Hugh Jackman'])
+    index.add(3, ['Romance'], 1995, 5.0, 'Someone Else', ['Nobody'])
+    return index
+
+
+def test_similarity_index_ranks_shared_people_above_shared_genres():
+    index = make_index()
+
+    assert index.neighbours(0) == [2, 1]
+    assert index.neighbours(3) == []
+
+
+def test_similarity_scores_are_symmetric():
+    index = make_index()
+
+    candidates, scores = index.score_candidates(0)
+    score_of = dict(zip(candidates.tolist(), scores.tolist()))
+    candidates, scores = index.score_candidates(2)
+
+    assert dict(zip(candidates.tolist(), scores.tolist()))[0] == score_of[2]
+
+
+def test_similarity_index_offers_added_movies_to_computed_neighbour_lists():
+    index = make_index()
+    index.precompute()
+    assert index.neighbours(1) == [0]
+
+    index.add(4, ['Action', 'Crime'], 2008, 6.5, 'Peter Berg', ['Will Smith'])
+
+    assert index.neighbours(1) == [4, 0]
+    assert index.neighbours(4)[0] == 1
+
+
+def test_similarity_index_bounds_candidates(monkeypatch):
+    monkeypatch.setattr(similarity_index, 'CANDIDATES_PER_POSTING', 5)
+    index = SimilarityIndex()
+    for row in range(100):
+        index.add(row, ['Drama'], 2010, 7.0, 'Prolific Director', ['Busy Actor'])
+
+    candidates, _ = index.score_candidates(0)
+
+    assert len(candidates) == 5
+    assert set(candidates.tolist()) == {95, 96, 97, 98, 99}
@@ -0,0 +1,126 @@
+from datetime import date, datetime
+
+import pytest
+
+from movie.adapters.repository import RepositoryException
+from movie.adapters.sqlite_repository import SqliteRepository
+from movie.adapters.tag_query import TagQueryException, parse_tag_query
+from movie.domain.model import User, Article, make_comment
+
+
+def test_sqlite_repository_matches_memory_repository(in_memory_repo, sqlite_repo):
+    queries = [
+        ('get_number_of_articles',),
+        ('get_users',),
+        ('get_first_article',),
+        ('get_last_article',),
+        ('get_articles_by_date', date(2017, 6, 6)),
+        ('get_articles_by_id', [3, 1, 5000, 2]),
+        ('get_article_ids_for_tag', 'Drama'),
+        ('get_article_ids_for_tag_query', parse_tag_query('(Action OR Adventure) AND NOT Drama')),
+        ('get_article_ids_for_tag_query', parse_tag_query('NOT Drama OR Horror')),
+        ('get_article_ids_for_person', 'Christopher Nolan'),
+        ('get_article_ids_for_people', ['Christopher Nolan', 'Christian Bale']),
+        ('get_most_commented_article_ids', 5),
+        ('get_recently_discussed_article_ids', None),
+        ('get_highest_rated_article_ids', 5),
+        ('get_similar_article_ids', 55, 5),
+        ('get_article_ids_by_stats', {'rating': (7, None), 'metascore': (None, 80)}, 'votes', True, 10),
+        ('get_number_of_articles_by_stats', {'revenue': (100, None)}),
+        ('get_article_ids_for_facets', {'genre': ['Drama', 'Comedy'], 'rating': [7]}, 3, 10),
+        ('get_number_of_articles_for_facets', {'genre': ['Sci-Fi'], 'year': [2014, 2016]}),
+        ('get_facet_counts', {'genre': ['Drama'], 'rating': [7]}),
+        ('get_articles_between', date(2014, 1, 1), date(2014, 12, 31), 10, 5),
+        ('get_articles_between', date(2017, 12, 1), date(2018, 1, 1), 0, None),
+        ('get_number_of_articles_between', date(2014, 1, 1), date(2014, 12, 31)),
+        ('get_comments_for_user', 'thorke', 0, None),
+        ('get_comments_for_user', 'nobody', 0, 10),
+        ('get_number_of_comments_for_user', 'fmercury'),
+    ]
+    for method_name, *args in queries:
+        assert getattr(sqlite_repo, method_name)(*args) == getattr(in_memory_repo, method_name)(*args), method_name
+
+
+def test_sqlite_repository_has_the_same_calendar_as_memory_repository(in_memory_repo, sqlite_repo):
+    calendar = sqlite_repo.get_calendar()
+    expected = in_memory_repo.get_calendar()
+
+    assert calendar.years() == expected.years()
+    assert calendar.days(2016, 5) == expected.days(2016, 5)
+
+    sqlite_repo.add_article(Article(date(2030, 1, 1), 'Sequel', 'Coming soon', 'https://example.com',
+                                    'https://example.com/image.png', 5001))
+    assert sqlite_repo.get_calendar().last_date() == date(2030, 1, 1)
+
+
+def test_sqlite_repository_returns_articles_with_tags_and_comments(sqlite_repo):
+    article = sqlite_repo.get_article(1)
+
+    assert article.title == 'Guardians of the Galaxy (2014)    -   8/10'
+    assert [tag.tag_name for tag in article.tags] == ['Action', 'Adventure', 'Sci-Fi', 'Comedy']
+    assert [comment.user.username for comment in article.comments] == \
+           [comment.user.username for comment in sqlite_repo.get_comments() if comment.article.id == 1]
+
+
+def test_sqlite_repository_can_add_a_comment(sqlite_repo):
+    user = sqlite_repo.get_user('thorke')
+    article = sqlite_repo.get_article(2)
+    comment = make_comment('Worth watching twice', user, article, datetime(2020, 12, 1, 9, 30))
+    sqlite_repo.add_comment(comment)
+
+    assert list(sqlite_repo.get_article(2).comments)[-1] == comment
+    assert sqlite_repo.get_recently_discussed_article_ids(1) == [2]
+
+
+def test_sqlite_repository_can_add_many_comments(sqlite_repo):
+    user = sqlite_repo.get_user('thorke')
+    article = sqlite_repo.get_article(2)
+    comments = [make_comment(f'Comment {i}', user, article, datetime(2020, 12, 1, i)) for i in range(5)]
+    sqlite_repo.add_comments(comments)
+
+    assert list(sqlite_repo.get_article(2).comments)[-5:] == comments
+    assert sqlite_repo.get_most_commented_article_ids(1) == [2]
+
+    # Newest first, from the user's index.
+    assert sqlite_repo.get_comments_for_user('thorke', 1, 2) == [comments[3], comments[2]]
+    assert sqlite_repo.get_number_of_comments_for_user('thorke') == 6
+
+
+def test_sqlite_repository_does_not_add_a_comment_without_an_article_properly_attached(sqlite_repo):
+    user = sqlite_repo.get_user('thorke')
+    article = sqlite_repo.get_article(2)
+    comment = make_comment('Worth watching twice', user, article)
+    detached = sqlite_repo.get_article(2)
+    comment._article = detached
+
+    with pytest.raises(RepositoryException):
+        sqlite_repo.add_comment(comment)
+
+
+def test_sqlite_repository_rejects_duplicate_users(sqlite_repo):
+    with pytest.raises(RepositoryException):
+        sqlite_repo.add_user(User('thorke', 'password'))
+
+
+def test_sqlite_repository_rejects_unknown_columns(sqlite_repo):
+    with pytest.raises(RepositoryException):
+        sqlite_repo.get_article_ids_by_stats({'rating; DROP TABLE articles': (None, None)})
+
+
+def test_sqlite_repository_keeps_its_contents_in_a_file(tmp_path):
+    database = str(tmp_path / 'movies.db')
+    repo = SqliteRepository(database)
+    repo.add_article(Article(date(2020, 3, 15), 'Coronavirus', 'Stay home', 'https://example.com',
+                             'https://example.com/image.png', 7))
+    repo.close()
+
+    reopened = SqliteRepository(database)
+    article = reopened.get_article(7)
+    assert article.title == 'Coronavirus'
+    assert article.first_para == 'Stay home'
+    reopened.close()
+
+
+def test_sqlite_repository_rejects_unknown_tag_query_nodes(sqlite_repo):
+    with pytest.raises(TagQueryException):
+        sqlite_repo.get_article_ids_for_tag_query('Action')
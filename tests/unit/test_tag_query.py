@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from movie.adapters.bitmap_index import Bitmap
+from movie.adapters.tag_query import TagQueryException, evaluate_tag_query, parse_tag_query
+
+
+def test_parse_tag_query_precedence():
+    assert str(parse_tag_query('Sci-Fi AND Comedy NOT Horror')) == '(Sci-Fi AND Comedy AND NOT Horror)'
+    assert str(parse_tag_query('Action OR Adventure AND Drama')) == '(Action OR (Adventure AND Drama))'
+    assert str(parse_tag_query('(Action OR Adventure) AND NOT Drama')) == '((Action OR Adventure) AND NOT Drama)'
+    assert str(parse_tag_query('"Film Noir" OR Drama')) == '("Film Noir" OR Drama)'
+    assert str(parse_tag_query('NOT NOT Drama')) == 'NOT NOT Drama'
+
+
+@pytest.mark.parametrize('text', ['', 'AND Drama', 'Drama AND', 'Drama Comedy', '(Drama', 'Drama)', 'NOT'])
+def test_parse_tag_query_rejects_malformed_queries(text):
+    with pytest.raises(TagQueryException):
+        parse_tag_query(text)
+
+
+def test_evaluate_tag_query_matches_set_semantics():
+    # Dense tags are given as Bitmaps and sparse ones as lists, as the repository does.
+    generator = random.Random(235)
+    universe = set(range(1, 2001))
+    tags = {
+        'A': sorted(generator.sample(sorted(universe), 900)),
+        'B': sorted(generator.sample(sorted(universe), 600)),
+        'C': sorted(generator.sample(sorted(universe), 30)),
+        'D': sorted(generator.sample(sorted(universe), 10))
+    }
+    dense = {'A', 'B'}
+
+    def postings(tag_name):
+        ids = tags.get(tag_name, list())
+        return Bitmap.from_rows(ids) if tag_name in dense else ids
+
+    sets = {tag_name: set(ids) for tag_name, ids in tags.items()}
+    expectations = {
+        'A AND B': sets['A'] & sets['B'],
+        'A AND C NOT B': (sets['A'] & sets['C']) - sets['B'],
+        'C OR D OR A': sets['C'] | sets['D'] | sets['A'],
+        'NOT A': universe - sets['A'],
+        'C NOT D': sets['C'] - sets['D'],
+        '(C OR D) AND NOT (A OR B)': (sets['C'] | sets['D']) - (sets['A'] | sets['B']),
+        'C AND Unknown': set(),
+        'D OR NOT C': sets['D'] | (universe - sets['C'])
+    }
+    for text, expected in expectations.items():
+        assert evaluate_tag_query(parse_tag_query(text), postings, lambda: Bitmap.from_rows(universe)) == \
+            sorted(expected), text
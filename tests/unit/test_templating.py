@@ -0,0 +1,45 @@
+import os
+
+import pytest
+from jinja2 import DictLoader, Environment
+
+from movie.adapters.caching_repository import ExpiringLRUCache
+from movie.templating.templating import FragmentCacheExtension, private_directory
+
+
+def make_environment(fragment_cache):
+    environment = Environment(loader=DictLoader({
+        'page.html': "{% cache 'greeting', version %}Hello {{ name }}{% endcache %}"
+    }), extensions=[FragmentCacheExtension])
+    environment.fragment_cache = fragment_cache
+    return environment
+
+
+def test_fragments_are_reused_until_their_version_changes():
+    cache = ExpiringLRUCache()
+    template = make_environment(cache).get_template('page.html')
+
+    assert template.render(name='Ann', version=1) == 'Hello Ann'
+    # The name isn't part of the key, so the cached fragment is reused.
+    assert template.render(name='Bob', version=1) == 'Hello Ann'
+    assert template.render(name='Bob', version=2) == 'Hello Bob'
+    assert cache.hits == 1
+
+
+def test_fragments_are_rendered_every_time_without_a_cache():
+    template = make_environment(None).get_template('page.html')
+
+    assert template.render(name='Ann', version=1) == 'Hello Ann'
+    assert template.render(name='Bob', version=1) == 'Hello Bob'
+
+
+def test_bytecode_cache_directory_must_be_private(tmp_path):
+    private = str(tmp_path / 'bytecode')
+    assert private_directory(private) == private
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError):
+        private_directory(str(shared))